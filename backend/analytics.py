@@ -0,0 +1,262 @@
+"""
+Vectorized transaction analytics for SmartLedger
+Loads a user's transactions into columnar NumPy arrays once and computes
+monthly/category aggregates, robust anomaly scores and trends from them.
+"""
+
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+# Scale factor that makes the median absolute deviation comparable to a standard deviation
+MAD_SCALE = 0.6745
+# Same, for the mean absolute deviation fallback used when the MAD is zero
+MEAN_AD_SCALE = 0.7979
+
+
+class TransactionFrame:
+    """
+    Columnar view of transaction rows.
+    Category names are dictionary-encoded and dates are kept as datetime64[D],
+    so every aggregate is a handful of array operations regardless of row count.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], amounts: np.ndarray,
+                 category_codes: np.ndarray, categories: np.ndarray, dates: np.ndarray):
+        self.rows = rows
+        self.amounts = amounts
+        self.category_codes = category_codes
+        self.categories = categories
+        self.dates = dates
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "TransactionFrame":
+        amounts = np.fromiter((float(r['amount']) for r in rows), dtype=np.float64, count=len(rows))
+        dates = np.array([r['date'][:10] for r in rows], dtype='datetime64[D]')
+        categories, category_codes = np.unique(np.array([r['category'] for r in rows], dtype=object), return_inverse=True)
+        return cls(rows, amounts, category_codes.astype(np.intp), categories, dates)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    # ---- aggregates ----
+
+    def mean(self) -> float:
+        return float(self.amounts.mean()) if len(self) else 0.0
+
+    def category_totals(self) -> Dict[str, float]:
+        sums = np.bincount(self.category_codes, weights=self.amounts, minlength=len(self.categories))
+        return {str(cat): float(total) for cat, total in zip(self.categories, sums)}
+
+    def category_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.category_codes, minlength=len(self.categories))
+        return {str(cat): int(count) for cat, count in zip(self.categories, counts)}
+
+    def _month_numbers(self) -> np.ndarray:
+        # Months since 1970-01, which sort chronologically
+        return self.dates.astype('datetime64[M]').astype(np.int64)
+
+    def monthly_totals(self, fill_gaps: bool = True) -> Tuple[List[str], np.ndarray]:
+        """
+        Sum amounts per calendar month in chronological order.
+        With fill_gaps, months without transactions between the first and last are reported as 0.
+        """
+        if not len(self):
+            return [], np.zeros(0)
+
+        months = self._month_numbers()
+        first = months.min()
+        sums = np.bincount(months - first, weights=self.amounts)
+        month_numbers = np.arange(first, first + len(sums))
+
+        if not fill_gaps:
+            present = np.bincount(months - first).astype(bool)
+            sums, month_numbers = sums[present], month_numbers[present]
+
+        labels = [str(m) for m in month_numbers.astype('datetime64[M]')]
+        return labels, sums
+
+    # ---- anomaly detection ----
+
+    def robust_z_scores(self, min_group_size: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score each amount against its category's median using the MAD (modified z-score).
+        Categories with fewer than min_group_size rows are scored against all rows instead.
+        Returns (z_scores, reference_medians).
+        """
+        if not len(self):
+            return np.zeros(0), np.zeros(0)
+
+        group_z, group_medians = _grouped_robust_z(self.amounts, self.category_codes, len(self.categories))
+        global_z, global_medians = _grouped_robust_z(self.amounts, np.zeros(len(self), dtype=np.intp), 1)
+
+        counts = np.bincount(self.category_codes, minlength=len(self.categories))
+        small = counts[self.category_codes] < min_group_size
+        return np.where(small, global_z, group_z), np.where(small, global_medians, group_medians)
+
+    def anomalies(self, threshold: float = 3.5, min_group_size: int = 5) -> List[Dict[str, Any]]:
+        """Rows that are unusually large for their category, highest score first."""
+        z_scores, medians = self.robust_z_scores(min_group_size)
+        flagged = np.flatnonzero(z_scores > threshold)
+        flagged = flagged[np.argsort(-z_scores[flagged], kind='stable')]
+        return [
+            {
+                'row': self.rows[i],
+                'z_score': round(float(z_scores[i]), 2),
+                'reference_median': round(float(medians[i]), 2)
+            }
+            for i in flagged
+        ]
+
+
+def _group_medians(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """Median of values within each group, via one lexsort instead of a loop over groups."""
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    ordered = values[np.lexsort((values, codes))]
+    safe_counts = np.maximum(counts, 1)
+    lower = ordered[np.minimum(starts + (safe_counts - 1) // 2, len(values) - 1)]
+    upper = ordered[np.minimum(starts + safe_counts // 2, len(values) - 1)]
+    return np.where(counts > 0, (lower + upper) / 2, 0.0)
+
+
+def _grouped_robust_z(values: np.ndarray, codes: np.ndarray, n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    medians = _group_medians(values, codes, n_groups)
+    deviations = np.abs(values - medians[codes])
+    mad = _group_medians(deviations, codes, n_groups)
+
+    # A zero MAD (most amounts identical) falls back to the mean absolute deviation
+    counts = np.maximum(np.bincount(codes, minlength=n_groups), 1)
+    mean_ad = np.bincount(codes, weights=deviations, minlength=n_groups) / counts
+
+    scale = np.where(mad > 0, mad / MAD_SCALE, mean_ad / MEAN_AD_SCALE)[codes]
+    diffs = values - medians[codes]
+    z_scores = np.divide(diffs, scale, out=np.zeros_like(diffs), where=scale > 0)
+    return z_scores, medians[codes]
+
+
+def trend_slope(values: np.ndarray) -> float:
+    """Least-squares slope of values per period (e.g. dollars per month)."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return 0.0
+    return float(np.polyfit(np.arange(len(values)), values, 1)[0])
+
+
+# Trailing window of the median that smooths monthly totals before their trend is fitted
+TREND_MEDIAN_WINDOW = 3
+
+
+def rolling_median(values: np.ndarray, window: int) -> np.ndarray:
+    """Median of each full trailing window; the result has len(values) - window + 1 entries."""
+    values = np.asarray(values, dtype=np.float64)
+    if window < 1 or len(values) < window:
+        return np.zeros(0)
+    return np.median(np.lib.stride_tricks.sliding_window_view(values, window), axis=1)
+
+
+def trend_direction(values: np.ndarray, tolerance: float = 0.05, window: int = 1) -> str:
+    """
+    Classify a series as increasing/decreasing when its slope exceeds tolerance of its mean per period.
+    With window > 1 the slope is fitted to the rolling median, so one unusual period does not set
+    the trend; series too short to leave two smoothed points are used as they are.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if window > 1 and len(values) > window:
+        values = rolling_median(values, window)
+    slope = trend_slope(values)
+    baseline = abs(float(values.mean())) if len(values) else 0.0
+    if baseline == 0 or abs(slope) <= tolerance * baseline:
+        return "stable"
+    return "increasing" if slope > 0 else "decreasing"
+
+
+# ---- forecasting ----
+
+# Candidate smoothing factors; the one with the lowest one-step-ahead error is used
+SMOOTHING_ALPHAS = np.linspace(0.1, 0.9, 9)
+# z value for the two-sided 95% forecast interval
+INTERVAL_Z = 1.96
+
+
+def rollup_matrix(rows: List[Dict[str, Any]], first_month: np.datetime64,
+                  n_months: int) -> Tuple[List[str], np.ndarray]:
+    """
+    Arrange monthly_rollups rows into (categories, matrix) where matrix[c, m] is
+    category c's amount_sum in month first_month + m. Missing months are 0.
+    """
+    first = first_month.astype('datetime64[M]').astype(np.int64)
+    month_numbers = np.fromiter(((r['year'] - 1970) * 12 + r['month'] - 1 for r in rows), dtype=np.int64, count=len(rows))
+    offsets = month_numbers - first
+    in_range = (offsets >= 0) & (offsets < n_months)
+
+    amounts = np.fromiter((float(r['amount_sum']) for r in rows), dtype=np.float64, count=len(rows))[in_range]
+    names = np.array([r['category'] for r in rows], dtype=object)[in_range]
+    if not len(names):
+        return [], np.zeros((0, n_months))
+
+    categories, codes = np.unique(names, return_inverse=True)
+    flat = codes * n_months + offsets[in_range]
+    matrix = np.bincount(flat, weights=amounts, minlength=len(categories) * n_months)
+    return [str(c) for c in categories], matrix.reshape(len(categories), n_months)
+
+
+def exponential_smoothing(values: np.ndarray, horizon: int = 1) -> Dict[str, float]:
+    """
+    Forecast the value `horizon` periods after a series with simple exponential smoothing.
+    The smoothing factor is fitted by one-step-ahead squared error over a fixed grid, and the
+    interval is widened from the RMSE of those one-step errors by the usual sqrt(1 + (h-1)*alpha^2).
+    Deterministic: the same history always yields the same forecast.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return {'forecast': 0.0, 'lower': 0.0, 'upper': 0.0, 'alpha': 0.0}
+
+    # levels[a, t] is the smoothed level after observing values[:t + 1] with alpha a
+    alphas = SMOOTHING_ALPHAS[:, None]
+    levels = np.empty((len(SMOOTHING_ALPHAS), len(values)))
+    levels[:, 0] = values[0]
+    for t in range(1, len(values)):
+        levels[:, t] = alphas[:, 0] * values[t] + (1 - alphas[:, 0]) * levels[:, t - 1]
+
+    if len(values) > 1:
+        errors = values[1:] - levels[:, :-1]
+        sse = (errors ** 2).sum(axis=1)
+        best = int(np.argmin(sse))
+        rmse = float(np.sqrt(sse[best] / errors.shape[1]))
+    else:
+        best, rmse = len(SMOOTHING_ALPHAS) // 2, 0.0
+
+    forecast = float(levels[best, -1])
+    alpha = float(SMOOTHING_ALPHAS[best])
+    margin = INTERVAL_Z * rmse * np.sqrt(1 + (horizon - 1) * alpha ** 2)
+    return {
+        'forecast': round(forecast, 2),
+        'lower': round(max(forecast - margin, 0.0), 2),
+        'upper': round(forecast + margin, 2),
+        'alpha': round(alpha, 2)
+    }
+
+
+def forecast_rollups(rows: List[Dict[str, Any]], first_month: np.datetime64, n_months: int,
+                     horizon: int = 1) -> Dict[str, Any]:
+    """
+    Forecast total and per-category spending `horizon` months after the window of
+    monthly_rollups rows starting at first_month, largest categories first.
+    """
+    categories, matrix = rollup_matrix(rows, first_month, n_months)
+    totals = matrix.sum(axis=0)
+
+    # Months before the user's first recorded spending are not history, just absence of it
+    active = np.flatnonzero(totals)
+    start = active[0] if len(active) else len(totals)
+    matrix, totals = matrix[:, start:], totals[start:]
+    by_category = [
+        {'category': category, **exponential_smoothing(series, horizon)}
+        for category, series in zip(categories, matrix)
+    ]
+    by_category.sort(key=lambda f: (-f['forecast'], f['category']))
+    return {
+        'total': exponential_smoothing(totals, horizon),
+        'categories': by_category,
+        'history': [round(float(t), 2) for t in totals]
+    }
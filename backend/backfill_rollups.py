@@ -0,0 +1,29 @@
+"""
+Monthly Rollup Backfill Script for SmartLedger
+Rebuilds the monthly_rollups table from existing transactions.
+Requires SUPABASE_KEY to be the project's service role key.
+"""
+
+from supabase import create_client
+from dotenv import load_dotenv
+import argparse
+import os
+from pathlib import Path
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+parser = argparse.ArgumentParser(description="Rebuild monthly_rollups from the transactions table")
+parser.add_argument('--user-id', help="Only rebuild rollups for this user (default: all users)")
+args = parser.parse_args()
+
+# Supabase connection
+supabase = create_client(os.environ['SUPABASE_URL'], os.environ['SUPABASE_KEY'])
+
+scope = f"user {args.user_id}" if args.user_id else "all users"
+print(f"🔄 Rebuilding monthly rollups for {scope}...")
+
+result = supabase.rpc('backfill_monthly_rollups', {'p_user_id': args.user_id}).execute()
+
+print(f"✅ Wrote {result.data} rollup rows")
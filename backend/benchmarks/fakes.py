@@ -0,0 +1,575 @@
+"""
+In-process stand-ins for Supabase (PostgREST tables, RPCs, Auth) and Gemini.
+They implement just the client surface server_supabase.py uses, with
+configurable latency, so the API can be load-tested without any network.
+"""
+
+import bisect
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+import jwt
+
+# Tables kept sorted by these columns, like the (user_id, date DESC, id DESC) index
+SORTED_TABLES = {'transactions': ('date', 'id')}
+
+# Writes to these bump the writer's user_data_versions row, like the SQL triggers
+VERSIONED_TABLES = {'transactions', 'budgets'}
+
+# The server's "rows after this cursor" filter: (date.lt.D,and(date.eq.D,id.lt.I))
+KEYSET_FILTER = re.compile(r'^\(date\.lt\.([^,]+),and\(date\.eq\.([^,]+),id\.lt\.([^)]+)\)\)$')
+
+COMPARATORS = {
+    'eq': lambda a, b: a is not None and str(a) == str(b),
+    'neq': lambda a, b: a is None or str(a) != str(b),
+    'lt': lambda a, b: a is not None and a < b,
+    'lte': lambda a, b: a is not None and a <= b,
+    'gt': lambda a, b: a is not None and a > b,
+    'gte': lambda a, b: a is not None and a >= b,
+}
+
+
+def _coerce(column_value: Any, value: Any) -> Any:
+    """Compare numbers as numbers and everything else as text, as PostgREST would."""
+    if isinstance(column_value, (int, float)) and not isinstance(value, (int, float)):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return value
+    return value if isinstance(column_value, (int, float)) else str(value)
+
+
+def _predicate(column: str, op: str, value: Any) -> Callable[[dict], bool]:
+    compare = COMPARATORS[op]
+    return lambda row: compare(row.get(column), _coerce(row.get(column), value))
+
+
+def _split_top_level(expr: str) -> List[str]:
+    parts, depth, current = [], 0, ''
+    for ch in expr:
+        if ch == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        depth += (ch == '(') - (ch == ')')
+        current += ch
+    parts.append(current)
+    return parts
+
+
+def _parse_logic(expr: str, mode: str) -> Callable[[dict], bool]:
+    """Parse a PostgREST or=(...)/and(...) filter body into a predicate."""
+    predicates = []
+    for part in _split_top_level(expr):
+        nested = re.match(r'^(and|or)\((.*)\)$', part)
+        if nested:
+            predicates.append(_parse_logic(nested.group(2), nested.group(1)))
+        else:
+            column, op, value = part.split('.', 2)
+            predicates.append(_predicate(column, op, value))
+    combine = all if mode == 'and' else any
+    return lambda row: combine(p(row) for p in predicates)
+
+
+class FakeParams:
+    """The slice of httpx.QueryParams the server touches: params.add('order'|'or'|'limit'|'offset', ...)."""
+
+    def __init__(self, query):
+        self.query = query
+
+    def add(self, key: str, value: str) -> "FakeParams":
+        if key == 'limit':
+            self.query.row_limit = int(value)
+        elif key == 'offset':
+            self.query.row_offset = int(value)
+        elif key == 'order':
+            for part in value.split(','):
+                column, *modifiers = part.split('.')
+                self.query.orders.append((column, 'desc' in modifiers))
+        elif key in ('or', 'and'):
+            keyset = KEYSET_FILTER.match(value)
+            if keyset and keyset.group(1) == keyset.group(2):
+                self.query.before_key = (keyset.group(1), keyset.group(3))
+            self.query.filters.append(_parse_logic(value[1:-1], key))
+        else:
+            raise NotImplementedError(f"Unsupported query parameter: {key}")
+        return self
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.path = f"/{table}"
+        self.http_method = 'GET'
+        self.operation = 'select'
+        self.columns = '*'
+        self.payload = None
+        self.on_conflict = None
+        self.filters: List[Callable[[dict], bool]] = []
+        self.user_id: Optional[str] = None
+        self.date_bounds: List[tuple] = []
+        self.orders: List[tuple] = []
+        self.row_limit: Optional[int] = None
+        self.row_offset = 0
+        self.before_key: Optional[tuple] = None
+        self.params = FakeParams(self)
+
+    # ---- builders ----
+
+    def select(self, columns: str = '*', count: Optional[str] = None):
+        self.operation, self.columns = 'select', columns
+        return self
+
+    def insert(self, data, **kwargs):
+        self.operation, self.payload, self.http_method = 'insert', data, 'POST'
+        return self
+
+    def upsert(self, data, on_conflict: str = '', **kwargs):
+        self.operation, self.payload, self.on_conflict, self.http_method = 'upsert', data, on_conflict, 'POST'
+        return self
+
+    def update(self, data, **kwargs):
+        self.operation, self.payload, self.http_method = 'update', data, 'PATCH'
+        return self
+
+    def delete(self, **kwargs):
+        self.operation, self.http_method = 'delete', 'DELETE'
+        return self
+
+    def eq(self, column: str, value: Any):
+        if column == 'user_id':
+            self.user_id = str(value)
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column, value): return self._filter(column, 'neq', value)
+    def lt(self, column, value): return self._filter(column, 'lt', value)
+    def lte(self, column, value): return self._filter(column, 'lte', value)
+    def gt(self, column, value): return self._filter(column, 'gt', value)
+    def gte(self, column, value): return self._filter(column, 'gte', value)
+
+    def in_(self, column: str, values):
+        allowed = {str(v) for v in values}
+        self.filters.append(lambda row: str(row.get(column)) in allowed)
+        return self
+
+    def ilike(self, column: str, pattern: str):
+        regex = re.compile('^' + re.escape(pattern).replace('%', '.*') + '$', re.IGNORECASE)
+        self.filters.append(lambda row: bool(regex.match(str(row.get(column) or ''))))
+        return self
+
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.row_limit = size
+        return self
+
+    def _filter(self, column: str, op: str, value: Any):
+        if column == 'date' and op in ('lt', 'lte', 'gt', 'gte'):
+            self.date_bounds.append((op, str(value)))
+        self.filters.append(_predicate(column, op, value))
+        return self
+
+    def execute(self):
+        self.db.queries += 1
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        with self.db.lock:
+            data = getattr(self.db, f"_{self.operation}")(self)
+            if self.operation != 'select' and self.table in VERSIONED_TABLES:
+                self.db._bump_data_versions(data)
+        return SimpleNamespace(data=data, count=None)
+
+
+class FakeRPC:
+    """A stored procedure call; its result set can be paged with limit/offset query parameters."""
+
+    def __init__(self, db: "FakeSupabase", name: str, arguments: dict):
+        self.db = db
+        self.name = name
+        self.arguments = arguments
+        self.path = f"/rpc/{name}"
+        self.http_method = 'POST'
+        self.row_limit: Optional[int] = None
+        self.row_offset = 0
+        self.params = FakeParams(self)
+
+    def execute(self):
+        self.db.queries += 1
+        if self.db.latency:
+            time.sleep(self.db.latency)
+        with self.db.lock:
+            data = self.db.rpcs[self.name](**self.arguments)
+            return SimpleNamespace(data=self.db._page(self, data) if isinstance(data, list) else data, count=None)
+
+
+class FakeSupabase:
+    """
+    Tables are stored per user_id, so per-user queries never touch other users' rows,
+    and transactions stay sorted by (date, id) so newest-first pages stop early.
+    Writes to transactions maintain monthly_rollups and user_categories like the SQL triggers.
+    """
+
+    def __init__(self, latency: float = 0.0, jwt_secret: str = 'benchmark-secret', max_rows: Optional[int] = None):
+        self.latency = latency
+        # Rows PostgREST returns at most per request; larger results are cut silently
+        self.max_rows = max_rows
+        self.queries = 0
+        self.lock = threading.RLock()
+        self.tables: Dict[str, Dict[Optional[str], list]] = {}
+        # Primary-key lookups into the trigger-maintained tables
+        self.rollup_index: Dict[tuple, dict] = {}
+        self.category_index: Dict[tuple, dict] = {}
+        self.auth = FakeAuth(self, jwt_secret)
+        self.rpcs = {
+            'search_transactions': self._search_transactions,
+            'transaction_series': self._transaction_series,
+            'rollup_totals': self._rollup_totals
+        }
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> "FakeRPC":
+        return FakeRPC(self, name, params or {})
+
+    # ---- seeding ----
+
+    def load(self, table: str, rows: List[dict]):
+        """Bulk-load rows without running triggers; call rebuild_derived() afterwards."""
+        with self.lock:
+            for row in rows:
+                self._bucket(table, row.get('user_id')).append(row)
+            if table in SORTED_TABLES:
+                key = self._sort_key(table)
+                for bucket in self.tables[table].values():
+                    bucket.sort(key=key)
+
+    def rebuild_derived(self):
+        """Recompute monthly_rollups and user_categories from transactions."""
+        with self.lock:
+            self.tables['monthly_rollups'], self.rollup_index = {}, {}
+            self.tables['user_categories'], self.category_index = {}, {}
+            for bucket in self.tables.get('transactions', {}).values():
+                self._apply_transaction_rows(bucket, 1)
+
+    # ---- storage ----
+
+    def _bucket(self, table: str, user_id: Optional[str]) -> list:
+        return self.tables.setdefault(table, {}).setdefault(str(user_id) if user_id is not None else None, [])
+
+    @staticmethod
+    def _sort_key(table: str):
+        columns = SORTED_TABLES[table]
+        return lambda row: tuple(str(row.get(c)) for c in columns)
+
+    def _candidates(self, query: FakeQuery) -> list:
+        buckets = self.tables.get(query.table, {})
+        if query.user_id is not None:
+            rows = buckets.get(query.user_id, [])
+        else:
+            rows = [row for bucket in buckets.values() for row in bucket]
+        if query.table in SORTED_TABLES and query.user_id is not None and query.date_bounds:
+            rows = self._date_slice(rows, query.date_bounds)
+        return rows
+
+    @staticmethod
+    def _date_slice(rows: list, bounds: List[tuple]) -> list:
+        # Range scan on the date-sorted bucket instead of filtering every row
+        dates_key = lambda row: str(row['date'])
+        lo, hi = 0, len(rows)
+        for op, value in bounds:
+            if op == 'gte':
+                lo = max(lo, bisect.bisect_left(rows, value, key=dates_key))
+            elif op == 'gt':
+                lo = max(lo, bisect.bisect_right(rows, value, key=dates_key))
+            elif op == 'lte':
+                hi = min(hi, bisect.bisect_right(rows, value, key=dates_key))
+            elif op == 'lt':
+                hi = min(hi, bisect.bisect_left(rows, value, key=dates_key))
+        return rows[lo:hi]
+
+    def _matching(self, query: FakeQuery, rows: list):
+        return (row for row in rows if all(f(row) for f in query.filters))
+
+    def _select(self, query: FakeQuery) -> list:
+        rows = self._candidates(query)
+        sorted_columns = SORTED_TABLES.get(query.table)
+
+        if query.orders and sorted_columns and all(desc for _, desc in query.orders) \
+                and [c for c, _ in query.orders] == list(sorted_columns[:len(query.orders)]):
+            # Newest-first on the stored order: seek to the cursor, walk backwards and stop at the limit
+            if query.before_key is not None and sorted_columns == ('date', 'id'):
+                rows = rows[:bisect.bisect_left(rows, query.before_key, key=self._sort_key(query.table))]
+            matches = self._matching(query, reversed(rows))
+            result, limit = [], self._row_limit(query)
+            for row in matches:
+                result.append(row)
+                if limit is not None and len(result) >= query.row_offset + limit:
+                    break
+            result = result[query.row_offset:]
+        else:
+            result = list(self._matching(query, rows))
+            for column, desc in reversed(query.orders):
+                result.sort(key=lambda row: (row.get(column) is None, str(row.get(column))), reverse=desc)
+            result = self._page(query, result)
+
+        if query.columns.strip() == '*':
+            return [dict(row) for row in result]
+        columns = [c.strip() for c in query.columns.split(',')]
+        return [{c: row.get(c) for c in columns} for row in result]
+
+    def _row_limit(self, query) -> Optional[int]:
+        """The query's limit, capped by max_rows like PostgREST's db-max-rows."""
+        limits = [n for n in (query.row_limit, self.max_rows) if n is not None]
+        return min(limits) if limits else None
+
+    def _page(self, query, rows: list) -> list:
+        limit = self._row_limit(query)
+        return rows[query.row_offset:] if limit is None else rows[query.row_offset:query.row_offset + limit]
+
+    def _insert(self, query: FakeQuery, upsert: bool = False) -> list:
+        items = query.payload if isinstance(query.payload, list) else [query.payload]
+        conflict_columns = [c for c in (query.on_conflict or '').split(',') if c]
+        inserted, written = [], []
+
+        for item in items:
+            row = dict(item)
+            row.setdefault('id', str(uuid.uuid4()))
+            row.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+            bucket = self._bucket(query.table, row.get('user_id'))
+
+            if upsert and conflict_columns:
+                existing = next((r for r in bucket if all(str(r.get(c)) == str(row.get(c)) for c in conflict_columns)), None)
+                if existing is not None:
+                    existing.update(item)
+                    written.append(dict(existing))
+                    continue
+
+            if query.table in SORTED_TABLES:
+                bisect.insort(bucket, row, key=self._sort_key(query.table))
+            else:
+                bucket.append(row)
+            inserted.append(row)
+            written.append(dict(row))
+
+        if query.table == 'transactions':
+            self._apply_transaction_rows(inserted, 1)
+        return written
+
+    def _upsert(self, query: FakeQuery) -> list:
+        return self._insert(query, upsert=True)
+
+    def _update(self, query: FakeQuery) -> list:
+        updated = []
+        for row in list(self._matching(query, self._candidates(query))):
+            if query.table == 'transactions':
+                self._apply_transaction_rows([row], -1)
+                bucket = self._bucket(query.table, row.get('user_id'))
+                bucket.remove(row)
+                row.update(query.payload)
+                bisect.insort(bucket, row, key=self._sort_key(query.table))
+                self._apply_transaction_rows([row], 1)
+            else:
+                row.update(query.payload)
+            updated.append(dict(row))
+        return updated
+
+    def _delete(self, query: FakeQuery) -> list:
+        removed = list(self._matching(query, self._candidates(query)))
+        for row in removed:
+            self._bucket(query.table, row.get('user_id')).remove(row)
+        if query.table == 'transactions':
+            self._apply_transaction_rows(removed, -1)
+        return [dict(row) for row in removed]
+
+    # ---- trigger equivalents ----
+
+    def _bump_data_versions(self, rows: list):
+        for user_id in {str(row['user_id']) for row in rows}:
+            bucket = self._bucket('user_data_versions', user_id)
+            if bucket:
+                bucket[0]['version'] += 1
+            else:
+                bucket.append({'user_id': user_id, 'version': 1})
+
+    def _apply_transaction_rows(self, rows: list, sign: int):
+        for row in rows:
+            user_id = str(row['user_id'])
+            year, month = int(str(row['date'])[:4]), int(str(row['date'])[5:7])
+
+            key = (user_id, year, month, row['type'], row['category'])
+            rollup = self.rollup_index.get(key)
+            if rollup is None:
+                rollup = {'user_id': user_id, 'year': year, 'month': month, 'type': row['type'],
+                          'category': row['category'], 'amount_sum': 0.0, 'transaction_count': 0}
+                self.rollup_index[key] = rollup
+                self._bucket('monthly_rollups', user_id).append(rollup)
+            rollup['amount_sum'] = round(rollup['amount_sum'] + sign * float(row['amount']), 2)
+            rollup['transaction_count'] += sign
+            if rollup['transaction_count'] <= 0:
+                del self.rollup_index[key]
+                self._bucket('monthly_rollups', user_id).remove(rollup)
+
+            key = (user_id, row['category'])
+            entry = self.category_index.get(key)
+            if entry is None:
+                entry = {'user_id': user_id, 'category': row['category'], 'transaction_count': 0, 'last_used': str(row['date'])}
+                self.category_index[key] = entry
+                self._bucket('user_categories', user_id).append(entry)
+            entry['transaction_count'] += sign
+            if sign > 0:
+                entry['last_used'] = max(entry['last_used'], str(row['date']))
+            if entry['transaction_count'] <= 0:
+                del self.category_index[key]
+                self._bucket('user_categories', user_id).remove(entry)
+
+    # ---- RPCs ----
+
+    def _search_transactions(self, p_user_id, p_query, p_category=None, p_type=None,
+                             p_date_from=None, p_date_to=None, p_limit=None, p_offset=0):
+        needle = (p_query or '').lower()
+        matches = []
+        for row in reversed(self.tables.get('transactions', {}).get(str(p_user_id), [])):
+            text = f"{row.get('description') or ''} {row['category']}".lower()
+            if needle not in text:
+                continue
+            if (p_category and row['category'] != p_category) or (p_type and row['type'] != p_type) \
+                    or (p_date_from and row['date'] < p_date_from) or (p_date_to and row['date'] > p_date_to):
+                continue
+            matches.append(row)
+        matches.sort(key=lambda row: not (row.get('description') or '').lower().startswith(needle))
+        end = None if p_limit is None else (p_offset or 0) + p_limit
+        return [dict(row) for row in matches[p_offset or 0:end]]
+
+    def _rollup_totals(self, p_user_id):
+        totals: Dict[str, float] = {}
+        for rollup in self.tables.get('monthly_rollups', {}).get(str(p_user_id), []):
+            totals[rollup['type']] = totals.get(rollup['type'], 0.0) + float(rollup['amount_sum'])
+        return [{'type': t, 'amount_sum': round(amount, 2)} for t, amount in sorted(totals.items())]
+
+    def _transaction_series(self, p_user_id, p_granularity, p_date_from=None, p_date_to=None):
+        rows = self.tables.get('transactions', {}).get(str(p_user_id), [])
+        dates_key = lambda row: str(row['date'])
+        lo = bisect.bisect_left(rows, p_date_from, key=dates_key) if p_date_from else 0
+        hi = bisect.bisect_right(rows, p_date_to, key=dates_key) if p_date_to else len(rows)
+        groups: Dict[tuple, list] = {}
+        for row in rows[lo:hi]:
+            day = date.fromisoformat(str(row['date']))
+            if p_granularity == 'week':
+                day -= timedelta(days=day.weekday())
+            elif p_granularity == 'month':
+                day = day.replace(day=1)
+            group = groups.setdefault((day.isoformat(), row['type'], row['category']), [0.0, 0])
+            group[0] += float(row['amount'])
+            group[1] += 1
+        return [
+            {'bucket': bucket, 'type': type_, 'category': category, 'amount_sum': round(total, 2), 'transaction_count': count}
+            for (bucket, type_, category), (total, count) in sorted(groups.items())
+        ]
+
+
+class FakeAuth:
+    """Supabase Auth stand-in that issues HS256 tokens the server can verify locally."""
+
+    def __init__(self, db: FakeSupabase, jwt_secret: str):
+        self.db = db
+        self.jwt_secret = jwt_secret
+        self.accounts: Dict[str, dict] = {}
+
+    def issue_token(self, user_id: str, email: str, full_name: str = '') -> str:
+        claims = {
+            'sub': user_id,
+            'email': email,
+            'aud': 'authenticated',
+            'role': 'authenticated',
+            'user_metadata': {'full_name': full_name},
+            'exp': int(time.time()) + 24 * 3600
+        }
+        return jwt.encode(claims, self.jwt_secret, algorithm='HS256')
+
+    def _response(self, account: dict):
+        user = SimpleNamespace(id=account['id'], email=account['email'], user_metadata={'full_name': account['full_name']})
+        session = SimpleNamespace(access_token=self.issue_token(account['id'], account['email'], account['full_name']))
+        return SimpleNamespace(user=user, session=session)
+
+    def _latency(self):
+        if self.db.latency:
+            time.sleep(self.db.latency)
+
+    def sign_up(self, credentials: dict):
+        self._latency()
+        email = credentials['email']
+        if email in self.accounts:
+            raise Exception("User already registered")
+        account = {
+            'id': str(uuid.uuid4()),
+            'email': email,
+            'password': credentials['password'],
+            'full_name': credentials.get('options', {}).get('data', {}).get('full_name', '')
+        }
+        self.accounts[email] = account
+        return self._response(account)
+
+    def sign_in_with_password(self, credentials: dict):
+        self._latency()
+        account = self.accounts.get(credentials['email'])
+        if account is None or account['password'] != credentials['password']:
+            raise Exception("Invalid login credentials")
+        return self._response(account)
+
+    def get_user(self, token: str):
+        self._latency()
+        claims = jwt.decode(token, self.jwt_secret, algorithms=['HS256'], audience='authenticated')
+        user = SimpleNamespace(id=claims['sub'], email=claims['email'], user_metadata=claims.get('user_metadata') or {})
+        return SimpleNamespace(user=user)
+
+
+class FakeGeminiModel:
+    """
+    Gemini stand-in with a fixed latency per generation.
+    Categorization prompts get well-formed answers; everything else gets filler text.
+    """
+
+    CATEGORIES = ['Food', 'Transport', 'Shopping', 'Entertainment', 'Bills', 'Healthcare', 'Education', 'Other']
+    model_name = 'models/gemini-pro'
+
+    def __init__(self, latency: float = 0.0, words: int = 80, chunk_words: int = 8):
+        self.latency = latency
+        self.words = words
+        self.chunk_words = chunk_words
+        self.calls = 0
+
+    def _reply(self, prompt: str) -> str:
+        ids = re.findall(r'\{"id": (\d+),', prompt)
+        if ids:
+            return json.dumps([{'id': int(i), 'category': self.CATEGORIES[int(i) % len(self.CATEGORIES)]} for i in ids])
+        if prompt.startswith("Categorize this transaction"):
+            return self.CATEGORIES[len(prompt) % len(self.CATEGORIES)]
+        return ' '.join(f"insight{i}" for i in range(self.words))
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        self.calls += 1
+        text = self._reply(prompt)
+        if not stream:
+            if self.latency:
+                time.sleep(self.latency)
+            return SimpleNamespace(text=text)
+
+        words = text.split(' ')
+        chunks = [' '.join(words[i:i + self.chunk_words]) for i in range(0, len(words), self.chunk_words)]
+
+        def generate():
+            for chunk in chunks:
+                if self.latency:
+                    time.sleep(self.latency / len(chunks))
+                yield SimpleNamespace(text=chunk)
+        return generate()
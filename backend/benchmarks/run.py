@@ -0,0 +1,458 @@
+"""
+Load-Test Benchmark for the SmartLedger API
+Runs server_supabase.py in-process against the fakes in benchmarks/fakes.py,
+drives each /api route at a fixed concurrency and reports throughput and
+p50/p95/p99 latency per endpoint. Results can be saved and compared between runs.
+
+    cd backend
+    python benchmarks/run.py --users 5 --transactions 10000 --concurrency 16 --requests 200 --output before.json
+    python benchmarks/run.py ... --output after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+JWT_SECRET = 'benchmark-secret'
+
+# The server reads its configuration at import time; these win over backend/.env.
+# The fakes are installed before any request, so the real clients are never built.
+os.environ.update({
+    'SUPABASE_JWT_SECRET': JWT_SECRET,
+    'AUTH_VERIFICATION_MODE': 'local',
+    'WARMUP_ON_STARTUP': 'false',
+})
+
+import httpx  # noqa: E402
+
+from benchmarks.fakes import FakeSupabase, FakeGeminiModel  # noqa: E402
+
+CATEGORIES = ['Food', 'Transport', 'Shopping', 'Entertainment', 'Bills', 'Healthcare', 'Education', 'Other']
+DESCRIPTIONS = ['Coffee shop', 'Grocery store', 'Uber ride', 'Online order', 'Electric bill',
+                'Pharmacy', 'Cinema tickets', 'Bookstore', 'Restaurant dinner', 'Gas station']
+
+
+@dataclass
+class BenchUser:
+    id: str
+    email: str
+    token: str
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {'Authorization': f'Bearer {self.token}'}
+
+
+@dataclass
+class BenchContext:
+    users: List[BenchUser]
+    rng: random.Random
+    login_email: str
+    login_password: str
+    # Ids created during the run, consumed by the update/delete/poll scenarios
+    transaction_ids: Dict[str, List[str]] = field(default_factory=dict)
+    budget_ids: Dict[str, List[str]] = field(default_factory=dict)
+    job_ids: Dict[str, List[str]] = field(default_factory=dict)
+    # Each user's first-page cursor, for the second-page scenario
+    cursors: Dict[str, Optional[str]] = field(default_factory=dict)
+    counter: int = 0
+
+    def user(self) -> BenchUser:
+        return self.rng.choice(self.users)
+
+    def next(self) -> int:
+        self.counter += 1
+        return self.counter
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    build: Callable[[BenchContext], tuple]  # -> (user, path, request kwargs)
+    on_response: Optional[Callable[[BenchContext, BenchUser, httpx.Response], None]] = None
+    # Scenarios that need ids produced by an earlier one take them from the pool
+    needs: Optional[str] = None
+
+
+def transaction_body(ctx: BenchContext) -> dict:
+    return {
+        'amount': round(ctx.rng.uniform(1, 200), 2),
+        'type': 'expense',
+        'category': ctx.rng.choice(CATEGORIES),
+        'description': ctx.rng.choice(DESCRIPTIONS),
+        'date': (date.today() - timedelta(days=ctx.rng.randint(0, 60))).isoformat()
+    }
+
+
+def csv_body(ctx: BenchContext, rows: int) -> str:
+    lines = ['Date,Type,Category,Amount,Description']
+    for _ in range(rows):
+        t = transaction_body(ctx)
+        lines.append(f"{t['date']},{t['type']},{t['category']},{t['amount']},{t['description']}")
+    return '\n'.join(lines)
+
+
+def take(pool: Dict[str, List[str]], ctx: BenchContext, consume: bool = True):
+    """Pick a user that still has a pooled id and return it, removing it when consumed."""
+    candidates = [u for u in ctx.users if pool.get(u.id)]
+    if not candidates:
+        return None, None
+    user = ctx.rng.choice(candidates)
+    ids = pool[user.id]
+    return user, ids.pop() if consume else ctx.rng.choice(ids)
+
+
+def remember(pool_name: str, key: str):
+    def on_response(ctx: BenchContext, user: BenchUser, response: httpx.Response):
+        if response.status_code < 300:
+            getattr(ctx, pool_name).setdefault(user.id, []).append(response.json()[key])
+    return on_response
+
+
+def with_user(path: str, **kwargs):
+    def build(ctx: BenchContext):
+        return ctx.user(), path, kwargs
+    return build
+
+
+def build_scenarios(args) -> List[Scenario]:
+    def register(ctx):
+        n = ctx.next()
+        return None, '/api/auth/register', {'json': {'email': f'bench-{n}-{uuid.uuid4().hex[:8]}@example.com', 'password': 'benchmark', 'full_name': f'Bench {n}'}}
+
+    def login(ctx):
+        return None, '/api/auth/login', {'json': {'email': ctx.login_email, 'password': ctx.login_password}}
+
+    def create_transaction(ctx):
+        return ctx.user(), '/api/transactions', {'json': transaction_body(ctx)}
+
+    def update_transaction(ctx):
+        user, transaction_id = take(ctx.transaction_ids, ctx, consume=False)
+        return user, f'/api/transactions/{transaction_id}', {'json': transaction_body(ctx)}
+
+    def delete_transaction(ctx):
+        user, transaction_id = take(ctx.transaction_ids, ctx)
+        return user, f'/api/transactions/{transaction_id}', {}
+
+    def second_page(ctx):
+        user = ctx.user()
+        return user, '/api/transactions', {'params': {'limit': 100, 'cursor': ctx.cursors.get(user.id)}}
+
+    def create_budget(ctx):
+        n = ctx.next()
+        body = {'category': ctx.rng.choice(CATEGORIES), 'limit': 500, 'month': 1 + n % 12, 'year': 3000 + n // 12}
+        return ctx.user(), '/api/budgets', {'json': body}
+
+    def update_budget(ctx):
+        user, budget_id = take(ctx.budget_ids, ctx, consume=False)
+        n = ctx.next()
+        body = {'category': 'Food', 'limit': 600, 'month': 1 + n % 12, 'year': 5000 + n // 12}
+        return user, f'/api/budgets/{budget_id}', {'json': body}
+
+    def delete_budget(ctx):
+        user, budget_id = take(ctx.budget_ids, ctx)
+        return user, f'/api/budgets/{budget_id}', {}
+
+    def import_csv(ctx):
+        return ctx.user(), '/api/transactions/import/csv', {
+            'content': csv_body(ctx, args.import_rows), 'headers': {'Content-Type': 'text/csv'}
+        }
+
+    def categorize_batch(ctx):
+        items = [{'description': f"{ctx.rng.choice(DESCRIPTIONS)} #{ctx.rng.randint(1, 10_000)}", 'amount': 20} for _ in range(20)]
+        return ctx.user(), '/api/ai/categorize-batch', {'json': {'items': items}}
+
+    def categorize_one(ctx):
+        return ctx.user(), '/api/ai/categorize-transaction', {
+            'params': {'description': f"{ctx.rng.choice(DESCRIPTIONS)} #{ctx.rng.randint(1, 10_000)}", 'amount': 20}
+        }
+
+    def poll_job(ctx):
+        user, job_id = take(ctx.job_ids, ctx, consume=False)
+        return user, f'/api/ai/jobs/{job_id}', {}
+
+    scenarios = [
+        Scenario('POST /api/auth/register', 'POST', register),
+        Scenario('POST /api/auth/login', 'POST', login),
+        Scenario('GET /api/auth/me', 'GET', with_user('/api/auth/me')),
+        Scenario('POST /api/transactions', 'POST', create_transaction, remember('transaction_ids', 'id')),
+        Scenario('GET /api/transactions', 'GET', with_user('/api/transactions')),
+        Scenario('GET /api/transactions?limit=100', 'GET', with_user('/api/transactions', params={'limit': 100})),
+        Scenario('GET /api/transactions?limit=100&cursor', 'GET', second_page),
+        Scenario('GET /api/transactions?type&date_from', 'GET', with_user('/api/transactions', params={
+            'type': 'expense', 'date_from': (date.today() - timedelta(days=30)).isoformat(), 'limit': 100})),
+        Scenario('GET /api/transactions?search', 'GET', with_user('/api/transactions', params={'search': 'coffee', 'limit': 50})),
+        Scenario('PUT /api/transactions/{id}', 'PUT', update_transaction, needs='transaction_ids'),
+        Scenario('DELETE /api/transactions/{id}', 'DELETE', delete_transaction, needs='transaction_ids'),
+        Scenario('POST /api/budgets', 'POST', create_budget, remember('budget_ids', 'id')),
+        Scenario('GET /api/budgets', 'GET', with_user('/api/budgets')),
+        Scenario('GET /api/budgets/progress', 'GET', with_user('/api/budgets/progress')),
+        Scenario('PUT /api/budgets/{id}', 'PUT', update_budget, needs='budget_ids'),
+        Scenario('DELETE /api/budgets/{id}', 'DELETE', delete_budget, needs='budget_ids'),
+        Scenario('GET /api/dashboard', 'GET', with_user('/api/dashboard')),
+        Scenario('GET /api/categories', 'GET', with_user('/api/categories', params={'order': 'most_used'})),
+        Scenario('GET /api/analytics?granularity=month', 'GET', with_user('/api/analytics', params={'granularity': 'month'})),
+        Scenario('GET /api/analytics?granularity=day', 'GET', with_user('/api/analytics', params={'granularity': 'day'})),
+        Scenario('GET /api/transactions/export/csv', 'GET', with_user('/api/transactions/export/csv')),
+        Scenario('GET /api/transactions/export/csv?gzip', 'GET', with_user('/api/transactions/export/csv', params={'gzip': 'true'})),
+        Scenario('POST /api/transactions/import/csv', 'POST', import_csv),
+        Scenario('POST /api/ai/insights', 'POST', with_user('/api/ai/insights', json={'insight_type': 'spending'})),
+        Scenario('POST /api/ai/insights (force_refresh)', 'POST', with_user('/api/ai/insights', json={'insight_type': 'spending', 'force_refresh': True})),
+        Scenario('GET /api/ai/insights', 'GET', with_user('/api/ai/insights')),
+        Scenario('POST /api/ai/categorize-transaction', 'POST', categorize_one),
+        Scenario('POST /api/ai/categorize-batch', 'POST', categorize_batch),
+        Scenario('POST /api/ai/predict-spending?mode=local', 'POST', with_user('/api/ai/predict-spending', params={'mode': 'local'})),
+        Scenario('POST /api/ai/predict-spending?mode=hybrid', 'POST', with_user('/api/ai/predict-spending', params={'mode': 'hybrid'})),
+        Scenario('POST /api/ai/predict-spending?mode=llm', 'POST', with_user('/api/ai/predict-spending', params={'mode': 'llm'})),
+        Scenario('POST /api/ai/financial-goals', 'POST', with_user('/api/ai/financial-goals')),
+        Scenario('POST /api/ai/smart-budget-recommendation', 'POST', with_user('/api/ai/smart-budget-recommendation', params={'category': 'Food'})),
+        Scenario('POST /api/ai/expense-anomaly-detection', 'POST', with_user('/api/ai/expense-anomaly-detection')),
+        Scenario('POST /api/ai/jobs', 'POST', with_user('/api/ai/jobs', json={'kind': 'predict-spending', 'params': {'mode': 'local'}}), remember('job_ids', 'id')),
+        Scenario('GET /api/ai/jobs/{id}', 'GET', poll_job, needs='job_ids'),
+        Scenario('GET /health', 'GET', with_user('/health')),
+    ]
+
+    if args.transactions > args.full_list_max:
+        # The unpaginated list returns every row; at this size it measures serialization, not the API
+        scenarios = [s for s in scenarios if s.name != 'GET /api/transactions']
+    if args.only:
+        scenarios = [s for s in scenarios if any(fnmatch.fnmatch(s.name, pattern) for pattern in args.only)]
+    if args.skip:
+        scenarios = [s for s in scenarios if not any(fnmatch.fnmatch(s.name, pattern) for pattern in args.skip)]
+    return scenarios
+
+
+# ============ SEEDING ============
+
+def seed(db: FakeSupabase, args) -> BenchContext:
+    rng = random.Random(args.seed)
+    today = date.today()
+    users, user_rows, transactions, budgets = [], [], [], []
+
+    for n in range(args.users):
+        user_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        email = f'seed-{n}@example.com'
+        users.append(BenchUser(user_id, email, db.auth.issue_token(user_id, email, f'Seed User {n}')))
+        user_rows.append({'id': user_id, 'email': email, 'full_name': f'Seed User {n}', 'created_at': datetime.now(timezone.utc).isoformat()})
+
+        for category in CATEGORIES:
+            budgets.append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128))), 'user_id': user_id, 'category': category,
+                'limit_amount': 500.0, 'month': today.month, 'year': today.year,
+                'created_at': datetime.now(timezone.utc).isoformat()
+            })
+
+        for _ in range(args.transactions):
+            is_income = rng.random() < 0.15
+            transactions.append({
+                'id': str(uuid.UUID(int=rng.getrandbits(128))),
+                'user_id': user_id,
+                'amount': round(rng.uniform(500, 3000) if is_income else rng.lognormvariate(3, 1), 2),
+                'type': 'income' if is_income else 'expense',
+                'category': 'Salary' if is_income else rng.choice(CATEGORIES),
+                'description': rng.choice(DESCRIPTIONS),
+                'date': (today - timedelta(days=rng.randint(0, args.history_days))).isoformat(),
+                'created_at': datetime.now(timezone.utc).isoformat()
+            })
+
+    db.load('users', user_rows)
+    db.load('transactions', transactions)
+    db.load('budgets', budgets)
+    db.rebuild_derived()
+
+    login_password = 'benchmark'
+    db.auth.sign_up({'email': 'login@example.com', 'password': login_password, 'options': {'data': {'full_name': 'Login'}}})
+    return BenchContext(users=users, rng=rng, login_email='login@example.com', login_password=login_password)
+
+
+# ============ MEASUREMENT ============
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, ctx: BenchContext,
+                       requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            user, path, kwargs = scenario.build(ctx)
+            if scenario.needs and user is None:
+                statuses['skipped'] += 1
+                continue
+            kwargs = dict(kwargs)
+            headers = {**(user.headers if user else {}), **kwargs.pop('headers', {})}
+
+            started = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, path, headers=headers, **kwargs)
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[str(response.status_code)] += 1
+            if scenario.on_response:
+                scenario.on_response(ctx, user, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    completed = len(latencies)
+    errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 400)
+    return {
+        'endpoint': scenario.name,
+        'requests': completed,
+        'errors': errors,
+        'statuses': dict(statuses),
+        'throughput_rps': round(completed / wall, 2) if wall else 0.0,
+        'mean_ms': round(sum(latencies) / completed * 1000, 2) if completed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+
+
+async def prepare_cursors(client: httpx.AsyncClient, ctx: BenchContext):
+    """Fetch each user's first page so the cursor scenario measures a real second page."""
+    for user in ctx.users:
+        response = await client.get('/api/transactions', params={'limit': 100}, headers=user.headers)
+        if response.status_code == 200:
+            ctx.cursors[user.id] = response.json()['next_cursor']
+
+
+def print_table(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Dict[str, Any]]] = None):
+    header = f"{'endpoint':<48} {'n':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'Δp50':>8} {'Δp95':>8}"
+    print(header)
+    print('-' * len(header))
+
+    for r in results:
+        line = (f"{r['endpoint']:<48} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>9.1f} "
+                f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}")
+        before = (baseline or {}).get(r['endpoint'])
+        if before:
+            for key in ('p50_ms', 'p95_ms'):
+                if before[key] and r['requests']:
+                    line += f" {(r[key] - before[key]) / before[key] * 100:>+7.1f}%"
+                else:
+                    line += f" {'n/a':>8}"
+        print(line)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+async def main(args):
+    import logging
+    import server_supabase as server
+
+    # Per-request INFO logs would dominate the measurement
+    logging.disable(logging.WARNING)
+
+    db = FakeSupabase(latency=args.db_latency_ms / 1000, jwt_secret=JWT_SECRET)
+    model = FakeGeminiModel(latency=args.ai_latency_ms / 1000)
+    server.set_supabase_client(db)
+    server.set_gemini_model(model)
+
+    print(f"🌱 Seeding {args.users} users x {args.transactions} transactions...")
+    started = time.perf_counter()
+    ctx = seed(db, args)
+    print(f"   done in {time.perf_counter() - started:.1f}s")
+
+    scenarios = build_scenarios(args)
+    if args.list:
+        for scenario in scenarios:
+            print(scenario.name)
+        return
+
+    baseline = None
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        baseline = {r['endpoint']: r for r in previous['results']}
+
+    results = []
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark', timeout=None) as client:
+        await prepare_cursors(client, ctx)
+        for scenario in scenarios:
+            print(f"🚀 {scenario.name}", flush=True)
+            results.append(await run_scenario(client, scenario, ctx, args.requests, args.concurrency))
+
+    print()
+    print_table(results, baseline)
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'git_revision': git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'args': vars(args),
+                'db_queries': db.queries,
+                'ai_calls': model.calls
+            },
+            'results': results
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"\n✅ Results written to {args.output}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SmartLedger API against in-process fakes")
+    parser.add_argument('--users', type=int, default=5, help="Synthetic users to seed")
+    parser.add_argument('--transactions', type=int, default=1000, help="Transactions per user (1k to 1M)")
+    parser.add_argument('--history-days', type=int, default=730, help="Spread seeded transactions over this many days")
+    parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent requests in flight per endpoint")
+    parser.add_argument('--db-latency-ms', type=float, default=2.0, help="Simulated round trip per Supabase call")
+    parser.add_argument('--ai-latency-ms', type=float, default=500.0, help="Simulated duration of each Gemini generation")
+    parser.add_argument('--import-rows', type=int, default=100, help="Rows per CSV import request")
+    parser.add_argument('--full-list-max', type=int, default=20_000,
+                        help="Skip the unpaginated transaction list above this many transactions per user")
+    parser.add_argument('--only', nargs='*', help="Only run endpoints matching these glob patterns")
+    parser.add_argument('--skip', nargs='*', help="Skip endpoints matching these glob patterns")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed for data and request mix")
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--compare', help="Show p50/p95 changes against a previous JSON result")
+    parser.add_argument('--list', action='store_true', help="List the endpoints that would run and exit")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
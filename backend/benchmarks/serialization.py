@@ -0,0 +1,123 @@
+"""
+Serialization Benchmark for the SmartLedger API
+Times how much CPU GET /api/transactions and GET /api/budgets spend turning
+database rows into a response body under each LIST_RESPONSE_MODE, reported per
+10k rows. The "model" figure includes FastAPI's response_model validation and
+JSON encoding, which the other modes skip. No server or database is involved.
+
+    cd backend
+    python benchmarks/serialization.py --rows 10000 --runs 7
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.update({'WARMUP_ON_STARTUP': 'false', 'METRICS_ENABLED': 'false'})
+
+from fastapi import Response  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+import server_supabase as server  # noqa: E402
+
+MODES = ['model', 'validated', 'trusted']
+CATEGORIES = ['Food', 'Rent', 'Transport', 'Entertainment', 'Utilities', 'Shopping']
+
+
+def transaction_rows(count: int) -> list:
+    user_id = str(uuid.uuid4())
+    today = date.today()
+    return [{
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'amount': round(5 + (i * 7.31) % 400, 2),
+        'type': 'income' if i % 10 == 0 else 'expense',
+        'category': CATEGORIES[i % len(CATEGORIES)],
+        'description': f"Card payment {i}",
+        'date': (today - timedelta(days=i % 730)).isoformat(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    } for i in range(count)]
+
+
+def budget_rows(count: int) -> list:
+    user_id = str(uuid.uuid4())
+    return [{
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'category': CATEGORIES[i % len(CATEGORIES)],
+        'limit_amount': float(100 + i % 900),
+        'month': i % 12 + 1,
+        'year': 2000 + i // 72,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    } for i in range(count)]
+
+
+def response_field(path: str):
+    route = next(r for r in server.app.routes if getattr(r, 'path', None) == path and 'GET' in r.methods)
+    return route.response_field
+
+
+def render(model, rows, field, mode: str) -> bytes:
+    """Rows to body bytes the way the route does it in `mode`."""
+    content = server.list_response(model, rows, Response(), mode=mode)
+    if isinstance(content, Response):
+        return content.body
+    # What FastAPI does with a non-Response return value
+    loop = asyncio.new_event_loop()
+    try:
+        encoded = loop.run_until_complete(serialize_response(field=field, response_content=content))
+    finally:
+        loop.close()
+    return JSONResponse(encoded).body
+
+
+def cpu_ms(func, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.process_time()
+        func()
+        timings.append(time.process_time() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure list endpoint serialization cost per mode")
+    parser.add_argument('--rows', type=int, default=10_000, help="Rows per list")
+    parser.add_argument('--runs', type=int, default=7, help="Repetitions; the fastest is reported")
+    args = parser.parse_args()
+
+    cases = [
+        ('GET /api/transactions', server.Transaction, transaction_rows(args.rows), response_field('/api/transactions')),
+        ('GET /api/budgets', server.Budget, budget_rows(args.rows), response_field('/api/budgets')),
+    ]
+
+    print(f"🧮 CPU ms per 10k rows ({args.rows} rows, best of {args.runs})")
+    for title, model, rows, field in cases:
+        bodies = {mode: render(model, rows, field, mode) for mode in MODES}
+        if bodies['validated'] != bodies['model']:
+            print(f"❌ {title}: validated body differs from model body")
+            sys.exit(1)
+        if len(json.loads(bodies['trusted'])) != len(rows):
+            print(f"❌ {title}: trusted body lost rows")
+            sys.exit(1)
+
+        baseline = None
+        print(f"\n{title}")
+        for mode in MODES:
+            ms = cpu_ms(lambda: render(model, rows, field, mode), args.runs) * 10_000 / args.rows
+            baseline = baseline or ms
+            print(f"  {mode:<10} {ms:8.1f} ms  {baseline / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
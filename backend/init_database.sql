@@ -40,13 +40,11 @@ CREATE TABLE IF NOT EXISTS public.budgets (
 );
 
 -- Step 4: Create indexes for performance
+-- Per-user (type | category, date) and budget month indexes come from migration 0002
 CREATE INDEX IF NOT EXISTS idx_users_email ON public.users(email);
-CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON public.transactions(user_id);
 CREATE INDEX IF NOT EXISTS idx_transactions_date ON public.transactions(date);
-CREATE INDEX IF NOT EXISTS idx_transactions_type ON public.transactions(type);
-CREATE INDEX IF NOT EXISTS idx_transactions_category ON public.transactions(category);
-CREATE INDEX IF NOT EXISTS idx_budgets_user_id ON public.budgets(user_id);
-CREATE INDEX IF NOT EXISTS idx_budgets_month_year ON public.budgets(month, year);
+-- Keyset pagination of a user's transactions, newest first
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date_id ON public.transactions(user_id, date DESC, id DESC);
 
 -- Step 5: Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -172,6 +170,235 @@ CREATE TRIGGER on_auth_user_created
     FOR EACH ROW
     EXECUTE FUNCTION public.handle_new_user();
 
+-- Step 15: Create monthly per-category rollups used by the dashboard
+CREATE TABLE IF NOT EXISTS public.monthly_rollups (
+    user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL CHECK (month >= 1 AND month <= 12),
+    type VARCHAR(10) NOT NULL CHECK (type IN ('income', 'expense')),
+    category VARCHAR(100) NOT NULL,
+    amount_sum DECIMAL(15,2) NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, year, month, type, category)
+);
+
+ALTER TABLE public.monthly_rollups ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own monthly rollups" ON public.monthly_rollups;
+CREATE POLICY "Users can view own monthly rollups"
+    ON public.monthly_rollups FOR SELECT
+    USING (auth.uid() = user_id);
+
+GRANT SELECT ON public.monthly_rollups TO anon, authenticated;
+
+-- Step 16: Keep rollups current on every transaction write
+CREATE OR REPLACE FUNCTION public.apply_monthly_rollup(
+    p_user_id UUID,
+    p_date DATE,
+    p_type VARCHAR,
+    p_category VARCHAR,
+    p_amount DECIMAL,
+    p_count INTEGER
+)
+RETURNS VOID AS $$
+DECLARE
+    v_year INTEGER := EXTRACT(YEAR FROM p_date)::INTEGER;
+    v_month INTEGER := EXTRACT(MONTH FROM p_date)::INTEGER;
+BEGIN
+    INSERT INTO public.monthly_rollups (user_id, year, month, type, category, amount_sum, transaction_count)
+    VALUES (p_user_id, v_year, v_month, p_type, p_category, p_amount, p_count)
+    ON CONFLICT (user_id, year, month, type, category) DO UPDATE
+        SET amount_sum = public.monthly_rollups.amount_sum + EXCLUDED.amount_sum,
+            transaction_count = public.monthly_rollups.transaction_count + EXCLUDED.transaction_count;
+
+    DELETE FROM public.monthly_rollups
+    WHERE user_id = p_user_id AND year = v_year AND month = v_month
+      AND type = p_type AND category = p_category AND transaction_count <= 0;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.maintain_monthly_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.apply_monthly_rollup(OLD.user_id, OLD.date, OLD.type, OLD.category, -OLD.amount, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.apply_monthly_rollup(NEW.user_id, NEW.date, NEW.type, NEW.category, NEW.amount, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION public.apply_monthly_rollup(UUID, DATE, VARCHAR, VARCHAR, DECIMAL, INTEGER) FROM PUBLIC, anon, authenticated;
+
+DROP TRIGGER IF EXISTS maintain_transactions_monthly_rollups ON public.transactions;
+CREATE TRIGGER maintain_transactions_monthly_rollups
+    AFTER INSERT OR DELETE OR UPDATE OF user_id, amount, type, category, date ON public.transactions
+    FOR EACH ROW
+    EXECUTE FUNCTION public.maintain_monthly_rollups();
+
+-- Step 17: Rebuild rollups from existing transactions (all users, or one user)
+-- Run once after adding the rollups table: SELECT public.backfill_monthly_rollups();
+CREATE OR REPLACE FUNCTION public.backfill_monthly_rollups(p_user_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    affected INTEGER;
+BEGIN
+    -- Block concurrent transaction writes so the rebuild and the trigger cannot double count
+    LOCK TABLE public.transactions IN SHARE MODE;
+
+    DELETE FROM public.monthly_rollups
+    WHERE p_user_id IS NULL OR user_id = p_user_id;
+
+    INSERT INTO public.monthly_rollups (user_id, year, month, type, category, amount_sum, transaction_count)
+    SELECT user_id,
+           EXTRACT(YEAR FROM date)::INTEGER,
+           EXTRACT(MONTH FROM date)::INTEGER,
+           type,
+           category,
+           SUM(amount),
+           COUNT(*)
+    FROM public.transactions
+    WHERE p_user_id IS NULL OR user_id = p_user_id
+    GROUP BY 1, 2, 3, 4, 5;
+
+    GET DIAGNOSTICS affected = ROW_COUNT;
+    RETURN affected;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION public.backfill_monthly_rollups(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.backfill_monthly_rollups(UUID) TO service_role;
+
+-- Step 18: Create the AI categorization cache
+CREATE TABLE IF NOT EXISTS public.ai_category_cache (
+    scope VARCHAR(64) NOT NULL,
+    description_key TEXT NOT NULL,
+    amount_bucket INTEGER NOT NULL,
+    category VARCHAR(100) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (scope, description_key, amount_bucket)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ai_category_cache_expires_at ON public.ai_category_cache(expires_at);
+
+ALTER TABLE public.ai_category_cache ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Cache entries are readable in their scope" ON public.ai_category_cache;
+DROP POLICY IF EXISTS "Cache entries are insertable in their scope" ON public.ai_category_cache;
+DROP POLICY IF EXISTS "Cache entries are updatable in their scope" ON public.ai_category_cache;
+
+-- Shared entries are open to every client; per-user entries (scope = user id) to their owner
+CREATE POLICY "Cache entries are readable in their scope"
+    ON public.ai_category_cache FOR SELECT
+    USING (scope = 'global' OR scope = auth.uid()::text);
+
+CREATE POLICY "Cache entries are insertable in their scope"
+    ON public.ai_category_cache FOR INSERT
+    WITH CHECK (scope = 'global' OR scope = auth.uid()::text);
+
+-- Upserts refresh an existing entry's category and expiry
+CREATE POLICY "Cache entries are updatable in their scope"
+    ON public.ai_category_cache FOR UPDATE
+    USING (scope = 'global' OR scope = auth.uid()::text)
+    WITH CHECK (scope = 'global' OR scope = auth.uid()::text);
+
+GRANT SELECT, INSERT, UPDATE ON public.ai_category_cache TO anon, authenticated;
+GRANT ALL ON public.ai_category_cache TO service_role;
+
+-- Step 19: Create the AI insights table
+CREATE TABLE IF NOT EXISTS public.ai_insights (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    insight_type VARCHAR(20) NOT NULL,
+    insight_text TEXT NOT NULL,
+    input_fingerprint VARCHAR(64),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Databases created before fingerprints existed already have the table
+ALTER TABLE public.ai_insights ADD COLUMN IF NOT EXISTS input_fingerprint VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_ai_insights_user_created ON public.ai_insights(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_ai_insights_user_fingerprint ON public.ai_insights(user_id, input_fingerprint, expires_at);
+
+ALTER TABLE public.ai_insights ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own insights" ON public.ai_insights;
+DROP POLICY IF EXISTS "Users can insert own insights" ON public.ai_insights;
+
+CREATE POLICY "Users can view own insights"
+    ON public.ai_insights FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert own insights"
+    ON public.ai_insights FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
+
+GRANT ALL ON public.ai_insights TO anon, authenticated;
+
+-- Step 20: Full-text and trigram search over transaction descriptions and categories
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Searchable document: description words rank above the category name
+CREATE OR REPLACE FUNCTION public.transaction_search_document(p_description TEXT, p_category TEXT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('simple', COALESCE(p_description, '')), 'A')
+        || setweight(to_tsvector('simple', COALESCE(p_category, '')), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Prefix query from free text: "star coff" matches "Starbucks coffee"
+CREATE OR REPLACE FUNCTION public.transaction_search_query(p_query TEXT)
+RETURNS tsquery AS $$
+    SELECT to_tsquery('simple', string_agg(quote_literal(lexeme) || ':*', ' & '))
+    FROM unnest(tsvector_to_array(to_tsvector('simple', COALESCE(p_query, '')))) AS lexeme;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE INDEX IF NOT EXISTS idx_transactions_search_document
+    ON public.transactions USING GIN (public.transaction_search_document(description, category));
+-- Substring and typo-tolerant matches on the description
+CREATE INDEX IF NOT EXISTS idx_transactions_description_trgm
+    ON public.transactions USING GIN (description gin_trgm_ops);
+
+-- Ranked search within one user's transactions; filters mirror GET /api/transactions
+CREATE OR REPLACE FUNCTION public.search_transactions(
+    p_user_id UUID,
+    p_query TEXT,
+    p_category VARCHAR DEFAULT NULL,
+    p_type VARCHAR DEFAULT NULL,
+    p_date_from DATE DEFAULT NULL,
+    p_date_to DATE DEFAULT NULL,
+    p_limit INTEGER DEFAULT NULL,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS SETOF public.transactions AS $$
+    WITH search AS (
+        SELECT public.transaction_search_query(p_query) AS tsq,
+               '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+    )
+    SELECT t.*
+    FROM public.transactions t, search s
+    WHERE t.user_id = p_user_id
+      AND (public.transaction_search_document(t.description, t.category) @@ s.tsq
+           OR t.description ILIKE s.pattern
+           OR p_query <% t.description)
+      AND (p_category IS NULL OR t.category = p_category)
+      AND (p_type IS NULL OR t.type = p_type)
+      AND (p_date_from IS NULL OR t.date >= p_date_from)
+      AND (p_date_to IS NULL OR t.date <= p_date_to)
+    ORDER BY COALESCE(ts_rank(public.transaction_search_document(t.description, t.category), s.tsq), 0)
+                 + word_similarity(p_query, COALESCE(t.description, '')) DESC,
+             t.date DESC,
+             t.id DESC
+    LIMIT p_limit
+    OFFSET p_offset;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.search_transactions(UUID, TEXT, VARCHAR, VARCHAR, DATE, DATE, INTEGER, INTEGER) TO anon, authenticated, service_role;
+
 -- ============================================
 -- INITIALIZATION COMPLETE! ✅
 -- ============================================
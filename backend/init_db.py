@@ -1,79 +1,255 @@
 """
-Database Initialization Script for SmartLedger
-Run this script to automatically set up all database tables in Supabase
+Database Migration Runner for SmartLedger
+Applies the numbered SQL migrations over a direct Postgres connection and
+records them in schema_migrations. Requires DATABASE_URL (Supabase: Project
+Settings > Database > Connection string, or any local Postgres).
+
+    python init_db.py status            # applied and pending migrations
+    python init_db.py up [--local]      # apply pending migrations
+    python init_db.py explain           # query plans of the server's hot queries
+    python init_db.py seed --local      # synthetic data for plan/perf checks
 """
 
-from supabase import create_client
 from dotenv import load_dotenv
+import argparse
+import hashlib
 import os
+import re
+import sys
+from datetime import date, timedelta
 from pathlib import Path
 
+import psycopg
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Supabase connection
-supabase_url = os.environ['SUPABASE_URL']
-supabase_key = os.environ['SUPABASE_KEY']
-
-print("🚀 SmartLedger Database Initialization")
-print("=" * 50)
-print(f"Supabase URL: {supabase_url}")
-print("=" * 50)
-
-# Read the SQL initialization script
-sql_file = ROOT_DIR / 'init_database.sql'
-if not sql_file.exists():
-    print("❌ Error: init_database.sql not found!")
-    print(f"   Expected location: {sql_file}")
-    exit(1)
-
-with open(sql_file, 'r', encoding='utf-8') as f:
-    sql_script = f.read()
-
-print("\n📋 SQL Script loaded successfully!")
-print(f"   Script size: {len(sql_script)} characters")
-
-print("\n" + "=" * 50)
-print("⚠️  IMPORTANT INSTRUCTIONS:")
-print("=" * 50)
-print("""
-The Supabase Python client doesn't support executing raw SQL scripts.
-You need to run the SQL script manually in the Supabase Dashboard.
-
-STEPS TO COMPLETE SETUP:
-1. Go to: https://app.supabase.com/
-2. Select your project
-3. Click on "SQL Editor" in the left sidebar
-4. Click "New query"
-5. Copy the contents of: backend/init_database.sql
-6. Paste into the SQL editor
-7. Click "Run" or press Ctrl+Enter
-
-QUICK LINK:
-https://app.supabase.com/project/{}/sql
-
-The SQL script will create:
-✅ users table (linked to Supabase Auth)
-✅ transactions table (for expense tracking)
-✅ budgets table (for budget management)
-✅ All necessary indexes and security policies
-✅ Auto-trigger to create user profiles on signup
-
-After running the SQL script, your database will be ready!
-Then restart the backend server and try signing in again.
-""".format(supabase_url.split('//')[1].split('.')[0]))
-
-print("\n" + "=" * 50)
-print("📄 SQL Script Preview (First 1000 characters):")
-print("=" * 50)
-print(sql_script[:1000])
-print("\n... (continued in init_database.sql)")
-print("\n" + "=" * 50)
-
-input("\n Press Enter to open the Supabase SQL Editor URL in your notes...")
-
-print(f"\n📋 Copy this URL to your browser:")
-print(f"   https://app.supabase.com/project/{supabase_url.split('//')[1].split('.')[0]}/sql")
-print(f"\n📄 Then copy and run: backend/init_database.sql")
-print("\n✅ After that, restart the backend server!")
+MIGRATIONS_DIR = ROOT_DIR / 'migrations'
+# Migration 0001 is the original setup script, so SQL Editor installs and the runner share one baseline
+BASELINE = (1, 'initial', ROOT_DIR / 'init_database.sql')
+LOCAL_STUBS = MIGRATIONS_DIR / 'supabase_local.sql'
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# The queries server_supabase.py issues on every page load or AI call, as PostgREST runs them
+HOT_QUERIES = [
+    ("transactions page (keyset)",
+     "SELECT * FROM public.transactions WHERE user_id = %(user_id)s ORDER BY date DESC, id DESC LIMIT 101"),
+    ("transactions by type, last 90 days",
+     "SELECT amount, type, category, date FROM public.transactions "
+     "WHERE user_id = %(user_id)s AND type = 'expense' AND date >= CURRENT_DATE - 90"),
+    ("transactions by category, last 90 days",
+     "SELECT amount, type, category, date FROM public.transactions "
+     "WHERE user_id = %(user_id)s AND category = %(category)s AND type = 'expense' AND date >= CURRENT_DATE - 90"),
+    ("income amounts",
+     "SELECT amount FROM public.transactions WHERE user_id = %(user_id)s AND type = 'income'"),
+    ("data version (conditional GET)",
+     "SELECT version FROM public.user_data_versions WHERE user_id = %(user_id)s"),
+    ("dashboard all-time totals",
+     "SELECT * FROM public.rollup_totals(%(user_id)s)"),
+    ("dashboard current month rollups",
+     "SELECT type, category, amount_sum FROM public.monthly_rollups WHERE user_id = %(user_id)s "
+     "AND year = EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER AND month = EXTRACT(MONTH FROM CURRENT_DATE)::INTEGER"),
+    ("dashboard recent transactions",
+     "SELECT * FROM public.transactions WHERE user_id = %(user_id)s ORDER BY date DESC LIMIT 5"),
+    ("budgets for a month",
+     "SELECT * FROM public.budgets WHERE user_id = %(user_id)s "
+     "AND month = EXTRACT(MONTH FROM CURRENT_DATE)::INTEGER AND year = EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER"),
+    ("analytics monthly series page",
+     "SELECT year, month, type, category, amount_sum FROM public.monthly_rollups WHERE user_id = %(user_id)s "
+     "AND year >= EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER - 5 ORDER BY year, month, type, category LIMIT 1000 OFFSET 0"),
+    ("analytics weekly series, last 26 weeks",
+     "SELECT * FROM public.transaction_series(%(user_id)s, 'week', %(since)s, %(today)s)"),
+    ("transaction search",
+     "SELECT * FROM public.search_transactions(%(user_id)s, %(category)s, p_limit => 101)"),
+    ("reusable AI insight",
+     "SELECT insight_text, insight_type, created_at FROM public.ai_insights "
+     "WHERE user_id = %(user_id)s AND input_fingerprint = repeat('0', 64) AND expires_at > NOW() "
+     "ORDER BY created_at DESC LIMIT 1"),
+]
+
+
+def connect() -> psycopg.Connection:
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        print("❌ Error: DATABASE_URL is not set")
+        print("   Use the Postgres connection string from Supabase or a local database")
+        sys.exit(1)
+    return psycopg.connect(database_url, autocommit=True)
+
+
+def discover_migrations() -> list:
+    """Return (version, name, path) for the baseline and every numbered file, in order."""
+    migrations = [BASELINE]
+    for path in sorted(MIGRATIONS_DIR.glob('*.sql')):
+        match = MIGRATION_FILE.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path))
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        print("❌ Error: duplicate migration version numbers in migrations/")
+        sys.exit(1)
+    return sorted(migrations)
+
+
+def checksum(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def ensure_migrations_table(conn: psycopg.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS public.schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+    # Bookkeeping only: keep it out of the PostgREST API
+    conn.execute("ALTER TABLE public.schema_migrations ENABLE ROW LEVEL SECURITY")
+
+
+def applied_migrations(conn: psycopg.Connection) -> dict:
+    rows = conn.execute("SELECT version, checksum FROM public.schema_migrations").fetchall()
+    return {version: digest for version, digest in rows}
+
+
+def cmd_status(conn: psycopg.Connection, args):
+    ensure_migrations_table(conn)
+    applied = applied_migrations(conn)
+
+    print("📋 Migrations")
+    print("=" * 50)
+    for version, name, path in discover_migrations():
+        if version not in applied:
+            state = "⏳ pending"
+        elif applied[version] != checksum(path):
+            state = "⚠️  applied, file changed since"
+        else:
+            state = "✅ applied"
+        print(f"  {version:04d} {name:<35} {state}")
+
+
+def cmd_up(conn: psycopg.Connection, args):
+    if args.local:
+        print("🧪 Creating Supabase stand-ins for a local database...")
+        conn.execute(LOCAL_STUBS.read_text(encoding='utf-8'))
+
+    ensure_migrations_table(conn)
+    applied = applied_migrations(conn)
+    pending = [
+        (version, name, path) for version, name, path in discover_migrations()
+        if version not in applied and (args.to is None or version <= args.to)
+    ]
+
+    if not pending:
+        print("✅ Database is up to date")
+        return
+
+    for version, name, path in pending:
+        print(f"🚀 Applying {version:04d}_{name}...")
+        # Each migration and its bookkeeping row commit together, or not at all
+        with conn.transaction():
+            conn.execute(path.read_text(encoding='utf-8'))
+            conn.execute(
+                "INSERT INTO public.schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (version, name, checksum(path))
+            )
+
+    print(f"✅ Applied {len(pending)} migration(s)")
+
+
+def cmd_explain(conn: psycopg.Connection, args):
+    user_id = args.user_id
+    if not user_id:
+        row = conn.execute(
+            "SELECT user_id FROM public.transactions GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()
+        if not row:
+            print("❌ Error: no transactions to plan against; pass --user-id or run `seed --local` first")
+            sys.exit(1)
+        user_id = row[0]
+
+    row = conn.execute(
+        "SELECT category FROM public.transactions WHERE user_id = %s GROUP BY category ORDER BY COUNT(*) DESC LIMIT 1",
+        (user_id,)
+    ).fetchone()
+    # The API passes literal dates, which lets the planner drop transaction_series' NULL checks
+    today = date.today()
+    params = {'user_id': user_id, 'category': row[0] if row else 'Food', 'since': today - timedelta(days=182), 'today': today}
+
+    options = "ANALYZE, BUFFERS" if args.analyze else "COSTS"
+    print(f"🔍 Query plans for user {user_id}")
+
+    # Client-side binding: EXPLAIN does not accept server-side parameters
+    cursor = psycopg.ClientCursor(conn)
+    for title, sql in HOT_QUERIES:
+        print("\n" + "=" * 50)
+        print(f"📊 {title}")
+        print("=" * 50)
+        for (line,) in cursor.execute(f"EXPLAIN ({options}) {sql}", params).fetchall():
+            print(line)
+
+
+def cmd_seed(conn: psycopg.Connection, args):
+    if not args.local:
+        print("❌ Error: seed writes synthetic users; pass --local to confirm this is a local database")
+        sys.exit(1)
+
+    print(f"🌱 Seeding {args.users} users x {args.transactions} transactions...")
+    with conn.transaction():
+        # The auth.users trigger creates each public.users profile
+        conn.execute("""
+            INSERT INTO auth.users (id, email, raw_user_meta_data)
+            SELECT gen_random_uuid(), 'seed-' || n || '-' || substr(md5(random()::text), 1, 8) || '@smartledger.local',
+                   jsonb_build_object('full_name', 'Seed User ' || n)
+            FROM generate_series(1, %(users)s) AS n
+        """, {'users': args.users})
+        conn.execute("""
+            INSERT INTO public.transactions (user_id, amount, type, category, description, date)
+            SELECT u.id,
+                   round((random() * 200 + 1)::numeric, 2),
+                   CASE WHEN random() < 0.15 THEN 'income' ELSE 'expense' END,
+                   (ARRAY['Food', 'Transport', 'Shopping', 'Entertainment', 'Bills', 'Healthcare', 'Education', 'Other'])[1 + floor(random() * 8)::int],
+                   (ARRAY['Coffee shop', 'Grocery store', 'Uber ride', 'Online order', 'Electric bill', 'Pharmacy', 'Cinema', 'Salary'])[1 + floor(random() * 8)::int],
+                   CURRENT_DATE - floor(random() * 730)::int
+            FROM public.users u
+            CROSS JOIN generate_series(1, %(transactions)s)
+            WHERE u.email LIKE 'seed-%%@smartledger.local'
+              AND NOT EXISTS (SELECT 1 FROM public.transactions t WHERE t.user_id = u.id)
+        """, {'transactions': args.transactions})
+
+    conn.execute("ANALYZE public.transactions")
+    conn.execute("ANALYZE public.monthly_rollups")
+    print("✅ Seed data ready; try: python init_db.py explain --analyze")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SmartLedger database migrations")
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    subcommands.add_parser('status', help="List applied and pending migrations")
+
+    up = subcommands.add_parser('up', help="Apply pending migrations")
+    up.add_argument('--to', type=int, help="Stop after this migration version")
+    up.add_argument('--local', action='store_true', help="First create Supabase roles and auth stand-ins (plain Postgres only)")
+
+    explain = subcommands.add_parser('explain', help="Print query plans for the server's hot queries")
+    explain.add_argument('--user-id', help="Plan for this user (default: the user with the most transactions)")
+    explain.add_argument('--analyze', action='store_true', help="Execute the queries and report actual timings")
+
+    seed = subcommands.add_parser('seed', help="Insert synthetic users and transactions (local databases only)")
+    seed.add_argument('--local', action='store_true', help="Confirm the target is a local database")
+    seed.add_argument('--users', type=int, default=100)
+    seed.add_argument('--transactions', type=int, default=1000, help="Transactions per user")
+
+    args = parser.parse_args()
+    commands = {'status': cmd_status, 'up': cmd_up, 'explain': cmd_explain, 'seed': cmd_seed}
+
+    with connect() as conn:
+        commands[args.command](conn, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+-- ============================================
+-- 0002: Composite indexes for per-user access patterns
+-- ============================================
+-- Every server query filters on user_id first, then type, category or a date range.
+
+-- Expense/income windows: predict-spending, anomaly detection, budget recommendation income
+CREATE INDEX IF NOT EXISTS idx_transactions_user_type_date ON public.transactions(user_id, type, date DESC);
+
+-- One category over a date range: smart budget recommendation, category filter
+CREATE INDEX IF NOT EXISTS idx_transactions_user_category_date ON public.transactions(user_id, category, date DESC);
+
+-- Budgets for a month: GET /api/budgets?month=&year=
+CREATE INDEX IF NOT EXISTS idx_budgets_user_year_month ON public.budgets(user_id, year, month);
+
+-- Superseded indexes: user_id alone is a prefix of the composites above,
+-- and type/category/month across all users are never queried without user_id
+DROP INDEX IF EXISTS public.idx_transactions_user_id;
+DROP INDEX IF EXISTS public.idx_transactions_type;
+DROP INDEX IF EXISTS public.idx_transactions_category;
+DROP INDEX IF EXISTS public.idx_budgets_user_id;
+DROP INDEX IF EXISTS public.idx_budgets_month_year;
+
+ANALYZE public.transactions;
+ANALYZE public.budgets;
@@ -0,0 +1,139 @@
+-- ============================================
+-- 0003: Per-user category registry
+-- ============================================
+-- GET /api/categories reads this instead of every transaction's category.
+-- Statement-level triggers keep it current, so a batched CSV import costs
+-- one upsert per distinct category rather than one per row.
+
+CREATE TABLE IF NOT EXISTS public.user_categories (
+    user_id UUID NOT NULL REFERENCES public.users(id) ON DELETE CASCADE,
+    category VARCHAR(100) NOT NULL,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    last_used DATE NOT NULL,
+    PRIMARY KEY (user_id, category)
+);
+
+ALTER TABLE public.user_categories ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own categories" ON public.user_categories;
+CREATE POLICY "Users can view own categories"
+    ON public.user_categories FOR SELECT
+    USING (auth.uid() = user_id);
+
+GRANT SELECT ON public.user_categories TO anon, authenticated;
+
+CREATE OR REPLACE FUNCTION public.add_category_usage(p_user_ids UUID[], p_categories VARCHAR[], p_dates DATE[])
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO public.user_categories (user_id, category, transaction_count, last_used)
+    SELECT user_id, category, COUNT(*), MAX(date)
+    FROM unnest(p_user_ids, p_categories, p_dates) AS u(user_id, category, date)
+    GROUP BY user_id, category
+    ON CONFLICT (user_id, category) DO UPDATE
+        SET transaction_count = public.user_categories.transaction_count + EXCLUDED.transaction_count,
+            last_used = GREATEST(public.user_categories.last_used, EXCLUDED.last_used);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.remove_category_usage(p_user_ids UUID[], p_categories VARCHAR[], p_dates DATE[])
+RETURNS VOID AS $$
+BEGIN
+    WITH removed AS (
+        SELECT user_id, category, COUNT(*) AS n
+        FROM unnest(p_user_ids, p_categories, p_dates) AS u(user_id, category, date)
+        GROUP BY user_id, category
+    )
+    UPDATE public.user_categories uc
+    SET transaction_count = uc.transaction_count - removed.n
+    FROM removed
+    WHERE uc.user_id = removed.user_id AND uc.category = removed.category;
+
+    DELETE FROM public.user_categories uc
+    USING unnest(p_user_ids, p_categories) AS u(user_id, category)
+    WHERE uc.user_id = u.user_id AND uc.category = u.category AND uc.transaction_count <= 0;
+
+    -- The removed rows may have been the latest use; idx_transactions_user_category_date finds the new one
+    UPDATE public.user_categories uc
+    SET last_used = (
+        SELECT MAX(t.date) FROM public.transactions t
+        WHERE t.user_id = uc.user_id AND t.category = uc.category
+    )
+    FROM (SELECT DISTINCT user_id, category FROM unnest(p_user_ids, p_categories) AS u(user_id, category)) touched
+    WHERE uc.user_id = touched.user_id AND uc.category = touched.category;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.maintain_user_categories()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_user_ids UUID[];
+    v_categories VARCHAR[];
+    v_dates DATE[];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT array_agg(user_id), array_agg(category), array_agg(date)
+        INTO v_user_ids, v_categories, v_dates
+        FROM old_rows;
+        PERFORM public.remove_category_usage(v_user_ids, v_categories, v_dates);
+
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT array_agg(user_id), array_agg(category), array_agg(date)
+        INTO v_user_ids, v_categories, v_dates
+        FROM new_rows;
+        PERFORM public.add_category_usage(v_user_ids, v_categories, v_dates);
+
+    ELSE
+        -- Updates that leave user, category and date alone do not touch the registry
+        SELECT array_agg(o.user_id), array_agg(o.category), array_agg(o.date)
+        INTO v_user_ids, v_categories, v_dates
+        FROM old_rows o JOIN new_rows n ON n.id = o.id
+        WHERE (o.user_id, o.category, o.date) IS DISTINCT FROM (n.user_id, n.category, n.date);
+
+        IF v_user_ids IS NOT NULL THEN
+            PERFORM public.remove_category_usage(v_user_ids, v_categories, v_dates);
+
+            SELECT array_agg(n.user_id), array_agg(n.category), array_agg(n.date)
+            INTO v_user_ids, v_categories, v_dates
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.user_id, o.category, o.date) IS DISTINCT FROM (n.user_id, n.category, n.date);
+            PERFORM public.add_category_usage(v_user_ids, v_categories, v_dates);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE EXECUTE ON FUNCTION public.add_category_usage(UUID[], VARCHAR[], DATE[]) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.remove_category_usage(UUID[], VARCHAR[], DATE[]) FROM PUBLIC, anon, authenticated;
+
+-- Block transaction writes until the triggers exist and the registry is backfilled
+LOCK TABLE public.transactions IN SHARE MODE;
+
+DROP TRIGGER IF EXISTS maintain_user_categories_insert ON public.transactions;
+DROP TRIGGER IF EXISTS maintain_user_categories_update ON public.transactions;
+DROP TRIGGER IF EXISTS maintain_user_categories_delete ON public.transactions;
+
+CREATE TRIGGER maintain_user_categories_insert
+    AFTER INSERT ON public.transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.maintain_user_categories();
+
+CREATE TRIGGER maintain_user_categories_update
+    AFTER UPDATE ON public.transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.maintain_user_categories();
+
+CREATE TRIGGER maintain_user_categories_delete
+    AFTER DELETE ON public.transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.maintain_user_categories();
+
+-- Rebuild from existing transactions
+DELETE FROM public.user_categories;
+INSERT INTO public.user_categories (user_id, category, transaction_count, last_used)
+SELECT user_id, category, COUNT(*), MAX(date)
+FROM public.transactions
+GROUP BY user_id, category;
@@ -0,0 +1,36 @@
+-- ============================================
+-- 0004: Bucketed transaction series
+-- ============================================
+-- GET /api/analytics charts daily and weekly income/expense from this instead
+-- of downloading transactions; the result has one row per (bucket, type,
+-- category). Monthly series come straight from monthly_rollups.
+-- Runs with the caller's rights, so row level security still applies.
+
+CREATE OR REPLACE FUNCTION public.transaction_series(
+    p_user_id UUID,
+    p_granularity TEXT,
+    p_date_from DATE DEFAULT NULL,
+    p_date_to DATE DEFAULT NULL
+)
+RETURNS TABLE (
+    bucket DATE,
+    type VARCHAR,
+    category VARCHAR,
+    amount_sum DECIMAL(15,2),
+    transaction_count BIGINT
+) AS $$
+    -- Truncate a timestamp, not a timestamptz, so buckets do not depend on the session time zone
+    SELECT date_trunc(p_granularity, t.date::timestamp)::date,
+           t.type,
+           t.category,
+           SUM(t.amount),
+           COUNT(*)
+    FROM public.transactions t
+    WHERE t.user_id = p_user_id
+      AND (p_date_from IS NULL OR t.date >= p_date_from)
+      AND (p_date_to IS NULL OR t.date <= p_date_to)
+    GROUP BY 1, 2, 3
+    ORDER BY 1, 2, 3;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.transaction_series(UUID, TEXT, DATE, DATE) TO anon, authenticated, service_role;
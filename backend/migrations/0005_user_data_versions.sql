@@ -0,0 +1,89 @@
+-- ============================================
+-- 0005: Per-user data versions
+-- ============================================
+-- A counter per user that every write to their transactions or budgets bumps.
+-- Read endpoints derive their ETag from it, so a conditional GET costs one
+-- primary-key lookup instead of the endpoint's queries. Users without a row
+-- are at version 0.
+
+CREATE TABLE IF NOT EXISTS public.user_data_versions (
+    user_id UUID PRIMARY KEY REFERENCES public.users(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE public.user_data_versions ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own data version" ON public.user_data_versions;
+CREATE POLICY "Users can view own data version"
+    ON public.user_data_versions FOR SELECT
+    USING (auth.uid() = user_id);
+
+GRANT SELECT ON public.user_data_versions TO anon, authenticated;
+
+CREATE OR REPLACE FUNCTION public.bump_user_data_versions()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_user_ids UUID[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT user_id) INTO v_user_ids FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT user_id) INTO v_user_ids FROM old_rows;
+    ELSE
+        SELECT array_agg(DISTINCT user_id) INTO v_user_ids
+        FROM (SELECT user_id FROM old_rows UNION SELECT user_id FROM new_rows) touched;
+    END IF;
+
+    -- One bump per user per statement, so a batched CSV import counts once
+    INSERT INTO public.user_data_versions (user_id, version, updated_at)
+    SELECT user_id, 1, NOW() FROM unnest(v_user_ids) AS u(user_id)
+    ON CONFLICT (user_id) DO UPDATE
+        SET version = public.user_data_versions.version + 1,
+            updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS bump_data_versions_insert ON public.transactions;
+DROP TRIGGER IF EXISTS bump_data_versions_update ON public.transactions;
+DROP TRIGGER IF EXISTS bump_data_versions_delete ON public.transactions;
+DROP TRIGGER IF EXISTS bump_data_versions_insert ON public.budgets;
+DROP TRIGGER IF EXISTS bump_data_versions_update ON public.budgets;
+DROP TRIGGER IF EXISTS bump_data_versions_delete ON public.budgets;
+
+CREATE TRIGGER bump_data_versions_insert
+    AFTER INSERT ON public.transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_user_data_versions();
+
+CREATE TRIGGER bump_data_versions_update
+    AFTER UPDATE ON public.transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_user_data_versions();
+
+CREATE TRIGGER bump_data_versions_delete
+    AFTER DELETE ON public.transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_user_data_versions();
+
+CREATE TRIGGER bump_data_versions_insert
+    AFTER INSERT ON public.budgets
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_user_data_versions();
+
+CREATE TRIGGER bump_data_versions_update
+    AFTER UPDATE ON public.budgets
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_user_data_versions();
+
+CREATE TRIGGER bump_data_versions_delete
+    AFTER DELETE ON public.budgets
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION public.bump_user_data_versions();
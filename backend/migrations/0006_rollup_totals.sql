@@ -0,0 +1,21 @@
+-- ============================================
+-- 0006: All-time income and expense totals
+-- ============================================
+-- GET /api/dashboard reads the user's balance from this instead of summing every
+-- monthly_rollups row in Python. The result is one row per type however old the
+-- account is, so PostgREST's max-rows can never truncate it.
+-- Runs with the caller's rights, so row level security still applies.
+
+CREATE OR REPLACE FUNCTION public.rollup_totals(p_user_id UUID)
+RETURNS TABLE (
+    type VARCHAR,
+    amount_sum DECIMAL(15,2)
+) AS $$
+    SELECT r.type, SUM(r.amount_sum)
+    FROM public.monthly_rollups r
+    WHERE r.user_id = p_user_id
+    GROUP BY r.type
+    ORDER BY r.type;
+$$ LANGUAGE sql STABLE;
+
+GRANT EXECUTE ON FUNCTION public.rollup_totals(UUID) TO anon, authenticated, service_role;
@@ -0,0 +1,30 @@
+-- ============================================
+-- 0007: Client access to the AI categorization cache
+-- ============================================
+-- The cache was created with RLS enabled and no policies, so a server using
+-- the anon key could neither read nor write it. These are the policies and
+-- grants init_database.sql now creates, for databases set up before it did.
+
+ALTER TABLE public.ai_category_cache ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Cache entries are readable in their scope" ON public.ai_category_cache;
+DROP POLICY IF EXISTS "Cache entries are insertable in their scope" ON public.ai_category_cache;
+DROP POLICY IF EXISTS "Cache entries are updatable in their scope" ON public.ai_category_cache;
+
+-- Shared entries are open to every client; per-user entries (scope = user id) to their owner
+CREATE POLICY "Cache entries are readable in their scope"
+    ON public.ai_category_cache FOR SELECT
+    USING (scope = 'global' OR scope = auth.uid()::text);
+
+CREATE POLICY "Cache entries are insertable in their scope"
+    ON public.ai_category_cache FOR INSERT
+    WITH CHECK (scope = 'global' OR scope = auth.uid()::text);
+
+-- Upserts refresh an existing entry's category and expiry
+CREATE POLICY "Cache entries are updatable in their scope"
+    ON public.ai_category_cache FOR UPDATE
+    USING (scope = 'global' OR scope = auth.uid()::text)
+    WITH CHECK (scope = 'global' OR scope = auth.uid()::text);
+
+GRANT SELECT, INSERT, UPDATE ON public.ai_category_cache TO anon, authenticated;
+GRANT ALL ON public.ai_category_cache TO service_role;
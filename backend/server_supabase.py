@@ -1,36 +1,132 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from supabase import create_client, Client
+from starlette.datastructures import Headers, MutableHeaders
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Literal, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter, ValidationError
+from typing import List, Optional, Literal, Dict, Any, Union
 import uuid
-from datetime import datetime, timezone, timedelta
+import base64
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timezone, timedelta
 import io
 import csv
-import google.generativeai as genai
+import zlib
+import tempfile
+import time
+import hashlib
+import json
+import inspect
+import math
+import calendar
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+import jwt
+import orjson
+import numpy as np
+from prometheus_client import Counter, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+from analytics import TransactionFrame, TREND_MEDIAN_WINDOW, trend_direction, forecast_rollups
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Supabase connection
-supabase_url = os.environ['SUPABASE_URL']
-supabase_key = os.environ['SUPABASE_KEY']
-supabase: Client = create_client(supabase_url, supabase_key)
+# The Supabase and Gemini clients are built on first use (see UPSTREAM CLIENTS), so importing
+# this module needs no credentials and does not load the Gemini SDK
+GEMINI_MODEL_NAME = os.environ.get('GEMINI_MODEL_NAME', 'gemini-pro')
 
-# Gemini AI configuration
-genai.configure(api_key=os.environ['GEMINI_API_KEY'])
-gemini_model = genai.GenerativeModel('gemini-pro')
+# Build both clients and open a Supabase connection in the background at startup; /ready reports progress
+WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', 'true').lower() == 'true'
 
 # Security
 security = HTTPBearer()
 
+# Auth verification
+# "local" checks Supabase JWT signatures in-process (HS256 secret or the project's JWKS);
+# "remote" asks Supabase Auth to validate the token on every request.
+AUTH_VERIFICATION_MODE = os.environ.get('AUTH_VERIFICATION_MODE', 'local').lower()
+SUPABASE_JWT_SECRET = os.environ.get('SUPABASE_JWT_SECRET')
+SUPABASE_JWT_AUDIENCE = os.environ.get('SUPABASE_JWT_AUDIENCE', 'authenticated')
+# Defaults to the project's /auth/v1/.well-known/jwks.json
+SUPABASE_JWKS_URL = os.environ.get('SUPABASE_JWKS_URL')
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', '1024'))
+
+# Thread pools for the blocking Supabase and Gemini clients.
+# AI calls get their own pool so slow generations cannot starve database queries.
+DB_THREADPOOL_SIZE = int(os.environ.get('DB_THREADPOOL_SIZE', '16'))
+AI_THREADPOOL_SIZE = int(os.environ.get('AI_THREADPOOL_SIZE', '4'))
+
+# Rows read from the database per chunk when streaming CSV exports
+CSV_EXPORT_CHUNK_SIZE = int(os.environ.get('CSV_EXPORT_CHUNK_SIZE', '1000'))
+
+# CSV imports: rows per insert request, and upload bytes held in memory before spilling to disk
+CSV_IMPORT_BATCH_SIZE = int(os.environ.get('CSV_IMPORT_BATCH_SIZE', '500'))
+CSV_IMPORT_SPOOL_BYTES = int(os.environ.get('CSV_IMPORT_SPOOL_BYTES', str(1024 * 1024)))
+
+# Deadline for a request's concurrent database fan-out
+REQUEST_DEADLINE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_SECONDS', '10'))
+
+# AI categorization cache: "global" shares results across users, "user" keeps them per user
+AI_CATEGORY_CACHE_SCOPE = os.environ.get('AI_CATEGORY_CACHE_SCOPE', 'global').lower()
+AI_CATEGORY_CACHE_SIZE = int(os.environ.get('AI_CATEGORY_CACHE_SIZE', '10000'))
+AI_CATEGORY_CACHE_TTL_SECONDS = float(os.environ.get('AI_CATEGORY_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+
+# Batch categorization: items accepted per request, and per-prompt packing limits
+AI_CATEGORIZE_BATCH_MAX_ITEMS = int(os.environ.get('AI_CATEGORIZE_BATCH_MAX_ITEMS', '500'))
+AI_CATEGORIZE_PROMPT_MAX_ITEMS = int(os.environ.get('AI_CATEGORIZE_PROMPT_MAX_ITEMS', '100'))
+AI_CATEGORIZE_PROMPT_MAX_CHARS = int(os.environ.get('AI_CATEGORIZE_PROMPT_MAX_CHARS', '12000'))
+
+# Background AI jobs: concurrent workers, queued-job limit, per-job timeout and result retention
+AI_JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS', '4'))
+AI_JOB_QUEUE_SIZE = int(os.environ.get('AI_JOB_QUEUE_SIZE', '100'))
+AI_JOB_TIMEOUT_SECONDS = float(os.environ.get('AI_JOB_TIMEOUT_SECONDS', '120'))
+AI_JOB_TTL_SECONDS = float(os.environ.get('AI_JOB_TTL_SECONDS', '3600'))
+
+# Anomaly detection: robust z-score above which an expense is flagged
+ANOMALY_Z_THRESHOLD = float(os.environ.get('ANOMALY_Z_THRESHOLD', '3.5'))
+
+# Spending prediction: default mode (local | llm | hybrid; only the last two call Gemini) and months of history the local forecast uses
+PREDICT_SPENDING_MODE = os.environ.get('PREDICT_SPENDING_MODE', 'local').lower()
+FORECAST_HISTORY_MONTHS = int(os.environ.get('FORECAST_HISTORY_MONTHS', '12'))
+
+# User profile cache
+USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', '2048'))
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '300'))
+
+# Per-user category list cache; the TTL bounds staleness across server processes
+USER_CATEGORIES_CACHE_SIZE = int(os.environ.get('USER_CATEGORIES_CACHE_SIZE', '2048'))
+USER_CATEGORIES_CACHE_TTL_SECONDS = float(os.environ.get('USER_CATEGORIES_CACHE_TTL_SECONDS', '60'))
+
+# Analytics series: most buckets one request may span, and the per-user result cache
+ANALYTICS_MAX_BUCKETS = int(os.environ.get('ANALYTICS_MAX_BUCKETS', '1000'))
+ANALYTICS_CACHE_SIZE = int(os.environ.get('ANALYTICS_CACHE_SIZE', '2048'))
+ANALYTICS_CACHE_TTL_SECONDS = float(os.environ.get('ANALYTICS_CACHE_TTL_SECONDS', '300'))
+# PostgREST's max-rows setting (1000 on Supabase); longer results are silently cut to it,
+# so reads that can exceed it page at this size
+SUPABASE_MAX_ROWS = int(os.environ.get('SUPABASE_MAX_ROWS', '1000'))
+
+# List endpoint serialization: "model" (build a model per row, then FastAPI validates and encodes
+# the response again), "validated" (one pydantic-core validation and dump of the whole list) or
+# "trusted" (copy the model's fields out of the database rows and encode them with orjson)
+LIST_RESPONSE_MODE = os.environ.get('LIST_RESPONSE_MODE', 'model').lower()
+
+# Gzip for complete (non-streamed) responses at least this large, at this compression level
+RESPONSE_GZIP_MIN_BYTES = int(os.environ.get('RESPONSE_GZIP_MIN_BYTES', '1024'))
+RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', '5'))
+
+# Prometheus metrics: per-route and per-upstream latency histograms served on /metrics
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
 # Create the main app
 app = FastAPI(title="SmartLedger API", version="2.0.0")
 
@@ -95,6 +191,10 @@ class Transaction(BaseModel):
     date: str
     created_at: datetime
 
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None
+
 class BudgetCreate(BaseModel):
     category: str
     limit: float
@@ -111,47 +211,645 @@ class Budget(BaseModel):
     year: int
     created_at: datetime
 
+class BudgetProgress(Budget):
+    spent: float
+    remaining: float
+    percent_used: float
+    projected_spend: float
+    projected_overspend: float
+
+class CSVImportRowError(BaseModel):
+    line: int
+    error: str
+
+class CSVImportResult(BaseModel):
+    message: str
+    accepted: int
+    rejected: int
+    errors: List[CSVImportRowError]
+    errors_truncated: bool = False
+
+class CategorizeItem(BaseModel):
+    description: str
+    amount: float
+
+class CategorizeBatchRequest(BaseModel):
+    items: List[CategorizeItem] = Field(..., min_length=1, max_length=AI_CATEGORIZE_BATCH_MAX_ITEMS)
+
+class BudgetRecommendationParams(BaseModel):
+    category: str
+
+PredictMode = Literal["local", "llm", "hybrid"]
+
+class PredictSpendingParams(BaseModel):
+    mode: Optional[PredictMode] = None
+
+AIJobKind = Literal[
+    "insights", "categorize-transaction", "categorize-batch", "predict-spending",
+    "financial-goals", "smart-budget-recommendation", "expense-anomaly-detection"
+]
+
+class AIJobRequest(BaseModel):
+    kind: AIJobKind
+    params: Dict[str, Any] = {}
+
+class AIJob(BaseModel):
+    id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
 class AIInsightRequest(BaseModel):
     insight_type: Literal["spending", "budget", "savings", "general"]
+    force_refresh: bool = False
 
 class AIInsight(BaseModel):
     insight_text: str
     insight_type: str
     created_at: datetime
+    reused: bool = False
+
+# ============ RESPONSE COMPRESSION ============
+
+# Bodies above this are compressed on a worker thread instead of the event loop
+GZIP_OFFLOAD_BYTES = 256 * 1024
+
+class GZipCompleteResponsesMiddleware:
+    """
+    Gzip complete response bodies for clients that accept it. Streamed responses
+    (Server-Sent Events, CSV exports) pass through untouched: gzip would hold
+    their chunks back until its buffer filled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or 'gzip' not in Headers(scope=scope).get('accept-encoding', ''):
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if passthrough or message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            passthrough = True
+            body = message.get('body', b'')
+            headers = MutableHeaders(raw=start_message['headers'])
+            if message.get('more_body') or len(body) < RESPONSE_GZIP_MIN_BYTES or 'content-encoding' in headers:
+                await send(start_message)
+                await send(message)
+                return
+
+            compress = functools.partial(zlib.compress, body, RESPONSE_GZIP_LEVEL, wbits=31)
+            if len(body) > GZIP_OFFLOAD_BYTES:
+                body = await asyncio.get_running_loop().run_in_executor(None, compress)
+            else:
+                body = compress()
+            headers['Content-Encoding'] = 'gzip'
+            headers['Content-Length'] = str(len(body))
+            headers.add_vary_header('Accept-Encoding')
+            await send(start_message)
+            await send({**message, 'body': body})
+
+        await self.app(scope, receive, send_compressed)
+
+app.add_middleware(GZipCompleteResponsesMiddleware)
+
+# ============ METRICS ============
+
+REQUEST_LATENCY = Histogram(
+    'smartledger_http_request_duration_seconds',
+    'HTTP request latency by route template, method and status',
+    ['route', 'method', 'status']
+)
+UPSTREAM_LATENCY = Histogram(
+    'smartledger_upstream_duration_seconds',
+    'Latency of Supabase and Gemini calls by service, target and operation',
+    ['service', 'target', 'operation'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+)
+UPSTREAM_ERRORS = Counter(
+    'smartledger_upstream_errors_total',
+    'Supabase and Gemini calls that raised',
+    ['service', 'target', 'operation']
+)
+DB_ROWS = Histogram(
+    'smartledger_db_rows_returned',
+    'Rows returned per PostgREST call',
+    ['target', 'operation'],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+)
+THREADPOOL_WAIT = Histogram(
+    'smartledger_threadpool_wait_seconds',
+    'Time a blocking call waited for a free worker thread',
+    ['pool'],
+    buckets=(.0005, .001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+)
+LLM_PROMPT_CHARS = Histogram(
+    'smartledger_llm_prompt_chars',
+    'Characters sent to Gemini per prompt',
+    ['operation'],
+    buckets=(100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+)
+LLM_RESPONSE_CHARS = Histogram(
+    'smartledger_llm_response_chars',
+    'Characters received from Gemini per completion',
+    ['operation'],
+    buckets=(50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+)
+LLM_FIRST_CHUNK = Histogram(
+    'smartledger_llm_first_chunk_seconds',
+    'Time from a streaming Gemini call to its first chunk',
+    buckets=(.1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+
+DB_POOL_WAIT = THREADPOOL_WAIT.labels('supabase')
+AI_POOL_WAIT = THREADPOOL_WAIT.labels('gemini')
+
+@contextmanager
+def observe_upstream(service: str, target: str, operation: str):
+    """Record the latency of a blocking upstream call, and count it if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.labels(service, target, operation).inc()
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(service, target, operation).observe(time.perf_counter() - start)
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware timing each request until its last body chunk is sent.
+    Requests are labelled by route template, so path parameters do not add series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # FastAPI records the matched route in the scope; CORS preflights and 404s have none
+            route = scope.get('route')
+            REQUEST_LATENCY.labels(
+                route.path if route is not None else 'unmatched', scope['method'], str(status_code)
+            ).observe(time.perf_counter() - start)
+
+if METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
+# ============ UPSTREAM CLIENTS ============
+
+_supabase_client = None
+_supabase_lock = threading.Lock()
+_gemini_model = None
+_gemini_lock = threading.Lock()
+
+def required_env(name: str) -> str:
+    value = os.environ.get(name)
+    if not value:
+        raise RuntimeError(f"{name} is not set")
+    return value
+
+def get_supabase():
+    """Return the shared Supabase client, creating it on first use."""
+    global _supabase_client
+    if _supabase_client is None:
+        with _supabase_lock:
+            if _supabase_client is None:
+                from supabase import create_client
+                _supabase_client = create_client(required_env('SUPABASE_URL'), required_env('SUPABASE_KEY'))
+    return _supabase_client
+
+def set_supabase_client(client):
+    """Use this client (or a stand-in with the same interface) for every database call."""
+    global _supabase_client
+    _supabase_client = client
+
+def get_gemini_model():
+    """
+    Return the shared Gemini model, creating it on first use. The SDK pulls in gRPC and
+    protobuf, so it is only imported once something needs it.
+    """
+    global _gemini_model
+    if _gemini_model is None:
+        with _gemini_lock:
+            if _gemini_model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=required_env('GEMINI_API_KEY'))
+                _gemini_model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+    return _gemini_model
+
+def set_gemini_model(model):
+    """Use this model (or a stand-in with generate_content) for every AI call."""
+    global _gemini_model
+    _gemini_model = model
+
+# ============ BLOCKING CLIENT HELPERS ============
+
+db_executor = ThreadPoolExecutor(max_workers=DB_THREADPOOL_SIZE, thread_name_prefix='supabase')
+ai_executor = ThreadPoolExecutor(max_workers=AI_THREADPOOL_SIZE, thread_name_prefix='gemini')
+
+def _timed_submit(pool_wait: Histogram, func, *args, **kwargs):
+    """Wrap a call so the time it spends queued for a worker thread is recorded."""
+    submitted = time.perf_counter()
+
+    def call():
+        pool_wait.observe(time.perf_counter() - submitted)
+        return func(*args, **kwargs)
+    return call
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking Supabase client call on the database thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, _timed_submit(DB_POOL_WAIT, func, *args, **kwargs))
+
+def _execute_observed(query):
+    # Tables are "transactions", RPCs "rpc/search_transactions": a bounded label set
+    target, operation = query.path.lstrip('/'), query.http_method
+    with observe_upstream('postgrest', target, operation):
+        response = query.execute()
+    data = response.data
+    DB_ROWS.labels(target, operation).observe(len(data) if isinstance(data, list) else int(data is not None))
+    return response
+
+async def db_execute(query):
+    """Execute a built PostgREST query without blocking the event loop."""
+    return await run_db(_execute_observed, query)
+
+async def run_auth(func, payload: Dict[str, Any]):
+    """Run a blocking Supabase Auth POST (sign up, sign in) on the database thread pool."""
+    def call():
+        with observe_upstream('auth', func.__name__, 'POST'):
+            return func(payload)
+    return await run_db(call)
+
+async def gather_queries(*queries, timeout: Optional[float] = None) -> list:
+    """
+    Execute independent PostgREST queries concurrently and return their results in order.
+    Raises a 504 if they do not all finish within the per-request deadline.
+    """
+    try:
+        return await asyncio.wait_for(
+            asyncio.gather(*(db_execute(q) for q in queries)),
+            timeout=timeout or REQUEST_DEADLINE_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Database queries timed out")
+
+async def fetch_all_rows(make_query) -> List[Dict[str, Any]]:
+    """
+    Read every row of an ordered table query or RPC call, SUPABASE_MAX_ROWS at a time,
+    since PostgREST cuts longer results silently. make_query builds a fresh query per page.
+    """
+    rows: List[Dict[str, Any]] = []
+    while True:
+        query = make_query()
+        # limit/offset parameters page RPC results too, which have no .range()
+        query.params = query.params.add('limit', SUPABASE_MAX_ROWS).add('offset', len(rows))
+        page = (await db_execute(query)).data
+        rows.extend(page)
+        if len(page) < SUPABASE_MAX_ROWS:
+            return rows
+
+async def generate_ai_text(prompt: str) -> str:
+    """Generate a Gemini completion on the AI thread pool and return its text."""
+    def generate():
+        model = get_gemini_model()
+        with observe_upstream('gemini', model.model_name, 'generate'):
+            return model.generate_content(prompt).text
+
+    loop = asyncio.get_running_loop()
+    LLM_PROMPT_CHARS.labels('generate').observe(len(prompt))
+    text = await loop.run_in_executor(ai_executor, _timed_submit(AI_POOL_WAIT, generate))
+    LLM_RESPONSE_CHARS.labels('generate').observe(len(text))
+    return text
+
+async def stream_ai_text(prompt: str):
+    """
+    Yield Gemini text chunks as they are generated. The blocking stream is consumed
+    on the AI thread pool and handed to the event loop through a queue.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+    end_of_stream = object()
+
+    def produce():
+        start = time.perf_counter()
+        first_chunk, response_chars = True, 0
+        try:
+            model = get_gemini_model()
+            with observe_upstream('gemini', model.model_name, 'stream'):
+                for chunk in model.generate_content(prompt, stream=True):
+                    if cancelled.is_set():
+                        break
+                    if first_chunk:
+                        LLM_FIRST_CHUNK.observe(time.perf_counter() - start)
+                        first_chunk = False
+                    text = chunk.text
+                    response_chars += len(text)
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            LLM_RESPONSE_CHARS.labels('stream').observe(response_chars)
+            loop.call_soon_threadsafe(queue.put_nowait, end_of_stream)
+
+    LLM_PROMPT_CHARS.labels('stream').observe(len(prompt))
+    producer = loop.run_in_executor(ai_executor, _timed_submit(AI_POOL_WAIT, produce))
+    try:
+        while True:
+            item = await queue.get()
+            if item is end_of_stream:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Stop pulling from Gemini if the client went away mid-generation
+        cancelled.set()
+        await producer
+
+# Startup warm-up progress per upstream: "not started", "warming", "warm" or the error that stopped it
+warmup_status: Dict[str, str] = {"supabase": "not started", "gemini": "not started"}
+
+async def warm_up_upstreams():
+    """
+    Build both clients on their thread pools and make one cheap Supabase round trip,
+    so the first real requests do not pay for imports, client setup or a TLS handshake.
+    """
+    async def warm_supabase():
+        await run_db(get_supabase)
+        await db_execute(get_supabase().table('users').select('id').limit(1))
+
+    async def warm_gemini():
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(ai_executor, get_gemini_model)
+
+    async def warm(name, step):
+        warmup_status[name] = "warming"
+        try:
+            await step()
+            warmup_status[name] = "warm"
+        except Exception as e:
+            warmup_status[name] = f"failed: {str(e)}"
+            logger.warning(f"Warm-up of {name} failed: {str(e)}")
+
+    await asyncio.gather(warm("supabase", warm_supabase), warm("gemini", warm_gemini))
+
+@app.on_event("startup")
+async def start_warm_up():
+    if WARMUP_ON_STARTUP:
+        # Not awaited: the server takes traffic straight away and /ready turns 200 when this finishes
+        app.state.warm_up = asyncio.create_task(warm_up_upstreams())
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    db_executor.shutdown(wait=False, cancel_futures=True)
+    ai_executor.shutdown(wait=False, cancel_futures=True)
+
+# ============ CACHE HELPERS ============
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache with per-entry expiry.
+    Entries expire after the cache's default TTL or at an explicit timestamp.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None):
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Any):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
 
 # ============ AUTH HELPERS ============
 
+# Verified token identities, keyed by token hash and expiring at the token's `exp`
+token_cache = TTLCache(max_size=AUTH_TOKEN_CACHE_SIZE)
+
+# Rows of the users table, keyed by user id
+user_cache = TTLCache(max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+_jwks_client: Optional[jwt.PyJWKClient] = None
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when a token cannot be checked locally because no signing key is configured."""
+
+class MissingJWTSecret(LocalVerificationUnavailable):
+    """Raised for HS256 tokens when SUPABASE_JWT_SECRET is not set; reported once at startup."""
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    global _jwks_client
+    if _jwks_client is None:
+        jwks_url = SUPABASE_JWKS_URL or f"{required_env('SUPABASE_URL').rstrip('/')}/auth/v1/.well-known/jwks.json"
+        _jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True)
+    return _jwks_client
+
+def verify_token_locally(token: str) -> Dict[str, Any]:
+    """
+    Verify a Supabase access token's signature, audience and expiry in-process.
+    HS256 tokens are checked against SUPABASE_JWT_SECRET, asymmetric ones against the JWKS.
+    """
+    algorithm = jwt.get_unverified_header(token).get('alg')
+
+    if algorithm == 'HS256':
+        if not SUPABASE_JWT_SECRET:
+            raise MissingJWTSecret("SUPABASE_JWT_SECRET is not configured")
+        key = SUPABASE_JWT_SECRET
+    elif algorithm in ('RS256', 'ES256'):
+        try:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientError as e:
+            raise LocalVerificationUnavailable(f"JWKS lookup failed: {str(e)}")
+    else:
+        raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=SUPABASE_JWT_AUDIENCE,
+        options={"require": ["exp", "sub"]}
+    )
+
+def verify_token_remotely(token: str) -> Dict[str, Any]:
+    """Verify a token by asking Supabase Auth for the user it belongs to."""
+    with observe_upstream('auth', 'get_user', 'GET'):
+        user_response = get_supabase().auth.get_user(token)
+
+    if not user_response or not user_response.user:
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
+
+    supabase_user = user_response.user
+    return {
+        'id': supabase_user.id,
+        'email': supabase_user.email,
+        'user_metadata': supabase_user.user_metadata or {}
+    }
+
+async def resolve_token_identity(token: str) -> Dict[str, Any]:
+    """
+    Return the id, email and metadata of the user a token was issued to.
+    In local mode identities are cached until the token expires, including those
+    Supabase Auth confirmed because local verification was unavailable, so repeat
+    requests with the same token skip verification entirely.
+    """
+    cache_key = hashlib.sha256(token.encode()).hexdigest()
+    identity = token_cache.get(cache_key)
+    if identity is not None:
+        return identity
+
+    if AUTH_VERIFICATION_MODE != 'local':
+        return await run_db(verify_token_remotely, token)
+
+    try:
+        # Runs on the pool because a JWKS refresh is a blocking HTTP call
+        claims = await run_db(verify_token_locally, token)
+    except LocalVerificationUnavailable as e:
+        # A missing secret is a deployment choice, logged once at startup; JWKS failures are not
+        if not isinstance(e, MissingJWTSecret):
+            logger.warning(f"Local token verification unavailable, falling back to Supabase Auth: {str(e)}")
+        identity = await run_db(verify_token_remotely, token)
+        # Supabase Auth has just accepted the token, so its own expiry can be trusted
+        expires_at = jwt.decode(token, options={"verify_signature": False}).get('exp')
+        if expires_at:
+            token_cache.set(cache_key, identity, expires_at=expires_at)
+        return identity
+    except jwt.InvalidTokenError as e:
+        logger.info(f"Rejected authentication token: {str(e)}")
+        raise HTTPException(status_code=401, detail="Invalid authentication token")
+
+    identity = {
+        'id': claims['sub'],
+        'email': claims.get('email', ''),
+        'user_metadata': claims.get('user_metadata') or {}
+    }
+    token_cache.set(cache_key, identity, expires_at=claims['exp'])
+    return identity
+
+@app.on_event("startup")
+def report_token_verification():
+    if AUTH_VERIFICATION_MODE == 'local' and not SUPABASE_JWT_SECRET:
+        logger.warning(
+            "SUPABASE_JWT_SECRET is not set: HS256 tokens will be verified by Supabase Auth "
+            "on first use and cached until they expire"
+        )
+
+async def get_or_create_user_profile(user_id: str, email: str, full_name: str) -> User:
+    """
+    Return the users-table profile for a Supabase Auth user, creating it if missing.
+    Reads go through the user profile cache shared by auth routes and get_current_user.
+    """
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    result = await db_execute(get_supabase().table('users').select('*').eq('id', user_id))
+
+    if not result.data:
+        # Create user profile if it doesn't exist
+        user_dict = {
+            'id': user_id,
+            'email': email,
+            'full_name': full_name,
+            'created_at': datetime.now(timezone.utc).isoformat()
+        }
+        result = await db_execute(get_supabase().table('users').insert(user_dict))
+
+    user = User(**result.data[0])
+    user_cache.set(user_id, user)
+    return user
+
+def invalidate_user_profile(user_id: str):
+    """Drop a cached profile so the next lookup re-reads the users table."""
+    user_cache.invalidate(user_id)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     Get current user from Supabase Auth token.
-    Verifies the JWT token with Supabase and returns user data.
+    Verifies the JWT locally (or with Supabase Auth in remote mode) and returns user data.
     """
     try:
         token = credentials.credentials
         
-        # Verify token with Supabase Auth
-        user_response = supabase.auth.get_user(token)
-        
-        if not user_response or not user_response.user:
-            raise HTTPException(status_code=401, detail="Invalid authentication token")
+        identity = await resolve_token_identity(token)
         
-        supabase_user = user_response.user
-        
-        # Get or create user profile in our users table
-        result = supabase.table('users').select('*').eq('id', supabase_user.id).execute()
-        
-        if not result.data:
-            # Create user profile if it doesn't exist
-            user_dict = {
-                'id': supabase_user.id,
-                'email': supabase_user.email,
-                'full_name': supabase_user.user_metadata.get('full_name', supabase_user.email.split('@')[0]),
-                'created_at': datetime.now(timezone.utc).isoformat()
-            }
-            result = supabase.table('users').insert(user_dict).execute()
-            
-        user_data = result.data[0]
-        return User(**user_data)
+        return await get_or_create_user_profile(
+            identity['id'],
+            identity['email'],
+            identity['user_metadata'].get('full_name', identity['email'].split('@')[0])
+        )
         
     except HTTPException:
         raise
@@ -169,7 +867,7 @@ async def register(user_data: UserRegister):
     """
     try:
         # Sign up user with Supabase Auth
-        auth_response = supabase.auth.sign_up({
+        auth_response = await run_auth(get_supabase().auth.sign_up, {
             "email": user_data.email,
             "password": user_data.password,
             "options": {
@@ -196,12 +894,16 @@ async def register(user_data: UserRegister):
             'created_at': datetime.now(timezone.utc).isoformat()
         }
         
-        result = supabase.table('users').insert(user_dict).execute()
+        result = await db_execute(get_supabase().table('users').insert(user_dict))
         
-        if not result.data:
+        user = User(**user_dict)
+        
+        if result.data:
+            user_cache.set(user.id, user)
+        else:
             logger.warning(f"Failed to create user profile for {supabase_user.id}")
+            invalidate_user_profile(user.id)
         
-        user = User(**user_dict)
         return Token(access_token=access_token, token_type="bearer", user=user)
         
     except HTTPException:
@@ -228,7 +930,7 @@ async def login(user_data: UserLogin):
     """
     try:
         # Sign in with Supabase Auth
-        auth_response = supabase.auth.sign_in_with_password({
+        auth_response = await run_auth(get_supabase().auth.sign_in_with_password, {
             "email": user_data.email,
             "password": user_data.password
         })
@@ -239,21 +941,12 @@ async def login(user_data: UserLogin):
         supabase_user = auth_response.user
         access_token = auth_response.session.access_token
         
-        # Get user profile from users table
-        result = supabase.table('users').select('*').eq('id', supabase_user.id).execute()
-        
-        if not result.data:
-            # Create profile if it doesn't exist (for existing Supabase Auth users)
-            user_dict = {
-                'id': supabase_user.id,
-                'email': supabase_user.email,
-                'full_name': supabase_user.user_metadata.get('full_name', supabase_user.email.split('@')[0]),
-                'created_at': datetime.now(timezone.utc).isoformat()
-            }
-            result = supabase.table('users').insert(user_dict).execute()
-        
-        user_dict = result.data[0]
-        user = User(**user_dict)
+        # Get user profile from users table (creates it for existing Supabase Auth users)
+        user = await get_or_create_user_profile(
+            supabase_user.id,
+            supabase_user.email,
+            supabase_user.user_metadata.get('full_name', supabase_user.email.split('@')[0])
+        )
         
         return Token(access_token=access_token, token_type="bearer", user=user)
         
@@ -273,6 +966,112 @@ async def login(user_data: UserLogin):
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
+# ============ PAGINATION HELPERS ============
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    """Encode the (date, id) keyset position of the last row on a page."""
+    return base64.urlsafe_b64encode(f"{row['date']}|{row['id']}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode and validate a cursor produced by encode_cursor."""
+    try:
+        date_value, id_value = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        datetime.strptime(date_value, "%Y-%m-%d")
+        return date_value, str(uuid.UUID(id_value))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def order_by_keyset(query):
+    """Order newest first by (date, id) so rows have a stable total order across pages."""
+    query.params = query.params.add('order', 'date.desc,id.desc')
+    return query
+
+def after_cursor(query, cursor: str):
+    """Restrict a keyset-ordered query to rows strictly after the cursor position."""
+    date_value, id_value = decode_cursor(cursor)
+    query.params = query.params.add('or', f"(date.lt.{date_value},and(date.eq.{date_value},id.lt.{id_value}))")
+    return query
+
+@functools.lru_cache(maxsize=None)
+def list_adapter(model: type) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+def list_response(model: type, rows: List[Dict[str, Any]], response: Response,
+                  page_model: Optional[type] = None, next_cursor: Optional[str] = None,
+                  mode: Optional[str] = None):
+    """
+    Serialize database rows as a list of `model`, or as a `page_model` page when given.
+    Outside "model" mode the body is rendered here and returned as a Response, which
+    FastAPI sends without re-validating it against the route's response_model; the
+    headers dependencies set on `response` (ETag) are carried over.
+    """
+    mode = mode or LIST_RESPONSE_MODE
+    if mode == 'validated':
+        adapter = list_adapter(model)
+        items = adapter.dump_json(adapter.validate_python(rows))
+    elif mode == 'trusted':
+        # Column values pass through as PostgREST returned them, e.g. timestamps keep "+00:00"
+        items = orjson.dumps([{name: row.get(name) for name in model.model_fields} for row in rows])
+    else:
+        items = [model(**row) for row in rows]
+        return page_model(items=items, next_cursor=next_cursor) if page_model else items
+
+    body = b'{"items":' + items + b',"next_cursor":' + orjson.dumps(next_cursor) + b'}' if page_model else items
+    return Response(content=body, media_type='application/json', headers=dict(response.headers))
+
+def encode_offset_cursor(offset: int) -> str:
+    """Encode the position of the next page of a relevance-ranked result set."""
+    return base64.urlsafe_b64encode(f"offset|{offset}".encode()).decode()
+
+def decode_offset_cursor(cursor: str) -> int:
+    """Decode and validate a cursor produced by encode_offset_cursor."""
+    try:
+        label, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        if label != 'offset' or int(offset) < 0:
+            raise ValueError(cursor)
+        return int(offset)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+# ============ CONDITIONAL REQUEST HELPERS ============
+
+async def fetch_data_version(user_id: str) -> int:
+    """The user's data version, which triggers bump on every write to their transactions or budgets."""
+    result = await db_execute(get_supabase().table('user_data_versions').select('version').eq('user_id', user_id))
+    return result.data[0]['version'] if result.data else 0
+
+def if_none_match(request: Request) -> List[str]:
+    header = request.headers.get('if-none-match')
+    return [tag.strip() for tag in header.split(',')] if header else []
+
+async def data_version(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+) -> int:
+    """
+    Dependency for read endpoints. Answers a matching If-None-Match with a 304 before
+    any row data is queried; otherwise tags the response with an ETag and returns the
+    data version. The version is read before the endpoint's own queries, so a write in
+    between can only make the ETag older than the body, never newer.
+    """
+    version = await fetch_data_version(current_user.id)
+    # Dashboard and budget figures depend on today's date as well as the data
+    variant = f"{current_user.id}|{request.url.path}|{request.url.query}|{date.today().isoformat()}"
+    etag = f'W/"{version}-{zlib.crc32(variant.encode()):08x}"'
+
+    tags = if_none_match(request)
+    if etag in tags or '*' in tags:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    response.headers['ETag'] = etag
+    # Let browsers keep the body but revalidate it on every request
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return version
+
 # ============ TRANSACTION ROUTES ============
 
 @api_router.post("/transactions", response_model=Transaction)
@@ -285,39 +1084,101 @@ async def create_transaction(transaction_data: TransactionCreate, current_user:
             'created_at': datetime.now(timezone.utc).isoformat()
         }
         
-        result = supabase.table('transactions').insert(transaction_dict).execute()
+        result = await db_execute(get_supabase().table('transactions').insert(transaction_dict))
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create transaction")
         
+        transactions_changed(current_user.id)
         return Transaction(**result.data[0])
     except Exception as e:
         logger.error(f"Create transaction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create transaction: {str(e)}")
 
-@api_router.get("/transactions", response_model=List[Transaction])
+@api_router.get("/transactions", response_model=Union[List[Transaction], TransactionPage], dependencies=[Depends(data_version)])
 async def get_transactions(
+    response: Response,
     category: Optional[str] = None,
     type: Optional[str] = None,
     search: Optional[str] = None,
+    date_from: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    date_to: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
+    """
+    List the user's transactions, newest first.
+    Passing `limit` or `cursor` returns a keyset-paginated page with a `next_cursor`;
+    without them the full list is returned as before.
+    """
     try:
-        query = supabase.table('transactions').select('*').eq('user_id', current_user.id)
+        if search:
+            return await search_transactions(search, category, type, date_from, date_to, limit, cursor, response, current_user)
+        
+        query = get_supabase().table('transactions').select('*').eq('user_id', current_user.id)
         
         if category:
             query = query.eq('category', category)
         if type:
             query = query.eq('type', type)
-        if search:
-            query = query.ilike('description', f'%{search}%')
+        if date_from:
+            query = query.gte('date', date_from)
+        if date_to:
+            query = query.lte('date', date_to)
+        
+        query = order_by_keyset(query)
+        
+        if limit is None and cursor is None:
+            result = await db_execute(query)
+            return list_response(Transaction, result.data, response)
+        
+        page_size = limit or DEFAULT_PAGE_SIZE
+        if cursor:
+            query = after_cursor(query, cursor)
         
-        result = query.order('date', desc=True).execute()
-        return [Transaction(**t) for t in result.data]
+        # Fetch one extra row to learn whether another page exists
+        result = await db_execute(query.limit(page_size + 1))
+        rows = result.data[:page_size]
+        next_cursor = encode_cursor(rows[-1]) if len(result.data) > page_size else None
+        
+        return list_response(Transaction, rows, response, TransactionPage, next_cursor)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get transactions failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch transactions: {str(e)}")
 
+async def search_transactions(search: str, category: Optional[str], type: Optional[str],
+                              date_from: Optional[str], date_to: Optional[str],
+                              limit: Optional[int], cursor: Optional[str], response: Response, current_user: User):
+    """
+    Full-text, prefix and trigram search over description and category, best matches first.
+    Ranked results page by offset, so their cursors are not interchangeable with keyset cursors.
+    """
+    params = {
+        'p_user_id': current_user.id,
+        'p_query': search,
+        'p_category': category,
+        'p_type': type,
+        'p_date_from': date_from,
+        'p_date_to': date_to
+    }
+    
+    if limit is None and cursor is None:
+        result = await db_execute(get_supabase().rpc('search_transactions', params))
+        return list_response(Transaction, result.data, response)
+    
+    page_size = limit or DEFAULT_PAGE_SIZE
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    
+    # Fetch one extra row to learn whether another page exists
+    result = await db_execute(get_supabase().rpc('search_transactions', {**params, 'p_limit': page_size + 1, 'p_offset': offset}))
+    rows = result.data[:page_size]
+    next_cursor = encode_offset_cursor(offset + page_size) if len(result.data) > page_size else None
+    
+    return list_response(Transaction, rows, response, TransactionPage, next_cursor)
+
 @api_router.put("/transactions/{transaction_id}", response_model=Transaction)
 async def update_transaction(
     transaction_id: str,
@@ -325,13 +1186,14 @@ async def update_transaction(
     current_user: User = Depends(get_current_user)
 ):
     try:
-        result = supabase.table('transactions').update(
+        result = await db_execute(get_supabase().table('transactions').update(
             transaction_data.model_dump()
-        ).eq('id', transaction_id).eq('user_id', current_user.id).execute()
+        ).eq('id', transaction_id).eq('user_id', current_user.id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Transaction not found")
         
+        transactions_changed(current_user.id)
         return Transaction(**result.data[0])
     except HTTPException:
         raise
@@ -342,11 +1204,12 @@ async def update_transaction(
 @api_router.delete("/transactions/{transaction_id}")
 async def delete_transaction(transaction_id: str, current_user: User = Depends(get_current_user)):
     try:
-        result = supabase.table('transactions').delete().eq('id', transaction_id).eq('user_id', current_user.id).execute()
+        result = await db_execute(get_supabase().table('transactions').delete().eq('id', transaction_id).eq('user_id', current_user.id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Transaction not found")
         
+        transactions_changed(current_user.id)
         return {"message": "Transaction deleted"}
     except HTTPException:
         raise
@@ -360,7 +1223,7 @@ async def delete_transaction(transaction_id: str, current_user: User = Depends(g
 async def create_budget(budget_data: BudgetCreate, current_user: User = Depends(get_current_user)):
     try:
         # Check if budget exists
-        existing = supabase.table('budgets').select('id').eq('user_id', current_user.id).eq('category', budget_data.category).eq('month', budget_data.month).eq('year', budget_data.year).execute()
+        existing = await db_execute(get_supabase().table('budgets').select('id').eq('user_id', current_user.id).eq('category', budget_data.category).eq('month', budget_data.month).eq('year', budget_data.year))
         
         if existing.data:
             raise HTTPException(status_code=400, detail="Budget already exists for this category and period")
@@ -375,7 +1238,7 @@ async def create_budget(budget_data: BudgetCreate, current_user: User = Depends(
             'created_at': datetime.now(timezone.utc).isoformat()
         }
         
-        result = supabase.table('budgets').insert(budget_dict).execute()
+        result = await db_execute(get_supabase().table('budgets').insert(budget_dict))
         
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create budget")
@@ -387,26 +1250,78 @@ async def create_budget(budget_data: BudgetCreate, current_user: User = Depends(
         logger.error(f"Create budget failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create budget: {str(e)}")
 
-@api_router.get("/budgets", response_model=List[Budget])
+@api_router.get("/budgets", response_model=List[Budget], dependencies=[Depends(data_version)])
 async def get_budgets(
+    response: Response,
     month: Optional[int] = None,
     year: Optional[int] = None,
     current_user: User = Depends(get_current_user)
 ):
     try:
-        query = supabase.table('budgets').select('*').eq('user_id', current_user.id)
+        query = get_supabase().table('budgets').select('*').eq('user_id', current_user.id)
         
         if month:
             query = query.eq('month', month)
         if year:
             query = query.eq('year', year)
         
-        result = query.execute()
-        return [Budget(**b) for b in result.data]
+        result = await db_execute(query)
+        return list_response(Budget, result.data, response)
     except Exception as e:
         logger.error(f"Get budgets failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch budgets: {str(e)}")
 
+def project_month_spend(spent: float, year: int, month: int, today: datetime) -> float:
+    """Extrapolate month-to-date spend to month end at the current daily rate."""
+    if (year, month) != (today.year, today.month):
+        # Past months are final; future months have nothing to extrapolate from
+        return spent
+    days_in_month = calendar.monthrange(year, month)[1]
+    return spent / today.day * days_in_month
+
+@api_router.get("/budgets/progress", response_model=List[BudgetProgress], dependencies=[Depends(data_version)])
+async def get_budget_progress(
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Spent, remaining and projected month-end spend for each budget of a month
+    (default: the current one), read from the monthly rollups rather than transactions.
+    """
+    try:
+        now = datetime.now()
+        month = month or now.month
+        year = year or now.year
+
+        budgets_result, rollups_result = await gather_queries(
+            get_supabase().table('budgets').select('*').eq('user_id', current_user.id).eq('month', month).eq('year', year),
+            get_supabase().table('monthly_rollups').select('category,amount_sum').eq('user_id', current_user.id)
+                .eq('year', year).eq('month', month).eq('type', 'expense')
+        )
+
+        spent_by_category = {r['category']: float(r['amount_sum']) for r in rollups_result.data}
+
+        progress = []
+        for b in budgets_result.data:
+            limit = float(b['limit_amount'])
+            spent = spent_by_category.get(b['category'], 0.0)
+            projected = project_month_spend(spent, year, month, now)
+            progress.append(BudgetProgress(
+                **b,
+                spent=round(spent, 2),
+                remaining=round(max(limit - spent, 0.0), 2),
+                percent_used=round(spent / limit * 100, 1) if limit > 0 else (100.0 if spent > 0 else 0.0),
+                projected_spend=round(projected, 2),
+                projected_overspend=round(max(projected - limit, 0.0), 2)
+            ))
+        return progress
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get budget progress failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch budget progress: {str(e)}")
+
 @api_router.put("/budgets/{budget_id}", response_model=Budget)
 async def update_budget(
     budget_id: str,
@@ -421,7 +1336,7 @@ async def update_budget(
             'year': budget_data.year
         }
         
-        result = supabase.table('budgets').update(update_dict).eq('id', budget_id).eq('user_id', current_user.id).execute()
+        result = await db_execute(get_supabase().table('budgets').update(update_dict).eq('id', budget_id).eq('user_id', current_user.id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Budget not found")
@@ -436,7 +1351,7 @@ async def update_budget(
 @api_router.delete("/budgets/{budget_id}")
 async def delete_budget(budget_id: str, current_user: User = Depends(get_current_user)):
     try:
-        result = supabase.table('budgets').delete().eq('id', budget_id).eq('user_id', current_user.id).execute()
+        result = await db_execute(get_supabase().table('budgets').delete().eq('id', budget_id).eq('user_id', current_user.id))
         
         if not result.data:
             raise HTTPException(status_code=404, detail="Budget not found")
@@ -450,37 +1365,34 @@ async def delete_budget(budget_id: str, current_user: User = Depends(get_current
 
 # ============ DASHBOARD ROUTE ============
 
-@api_router.get("/dashboard")
+@api_router.get("/dashboard", dependencies=[Depends(data_version)])
 async def get_dashboard_data(current_user: User = Depends(get_current_user)):
     try:
-        # Get current month's data
         now = datetime.now()
-        start_of_month = datetime(now.year, now.month, 1).strftime("%Y-%m-%d")
-        end_of_month = (datetime(now.year, now.month + 1, 1) if now.month < 12 else datetime(now.year + 1, 1, 1) - timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        # Get monthly transactions
-        monthly_result = supabase.table('transactions').select('*').eq('user_id', current_user.id).gte('date', start_of_month).lte('date', end_of_month).execute()
         
-        monthly_income = sum(t["amount"] for t in monthly_result.data if t["type"] == "income")
-        monthly_expenses = sum(t["amount"] for t in monthly_result.data if t["type"] == "expense")
-        
-        # Get all transactions for total balance
-        all_result = supabase.table('transactions').select('*').eq('user_id', current_user.id).execute()
+        # Monthly per-category rollups are maintained by triggers on the transactions table.
+        # The all-time balance is summed in Postgres (one row per type), and only this
+        # month's rollups are read, so the dashboard's cost does not grow with account age
+        totals_result, month_result, recent_result = await gather_queries(
+            get_supabase().rpc('rollup_totals', {'p_user_id': current_user.id}),
+            get_supabase().table('monthly_rollups').select('type,category,amount_sum').eq('user_id', current_user.id).eq('year', now.year).eq('month', now.month),
+            get_supabase().table('transactions').select('*').eq('user_id', current_user.id).order('date', desc=True).limit(5)
+        )
         
-        total_income = sum(t["amount"] for t in all_result.data if t["type"] == "income")
-        total_expenses = sum(t["amount"] for t in all_result.data if t["type"] == "expense")
-        total_balance = total_income - total_expenses
+        totals = {r["type"]: float(r["amount_sum"]) for r in totals_result.data}
+        total_balance = totals.get("income", 0.0) - totals.get("expense", 0.0)
         
-        # Get spending by category
+        monthly_income = 0.0
+        monthly_expenses = 0.0
         expenses_by_category = {}
-        for t in monthly_result.data:
-            if t["type"] == "expense":
-                if t["category"] not in expenses_by_category:
-                    expenses_by_category[t["category"]] = 0
-                expenses_by_category[t["category"]] += t["amount"]
         
-        # Get recent transactions
-        recent_result = supabase.table('transactions').select('*').eq('user_id', current_user.id).order('date', desc=True).limit(5).execute()
+        for r in month_result.data:
+            amount = float(r["amount_sum"])
+            if r["type"] == "income":
+                monthly_income += amount
+            else:
+                monthly_expenses += amount
+                expenses_by_category[r["category"]] = expenses_by_category.get(r["category"], 0) + amount
         
         return {
             "total_balance": total_balance,
@@ -489,19 +1401,75 @@ async def get_dashboard_data(current_user: User = Depends(get_current_user)):
             "spending_by_category": expenses_by_category,
             "recent_transactions": recent_result.data
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get dashboard failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch dashboard data: {str(e)}")
 
+# ============ AI STREAMING HELPERS ============
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def stream_ai_response(prompt: str, finalize) -> StreamingResponse:
+    """
+    Stream a Gemini generation as Server-Sent Events: a `token` event per chunk,
+    then a `done` event carrying finalize(full_text), the endpoint's regular response.
+    """
+    async def events():
+        parts = []
+        try:
+            async for text in stream_ai_text(prompt):
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+            result = finalize(''.join(parts))
+            if inspect.isawaitable(result):
+                result = await result
+            yield sse_event("done", result)
+        except Exception as e:
+            logger.error(f"AI streaming failed: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return sse_response(events())
+
+def stream_ai_result(result: Any) -> StreamingResponse:
+    """Answer a streaming request that needed no generation with a lone `done` event."""
+    async def events():
+        yield sse_event("done", result)
+
+    return sse_response(events())
+
 # ============ AI INSIGHTS ROUTES ============
 
+def insight_fingerprint(insight_type: str, total_income: float, total_expenses: float,
+                        categories_spending: Dict[str, float], budget_count: int) -> str:
+    """Hash the inputs an insight prompt is built from, rounded to cents."""
+    inputs = {
+        'insight_type': insight_type,
+        'total_income': round(total_income, 2),
+        'total_expenses': round(total_expenses, 2),
+        'categories': {cat: round(amount, 2) for cat, amount in categories_spending.items()},
+        'budget_count': budget_count
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
 @api_router.post("/ai/insights", response_model=AIInsight)
-async def generate_ai_insight(request: AIInsightRequest, current_user: User = Depends(get_current_user)):
+async def generate_ai_insight(request: AIInsightRequest, stream: bool = False, current_user: User = Depends(get_current_user)):
+    """Generate a personalized insight; `stream=true` sends the text as Server-Sent Events"""
     try:
         # Get user's transaction data
-        transactions_result = supabase.table('transactions').select('*').eq('user_id', current_user.id).order('date', desc=True).limit(100).execute()
-        
-        budgets_result = supabase.table('budgets').select('*').eq('user_id', current_user.id).execute()
+        transactions_result, budgets_result = await gather_queries(
+            get_supabase().table('transactions').select('*').eq('user_id', current_user.id).order('date', desc=True).limit(100),
+            get_supabase().table('budgets').select('*').eq('user_id', current_user.id)
+        )
         
         # Prepare context for Gemini
         total_income = sum(t["amount"] for t in transactions_result.data if t["type"] == "income")
@@ -512,6 +1480,20 @@ async def generate_ai_insight(request: AIInsightRequest, current_user: User = De
             if t["type"] == "expense":
                 categories_spending[t["category"]] = categories_spending.get(t["category"], 0) + t["amount"]
         
+        # An unexpired insight generated from the same inputs is returned instead of calling Gemini again
+        fingerprint = insight_fingerprint(request.insight_type, total_income, total_expenses, categories_spending, len(budgets_result.data))
+        
+        if not request.force_refresh:
+            now = datetime.now(timezone.utc).isoformat()
+            existing = await db_execute(
+                get_supabase().table('ai_insights').select('insight_text,insight_type,created_at')
+                .eq('user_id', current_user.id).eq('input_fingerprint', fingerprint).gt('expires_at', now)
+                .order('created_at', desc=True).limit(1)
+            )
+            if existing.data:
+                insight = AIInsight(**existing.data[0], reused=True)
+                return stream_ai_result(insight) if stream else insight
+        
         prompt = f"""You are a financial advisor AI. Analyze the following user financial data and provide a personalized insight.
 
 Insight Type: {request.insight_type}
@@ -526,27 +1508,33 @@ Number of Budgets Set: {len(budgets_result.data)}
 
 Provide a concise, actionable insight (2-3 sentences) based on the data above. Focus on {request.insight_type} specifically."""
 
-        # Generate insight using Gemini
-        response = gemini_model.generate_content(prompt)
-        insight_text = response.text
-        
-        # Store insight in database
-        insight_dict = {
-            'id': str(uuid.uuid4()),
-            'user_id': current_user.id,
-            'insight_type': request.insight_type,
-            'insight_text': insight_text,
-            'created_at': datetime.now(timezone.utc).isoformat(),
-            'expires_at': (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
-        }
+        async def store_insight(insight_text: str) -> AIInsight:
+            # Store insight in database
+            insight_dict = {
+                'id': str(uuid.uuid4()),
+                'user_id': current_user.id,
+                'insight_type': request.insight_type,
+                'insight_text': insight_text,
+                'input_fingerprint': fingerprint,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'expires_at': (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
+            }
+            
+            await db_execute(get_supabase().table('ai_insights').insert(insight_dict))
+            
+            return AIInsight(
+                insight_text=insight_text,
+                insight_type=request.insight_type,
+                created_at=datetime.now(timezone.utc)
+            )
         
-        supabase.table('ai_insights').insert(insight_dict).execute()
+        if stream:
+            return stream_ai_response(prompt, store_insight)
         
-        return AIInsight(
-            insight_text=insight_text,
-            insight_type=request.insight_type,
-            created_at=datetime.now(timezone.utc)
-        )
+        # Generate insight using Gemini
+        return await store_insight(await generate_ai_text(prompt))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Generate AI insight failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate insight: {str(e)}")
@@ -556,7 +1544,7 @@ async def get_ai_insights(current_user: User = Depends(get_current_user)):
     try:
         # Get unexpired insights
         now = datetime.now(timezone.utc).isoformat()
-        result = supabase.table('ai_insights').select('*').eq('user_id', current_user.id).gt('expires_at', now).order('created_at', desc=True).limit(10).execute()
+        result = await db_execute(get_supabase().table('ai_insights').select('*').eq('user_id', current_user.id).gt('expires_at', now).order('created_at', desc=True).limit(10))
         
         return [AIInsight(insight_text=i['insight_text'], insight_type=i['insight_type'], created_at=i['created_at']) for i in result.data]
     except Exception as e:
@@ -565,71 +1553,630 @@ async def get_ai_insights(current_user: User = Depends(get_current_user)):
 
 # ============ CSV ROUTES ============
 
+CSV_HEADER = ['Date', 'Type', 'Category', 'Amount', 'Description']
+
+def format_csv_rows(rows: List[Dict[str, Any]], include_header: bool = False) -> str:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    if include_header:
+        writer.writerow(CSV_HEADER)
+    for t in rows:
+        writer.writerow([t['date'], t['type'], t['category'], t['amount'], t.get('description') or ''])
+    return output.getvalue()
+
+async def gzip_stream(chunks):
+    """Gzip-compress an async stream of text chunks on the fly."""
+    compressor = zlib.compressobj(wbits=31)  # 31 selects the gzip container format
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
 @api_router.get("/transactions/export/csv")
-async def export_transactions_csv(current_user: User = Depends(get_current_user)):
-    try:
-        result = supabase.table('transactions').select('*').eq('user_id', current_user.id).order('date', desc=True).execute()
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Date', 'Type', 'Category', 'Amount', 'Description'])
-        
-        for t in result.data:
-            writer.writerow([t['date'], t['type'], t['category'], t['amount'], t.get('description', '')])
-        
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=transactions.csv"}
+async def export_transactions_csv(gzip: bool = False, current_user: User = Depends(get_current_user)):
+    """
+    Stream the user's transactions as CSV, reading the table in keyset-ordered chunks
+    so memory stays flat regardless of history size. `gzip=true` compresses the stream.
+    """
+    def chunk_query(cursor: Optional[str] = None):
+        query = order_by_keyset(
+            get_supabase().table('transactions').select('id,date,type,category,amount,description').eq('user_id', current_user.id)
         )
+        if cursor:
+            query = after_cursor(query, cursor)
+        return query.limit(CSV_EXPORT_CHUNK_SIZE)
+
+    try:
+        # Read the first chunk before responding so database errors still return a 500
+        first_chunk = await db_execute(chunk_query())
     except Exception as e:
         logger.error(f"Export CSV failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to export transactions: {str(e)}")
 
-@api_router.post("/transactions/import/csv")
-async def import_transactions_csv(csv_data: str, current_user: User = Depends(get_current_user)):
+    async def csv_chunks():
+        rows = first_chunk.data
+        yield format_csv_rows(rows, include_header=True)
+        try:
+            # Stop on an empty chunk, not a short one: PostgREST's max-rows can cap a chunk
+            # below CSV_EXPORT_CHUNK_SIZE without it being the last
+            while rows:
+                rows = (await db_execute(chunk_query(encode_cursor(rows[-1])))).data
+                if rows:
+                    yield format_csv_rows(rows)
+        except Exception as e:
+            # Headers are already sent, so the client sees a truncated file
+            logger.error(f"Export CSV failed mid-stream: {str(e)}")
+            raise
+
+    if gzip:
+        return StreamingResponse(
+            gzip_stream(csv_chunks()),
+            media_type="application/gzip",
+            headers={"Content-Disposition": "attachment; filename=transactions.csv.gz"}
+        )
+
+    return StreamingResponse(
+        csv_chunks(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=transactions.csv"}
+    )
+
+CSV_REQUIRED_COLUMNS = ['Date', 'Type', 'Category', 'Amount']
+CSV_IMPORT_MAX_REPORTED_ERRORS = 100
+
+async def spool_csv_upload(request: Request, csv_data: Optional[str]):
+    """
+    Return a binary file object holding the uploaded CSV.
+    Multipart uploads are already spooled by Starlette; raw bodies are streamed
+    into a SpooledTemporaryFile so large files spill to disk instead of memory.
+    """
+    if csv_data is not None:
+        return io.BytesIO(csv_data.encode())
+
+    if request.headers.get('content-type', '').startswith('multipart/form-data'):
+        form = await request.form()
+        upload = form.get('file')
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Multipart upload must include a 'file' field")
+        return upload.file
+
+    spool = tempfile.SpooledTemporaryFile(max_size=CSV_IMPORT_SPOOL_BYTES)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+def parse_csv_row(row: Dict[str, Optional[str]], allow_blank_category: bool = False) -> TransactionCreate:
+    """Validate one CSV row against TransactionCreate."""
+    date_value = (row.get('Date') or '').strip()
     try:
-        reader = csv.DictReader(io.StringIO(csv_data))
-        imported_count = 0
-        
-        for row in reader:
-            transaction_dict = {
-                'id': str(uuid.uuid4()),
-                'user_id': current_user.id,
-                'date': row['Date'],
-                'type': row['Type'].lower(),
-                'category': row['Category'],
-                'amount': float(row['Amount']),
-                'description': row.get('Description', ''),
-                'created_at': datetime.now(timezone.utc).isoformat()
-            }
+        datetime.strptime(date_value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Date must be in YYYY-MM-DD format, got '{date_value}'")
+    category = (row.get('Category') or '').strip()
+    if not category and not allow_blank_category:
+        raise ValueError("Category is required")
+
+    return TransactionCreate(
+        date=date_value,
+        type=(row.get('Type') or '').strip().lower(),
+        category=category,
+        amount=(row.get('Amount') or '').strip(),
+        description=row.get('Description') or ''
+    )
+
+def read_csv_batch(reader: csv.DictReader, batch_size: int, allow_blank_category: bool = False) -> tuple:
+    """
+    Read up to batch_size valid rows from the reader.
+    Returns ([(line, TransactionCreate)], [CSVImportRowError], exhausted).
+    """
+    accepted, rejected = [], []
+    for row in reader:
+        line = reader.line_num
+        try:
+            accepted.append((line, parse_csv_row(row, allow_blank_category)))
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors())
+            rejected.append(CSVImportRowError(line=line, error=message))
+        except ValueError as e:
+            rejected.append(CSVImportRowError(line=line, error=str(e)))
+        if len(accepted) >= batch_size:
+            return accepted, rejected, False
+    return accepted, rejected, True
+
+@api_router.post("/transactions/import/csv", response_model=CSVImportResult)
+async def import_transactions_csv(
+    request: Request,
+    csv_data: Optional[str] = None,
+    batch_size: int = Query(CSV_IMPORT_BATCH_SIZE, ge=1, le=1000),
+    auto_categorize: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import transactions from a multipart `file` upload, a raw text/csv body or the
+    legacy `csv_data` parameter. Rows are parsed incrementally, validated one by one
+    and inserted in batches; rejected rows are reported with their line numbers.
+    With `auto_categorize=true`, rows with a blank Category are categorized by Gemini.
+    """
+    upload = await spool_csv_upload(request, csv_data)
+    try:
+        reader = csv.DictReader(io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''))
+        
+        fieldnames = await run_db(lambda: reader.fieldnames)
+        missing = [c for c in CSV_REQUIRED_COLUMNS if c not in (fieldnames or [])]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"CSV import failed: missing columns {', '.join(missing)}")
+        
+        accepted_count = 0
+        errors: List[CSVImportRowError] = []
+        exhausted = False
+        
+        while not exhausted:
+            # Parsing reads the spooled file, so it runs off the event loop too
+            batch, rejected, exhausted = await run_db(read_csv_batch, reader, batch_size, auto_categorize)
+            errors.extend(rejected)
+            if not batch:
+                continue
             
-            supabase.table('transactions').insert(transaction_dict).execute()
-            imported_count += 1
-        
-        return {"message": f"Imported {imported_count} transactions"}
+            uncategorized = [transaction for _, transaction in batch if not transaction.category]
+            if uncategorized:
+                results = await categorize_transactions(
+                    [CategorizeItem(description=t.description or '', amount=t.amount) for t in uncategorized],
+                    current_user.id
+                )
+                for transaction, result in zip(uncategorized, results):
+                    transaction.category = result['category']
+            
+            created_at = datetime.now(timezone.utc).isoformat()
+            rows = [
+                {
+                    'id': str(uuid.uuid4()),
+                    'user_id': current_user.id,
+                    **transaction.model_dump(),
+                    'created_at': created_at
+                }
+                for _, transaction in batch
+            ]
+            
+            try:
+                await db_execute(get_supabase().table('transactions').insert(rows))
+                accepted_count += len(rows)
+            except Exception as e:
+                logger.error(f"Import CSV batch failed: {str(e)}")
+                errors.extend(CSVImportRowError(line=line, error=f"Insert failed: {str(e)}") for line, _ in batch)
+        
+        if accepted_count:
+            transactions_changed(current_user.id)
+        
+        errors.sort(key=lambda e: e.line)
+        return CSVImportResult(
+            message=f"Imported {accepted_count} transactions",
+            accepted=accepted_count,
+            rejected=len(errors),
+            errors=errors[:CSV_IMPORT_MAX_REPORTED_ERRORS],
+            errors_truncated=len(errors) > CSV_IMPORT_MAX_REPORTED_ERRORS
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Import CSV failed: {str(e)}")
         raise HTTPException(status_code=400, detail=f"CSV import failed: {str(e)}")
+    finally:
+        upload.close()
 
 # ============ CATEGORIES ROUTE ============
 
+DEFAULT_CATEGORIES = ['Food', 'Rent', 'Transport', 'Entertainment', 'Utilities', 'Healthcare', 'Shopping', 'Salary', 'Other']
+
+# Per-user rows of the user_categories registry, which triggers keep in step with transactions
+user_categories_cache = TTLCache(max_size=USER_CATEGORIES_CACHE_SIZE, ttl=USER_CATEGORIES_CACHE_TTL_SECONDS)
+
+def transactions_changed(user_id: str):
+    """Drop this process's cached views of a user's transactions after a write."""
+    user_categories_cache.invalidate(user_id)
+    analytics_cache.invalidate(user_id)
+
+CATEGORY_ORDERINGS = {
+    "alpha": lambda c: c['category'].lower(),
+    "most_used": lambda c: (-c['transaction_count'], c['category'].lower()),
+    "recent": lambda c: (-datetime.fromisoformat(c['last_used']).toordinal(), c['category'].lower())
+}
+
 @api_router.get("/categories")
-async def get_categories(current_user: User = Depends(get_current_user)):
+async def get_categories(
+    order: Literal["alpha", "most_used", "recent"] = "alpha",
+    version: int = Depends(data_version),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    List the categories the user has used, with usage counts and last-used dates.
+    Served from the user_categories registry, so cost grows with categories, not transactions.
+    """
     try:
-        result = supabase.table('transactions').select('category').eq('user_id', current_user.id).execute()
-        
-        categories = list(set([t['category'] for t in result.data]))
+        # Entries carry the data version they were read at, so writes made through other
+        # server processes are noticed too
+        cached = user_categories_cache.get(current_user.id)
+        if cached is not None and cached[0] == version:
+            usage = cached[1]
+        else:
+            result = await db_execute(
+                get_supabase().table('user_categories').select('category,transaction_count,last_used').eq('user_id', current_user.id)
+            )
+            usage = result.data
+            user_categories_cache.set(current_user.id, (version, usage))
         
         # Default categories if none exist
-        default_categories = ['Food', 'Rent', 'Transport', 'Entertainment', 'Utilities', 'Healthcare', 'Shopping', 'Salary', 'Other']
+        if not usage:
+            return {"categories": DEFAULT_CATEGORIES, "usage": []}
         
-        return {"categories": categories if categories else default_categories}
+        usage = sorted(usage, key=CATEGORY_ORDERINGS[order])
+        return {"categories": [c['category'] for c in usage], "usage": usage}
     except Exception as e:
         logger.error(f"Get categories failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch categories: {str(e)}")
 
+# ============ ANALYTICS ROUTE ============
+
+AnalyticsGranularity = Literal["day", "week", "month"]
+
+# Per-user dicts of computed series keyed by (granularity, date_from, date_to, data version);
+# a user's entry is dropped whenever this process writes their transactions
+analytics_cache = TTLCache(max_size=ANALYTICS_CACHE_SIZE, ttl=ANALYTICS_CACHE_TTL_SECONDS)
+ANALYTICS_RANGES_PER_USER = 8
+
+# Buckets covered when no date_from is given; every bucket costs a row per type and category
+ANALYTICS_DEFAULT_BUCKETS = {
+    "day": min(90, ANALYTICS_MAX_BUCKETS),
+    "week": min(52, ANALYTICS_MAX_BUCKETS),
+    "month": min(60, ANALYTICS_MAX_BUCKETS)
+}
+
+def bucket_start(day: date, granularity: str) -> date:
+    """Start of the bucket containing a day; weeks start on Monday, like Postgres date_trunc."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def shift_bucket(start: date, granularity: str, n: int) -> date:
+    """Move a bucket start n buckets forward (or back, for negative n)."""
+    if granularity == "month":
+        index = start.year * 12 + start.month - 1 + n
+        return date(index // 12, index % 12 + 1, 1)
+    return start + timedelta(days=n * (7 if granularity == "week" else 1))
+
+def bucket_range(first: date, last: date, granularity: str) -> List[date]:
+    buckets = []
+    bucket = bucket_start(first, granularity)
+    while bucket <= last:
+        buckets.append(bucket)
+        bucket = shift_bucket(bucket, granularity, 1)
+    return buckets
+
+def savings_rate(income: float, expense: float) -> Optional[float]:
+    return round((income - expense) / income * 100, 1) if income > 0 else None
+
+async def fetch_series_rows(user_id: str, granularity: str, first: date, last: date) -> List[Dict[str, Any]]:
+    """
+    Return bucket, type, category and amount_sum rows between two dates.
+    Months come from monthly_rollups; days and weeks are grouped by transaction_series in Postgres.
+    Both are read in pages, so long ranges cost extra requests instead of losing rows.
+    """
+    if granularity == "month":
+        rollups = await fetch_all_rows(
+            lambda: get_supabase().table('monthly_rollups').select('year,month,type,category,amount_sum').eq('user_id', user_id)
+                .gte('year', first.year).lte('year', last.year)
+                .order('year').order('month').order('type').order('category')
+        )
+        rows = []
+        for r in rollups:
+            bucket = date(r['year'], r['month'], 1)
+            if first <= bucket <= last:
+                rows.append({'bucket': bucket, 'type': r['type'], 'category': r['category'], 'amount_sum': r['amount_sum']})
+        return rows
+
+    series = await fetch_all_rows(lambda: get_supabase().rpc('transaction_series', {
+        'p_user_id': user_id,
+        'p_granularity': granularity,
+        'p_date_from': first.isoformat(),
+        'p_date_to': last.isoformat()
+    }))
+    return [{**r, 'bucket': date.fromisoformat(str(r['bucket']))} for r in series]
+
+def build_analytics(rows: List[Dict[str, Any]], buckets: List[date]) -> Dict[str, Any]:
+    """Spread grouped rows over the buckets: income/expense series, category breakdowns and savings rate."""
+    index = {bucket: i for i, bucket in enumerate(buckets)}
+    income = [0.0] * len(buckets)
+    expense = [0.0] * len(buckets)
+    category_series: Dict[str, List[float]] = {}
+
+    for r in rows:
+        i = index.get(r['bucket'])
+        if i is None:
+            continue
+        amount = float(r['amount_sum'])
+        if r['type'] == 'income':
+            income[i] += amount
+        else:
+            expense[i] += amount
+            category_series.setdefault(r['category'], [0.0] * len(buckets))[i] += amount
+
+    total_income, total_expense = sum(income), sum(expense)
+    category_totals = sorted(
+        ((category, sum(values)) for category, values in category_series.items()),
+        key=lambda item: -item[1]
+    )
+
+    return {
+        "series": [
+            {
+                "period": bucket.isoformat(),
+                "income": round(income[i], 2),
+                "expense": round(expense[i], 2),
+                "net": round(income[i] - expense[i], 2),
+                "savings_rate": savings_rate(income[i], expense[i])
+            }
+            for i, bucket in enumerate(buckets)
+        ],
+        "categories": [
+            {
+                "category": category,
+                "amount": round(amount, 2),
+                "share": round(amount / total_expense * 100, 1) if total_expense else 0.0
+            }
+            for category, amount in category_totals
+        ],
+        "category_series": {
+            category: [round(value, 2) for value in category_series[category]] for category, _ in category_totals
+        },
+        "totals": {
+            "income": round(total_income, 2),
+            "expense": round(total_expense, 2),
+            "net": round(total_income - total_expense, 2),
+            "savings_rate": savings_rate(total_income, total_expense)
+        }
+    }
+
+@api_router.get("/analytics")
+async def get_analytics(
+    granularity: AnalyticsGranularity = "month",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    version: int = Depends(data_version),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Income, expense, net and savings rate per day, week or month, plus expense by category.
+    The range starts at the beginning of date_from's bucket (monthly buckets are whole months);
+    without date_from it starts at the user's first bucket with transactions, at most
+    90 days, 52 weeks or 60 months back.
+    """
+    try:
+        date_to = date_to or datetime.now().date()
+        if date_from and date_from > date_to:
+            raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+
+        cache_key = (granularity, date_from, date_to, version)
+        cached = analytics_cache.get(current_user.id) or {}
+        if cache_key in cached:
+            return cached[cache_key]
+
+        last = bucket_start(date_to, granularity)
+        first = bucket_start(date_from, granularity) if date_from else shift_bucket(last, granularity, 1 - ANALYTICS_DEFAULT_BUCKETS[granularity])
+        buckets = bucket_range(first, last, granularity)
+        if len(buckets) > ANALYTICS_MAX_BUCKETS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range spans {len(buckets)} {granularity} buckets; the limit is {ANALYTICS_MAX_BUCKETS}"
+            )
+
+        rows = await fetch_series_rows(current_user.id, granularity, first, date_to)
+        if not date_from:
+            first_with_data = min((r['bucket'] for r in rows), default=last)
+            buckets = [bucket for bucket in buckets if bucket >= first_with_data]
+
+        analytics = {
+            "granularity": granularity,
+            "date_from": buckets[0].isoformat() if buckets else None,
+            "date_to": date_to.isoformat(),
+            **build_analytics(rows, buckets)
+        }
+
+        # The page asks for the same few ranges repeatedly; keep the most recent per user
+        if len(cached) >= ANALYTICS_RANGES_PER_USER:
+            cached.pop(next(iter(cached)))
+        cached[cache_key] = analytics
+        analytics_cache.set(current_user.id, cached)
+        return analytics
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get analytics failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch analytics: {str(e)}")
+
+# ============ AI CATEGORIZATION CACHE ============
+
+VALID_CATEGORIES = ['Food', 'Rent', 'Transport', 'Entertainment', 'Utilities',
+                    'Healthcare', 'Shopping', 'Salary', 'Investment', 'Education',
+                    'Travel', 'Other']
+
+# In-memory tier in front of the persisted ai_category_cache table
+category_cache = TTLCache(max_size=AI_CATEGORY_CACHE_SIZE, ttl=AI_CATEGORY_CACHE_TTL_SECONDS)
+
+def normalize_description(description: str) -> str:
+    """Reduce a description to its merchant words: lowercase, no digits or punctuation."""
+    return ' '.join(re.sub(r'[^a-z]+', ' ', description.lower()).split())
+
+def amount_bucket(amount: float) -> int:
+    """Bucket amounts by powers of two so $4.50 and $5 coffees share a cache entry."""
+    magnitude = abs(amount)
+    return int(math.log2(magnitude)) + 1 if magnitude >= 1 else 0
+
+def categorization_cache_key(description: str, amount: float, user_id: str) -> tuple:
+    scope = user_id if AI_CATEGORY_CACHE_SCOPE == 'user' else 'global'
+    return (scope, normalize_description(description), amount_bucket(amount))
+
+async def get_cached_categories(keys: List[tuple]) -> Dict[tuple, str]:
+    """
+    Look categorizations up in memory, then fetch the remaining keys from the
+    persisted cache table in one query per scope.
+    """
+    found = {}
+    missing_by_scope: Dict[str, set] = {}
+    for key in set(keys):
+        category = category_cache.get(key)
+        if category is not None:
+            found[key] = category
+        else:
+            missing_by_scope.setdefault(key[0], set()).add(key)
+
+    now = datetime.now(timezone.utc).isoformat()
+    for scope, missing in missing_by_scope.items():
+        try:
+            result = await db_execute(
+                get_supabase().table('ai_category_cache').select('description_key,amount_bucket,category,expires_at')
+                .eq('scope', scope).in_('description_key', sorted({key[1] for key in missing}))
+                .gt('expires_at', now)
+            )
+        except Exception as e:
+            logger.warning(f"Category cache lookup failed: {str(e)}")
+            continue
+
+        for row in result.data:
+            key = (scope, row['description_key'], row['amount_bucket'])
+            if key in missing:
+                expires_at = datetime.fromisoformat(row['expires_at'].replace('Z', '+00:00')).timestamp()
+                category_cache.set(key, row['category'], expires_at=expires_at)
+                found[key] = row['category']
+
+    return found
+
+async def get_cached_category(key: tuple) -> Optional[str]:
+    return (await get_cached_categories([key])).get(key)
+
+async def store_cached_categories(categories: Dict[tuple, str]):
+    """Remember model categorizations in both cache tiers."""
+    if not categories:
+        return
+
+    now = datetime.now(timezone.utc)
+    expires_at = (now + timedelta(seconds=AI_CATEGORY_CACHE_TTL_SECONDS)).isoformat()
+    rows = []
+    for (scope, description_key, bucket), category in categories.items():
+        category_cache.set((scope, description_key, bucket), category)
+        rows.append({
+            'scope': scope,
+            'description_key': description_key,
+            'amount_bucket': bucket,
+            'category': category,
+            'created_at': now.isoformat(),
+            'expires_at': expires_at
+        })
+
+    try:
+        await db_execute(get_supabase().table('ai_category_cache').upsert(rows, on_conflict='scope,description_key,amount_bucket'))
+    except Exception as e:
+        logger.warning(f"Category cache write failed: {str(e)}")
+
+async def store_cached_category(key: tuple, category: str):
+    await store_cached_categories({key: category})
+
+# ============ AI BATCH CATEGORIZATION ============
+
+def pack_categorization_prompts(entries: List[tuple]) -> List[List[tuple]]:
+    """
+    Split (id, description, amount) entries into chunks that respect the
+    per-prompt item and character limits.
+    """
+    chunks, current, current_chars = [], [], 0
+    for entry in entries:
+        line_chars = len(entry[1]) + 32
+        if current and (len(current) >= AI_CATEGORIZE_PROMPT_MAX_ITEMS or current_chars + line_chars > AI_CATEGORIZE_PROMPT_MAX_CHARS):
+            chunks.append(current)
+            current, current_chars = [], 0
+        current.append(entry)
+        current_chars += line_chars
+    if current:
+        chunks.append(current)
+    return chunks
+
+def parse_categorization_response(text: str) -> Dict[int, str]:
+    """Parse the model's JSON array of {"id", "category"} objects, keeping valid categories only."""
+    start, end = text.find('['), text.rfind(']')
+    if start == -1 or end < start:
+        raise ValueError("Model response did not contain a JSON array")
+
+    categories = {}
+    for item in json.loads(text[start:end + 1]):
+        if isinstance(item, dict) and item.get('category') in VALID_CATEGORIES:
+            try:
+                categories[int(item['id'])] = item['category']
+            except (KeyError, TypeError, ValueError):
+                continue
+    return categories
+
+async def categorize_prompt_chunk(chunk: List[tuple]) -> Dict[int, str]:
+    listing = "\n".join(f'{{"id": {entry_id}, "description": {json.dumps(description)}, "amount": {amount}}}' for entry_id, description, amount in chunk)
+    prompt = f"""Categorize each of these transactions into ONE of these categories:
+{', '.join(VALID_CATEGORIES)}
+
+Transactions:
+{listing}
+
+Return ONLY a JSON array with one object per transaction, like:
+[{{"id": 0, "category": "Food"}}]"""
+
+    return parse_categorization_response(await generate_ai_text(prompt))
+
+async def categorize_transactions(items: List[CategorizeItem], user_id: str) -> List[Dict[str, Any]]:
+    """
+    Categorize many transactions at once. Cached answers are reused, identical
+    descriptions are sent once, and the rest are packed into as few Gemini prompts
+    as the size limits allow. Returns one result per input, in input order.
+    """
+    keys = [categorization_cache_key(item.description, item.amount, user_id) for item in items]
+    cached = await get_cached_categories([key for key in keys if key[1]])
+
+    # Group uncached items so each distinct description is only sent once
+    pending: Dict[Any, List[int]] = {}
+    for index, key in enumerate(keys):
+        if key not in cached:
+            pending.setdefault(key if key[1] else ('raw', index), []).append(index)
+
+    entries = [(entry_id, items[indexes[0]].description, items[indexes[0]].amount) for entry_id, indexes in enumerate(pending.values())]
+    chunks = pack_categorization_prompts(entries)
+    chunk_results = await asyncio.gather(*(categorize_prompt_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+    answered: Dict[int, str] = {}
+    for chunk, chunk_result in zip(chunks, chunk_results):
+        if isinstance(chunk_result, Exception):
+            logger.error(f"AI batch categorization chunk of {len(chunk)} failed: {str(chunk_result)}")
+            continue
+        answered.update(chunk_result)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    new_cache_entries = {}
+    for index, key in enumerate(keys):
+        if key in cached:
+            results[index] = {"description": items[index].description, "category": cached[key], "confidence": "high", "cached": True}
+
+    for entry_id, (group_key, indexes) in enumerate(pending.items()):
+        category = answered.get(entry_id)
+        if category and group_key[0] != 'raw':
+            new_cache_entries[group_key] = category
+        for index in indexes:
+            results[index] = {
+                "description": items[index].description,
+                "category": category or "Other",
+                "confidence": "high" if category else "low",
+                "cached": False
+            }
+
+    await store_cached_categories(new_cache_entries)
+    return results
+
 # ============ ENHANCED GEMINI AI FEATURES ============
 
 @api_router.post("/ai/categorize-transaction")
@@ -638,8 +2185,20 @@ async def ai_categorize_transaction(
     amount: float,
     current_user: User = Depends(get_current_user)
 ):
-    """Use Gemini AI to automatically categorize a transaction based on description"""
+    """
+    Use Gemini AI to automatically categorize a transaction based on description.
+    Results are cached by normalized description and amount bucket, so Gemini is
+    only called for descriptions it has not seen recently.
+    """
     try:
+        cache_key = categorization_cache_key(description, amount, current_user.id)
+        
+        # Descriptions without any letters carry nothing worth caching on
+        if cache_key[1]:
+            cached_category = await get_cached_category(cache_key)
+            if cached_category:
+                return {"category": cached_category, "confidence": "high", "cached": True}
+        
         prompt = f"""Categorize this transaction into ONE of these categories:
 Food, Rent, Transport, Entertainment, Utilities, Healthcare, Shopping, Salary, Investment, Education, Travel, Other
 
@@ -648,53 +2207,122 @@ Amount: ${amount}
 
 Return ONLY the category name, nothing else."""
 
-        response = gemini_model.generate_content(prompt)
-        category = response.text.strip()
+        category = (await generate_ai_text(prompt)).strip()
         
         # Validate category
-        valid_categories = ['Food', 'Rent', 'Transport', 'Entertainment', 'Utilities', 
-                          'Healthcare', 'Shopping', 'Salary', 'Investment', 'Education', 
-                          'Travel', 'Other']
-        
-        if category not in valid_categories:
+        if category not in VALID_CATEGORIES:
             category = 'Other'
+        elif cache_key[1]:
+            await store_cached_category(cache_key, category)
         
-        return {"category": category, "confidence": "high"}
+        return {"category": category, "confidence": "high", "cached": False}
     except Exception as e:
         logger.error(f"AI categorization failed: {str(e)}")
         return {"category": "Other", "confidence": "low", "error": str(e)}
 
+@api_router.post("/ai/categorize-batch")
+async def ai_categorize_batch(request: CategorizeBatchRequest, current_user: User = Depends(get_current_user)):
+    """Categorize up to AI_CATEGORIZE_BATCH_MAX_ITEMS transactions with as few Gemini calls as possible"""
+    try:
+        results = await categorize_transactions(request.items, current_user.id)
+        return {"results": results}
+    except Exception as e:
+        logger.error(f"AI batch categorization failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to categorize transactions: {str(e)}")
+
 @api_router.post("/ai/predict-spending")
-async def ai_predict_spending(current_user: User = Depends(get_current_user)):
-    """Use Gemini AI to predict next month's spending based on historical data"""
+async def ai_predict_spending(
+    mode: Optional[PredictMode] = None,
+    stream: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Predict next month's spending. "local" forecasts per category with exponential smoothing,
+    "hybrid" adds a Gemini narrative to that forecast, "llm" leaves the prediction to Gemini.
+    Every mode returns the same keys; those a mode does not produce are null or empty.
+    """
+    mode = mode or PREDICT_SPENDING_MODE
     try:
-        # Get last 3 months of transactions
-        three_months_ago = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-        result = supabase.table('transactions').select('*').eq('user_id', current_user.id).gte('date', three_months_ago).execute()
+        if mode == "llm":
+            return await predict_spending_llm(stream, current_user)
+        
+        # Forecast from the complete months before the current one
+        current_month = np.datetime64(datetime.now().strftime("%Y-%m"))
+        first_month = current_month - FORECAST_HISTORY_MONTHS
+        first_year = int(str(first_month)[:4])
+        rollups = await db_execute(
+            get_supabase().table('monthly_rollups').select('year,month,category,amount_sum').eq('user_id', current_user.id).eq('type', 'expense').gte('year', first_year)
+        )
         
-        # Analyze spending patterns
-        monthly_expenses = {}
-        category_trends = {}
+        forecast = forecast_rollups(rollups.data, first_month, FORECAST_HISTORY_MONTHS, horizon=2)
+        history = np.array(forecast['history'])
+        result = {
+            "mode": mode,
+            "month": str(current_month + 1),
+            "forecast": forecast['total'],
+            "categories": forecast['categories'],
+            "historical_average": round(float(history.mean()), 2) if len(history) else 0,
+            # A single irregular month (an annual bill, a holiday) should not flip the trend
+            "trend": trend_direction(history, window=TREND_MEDIAN_WINDOW),
+            "prediction": None
+        }
         
-        for t in result.data:
-            if t["type"] == "expense":
-                month_key = t["date"][:7]  # YYYY-MM
-                category = t["category"]
-                amount = t["amount"]
-                
-                monthly_expenses[month_key] = monthly_expenses.get(month_key, 0) + amount
-                
-                if category not in category_trends:
-                    category_trends[category] = []
-                category_trends[category].append(amount)
-        
-        prompt = f"""As a financial analyst AI, predict next month's spending based on this data:
+        if mode == "local" or not forecast['categories']:
+            return stream_ai_result(result) if stream else result
+        
+        total = forecast['total']
+        prompt = f"""As a financial analyst AI, explain this spending forecast for {result['month']}:
+
+Historical Monthly Spending:
+{chr(10).join([f"{month}: ${amount:.2f}" for month, amount in zip(np.arange(current_month - len(history), current_month).astype(str), history)])}
+Trend: {result['trend']}
+
+Forecast total: ${total['forecast']:.2f} (likely range ${total['lower']:.2f} - ${total['upper']:.2f})
+Category forecasts:
+{chr(10).join([f"{f['category']}: ${f['forecast']:.2f}" for f in forecast['categories'][:8]])}
+
+Provide:
+1. Top 3 categories to watch
+2. One money-saving tip
+
+Format: Just short phrases, be concise. Do not change the forecast numbers."""
+
+        def build_response(narrative: str):
+            return {**result, "prediction": narrative}
+        
+        if stream:
+            return stream_ai_response(prompt, build_response)
+        
+        return build_response(await generate_ai_text(prompt))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"AI prediction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate prediction: {str(e)}")
+
+async def predict_spending_llm(stream: bool, current_user: User):
+    """Ask Gemini for the prediction itself from the last 90 days of transactions"""
+    three_months_ago = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
+    result = await db_execute(
+        get_supabase().table('transactions').select('amount, type, category, date').eq('user_id', current_user.id).eq('type', 'expense').gte('date', three_months_ago)
+    )
+    
+    # Analyze spending patterns
+    expenses = TransactionFrame.from_rows(result.data)
+    months, monthly_totals = expenses.monthly_totals()
+    category_totals = expenses.category_totals()
+    category_counts = expenses.category_counts()
+    # The first and last months of the 90-day window are partial, so the trend uses the complete months between them
+    trend = trend_direction(monthly_totals[1:-1] if len(monthly_totals) >= 4 else monthly_totals)
+    
+    prompt = f"""As a financial analyst AI, predict next month's spending based on this data:
 
 Historical Monthly Spending:
-{chr(10).join([f"{month}: ${amount:.2f}" for month, amount in sorted(monthly_expenses.items())])}
+{chr(10).join([f"{month}: ${amount:.2f}" for month, amount in zip(months, monthly_totals)])}
+Trend: {trend}
 
 Category-wise spending patterns:
-{chr(10).join([f"{cat}: ${sum(amounts):.2f} across {len(amounts)} transactions" for cat, amounts in category_trends.items()])}
+{chr(10).join([f"{cat}: ${total:.2f} across {category_counts[cat]} transactions" for cat, total in sorted(category_totals.items(), key=lambda x: -x[1])])}
 
 Provide:
 1. Predicted total spending for next month (just the number)
@@ -703,25 +2331,31 @@ Provide:
 
 Format: Just numbers and short phrases, be concise."""
 
-        response = gemini_model.generate_content(prompt)
-        prediction = response.text
-        
+    def build_response(prediction: str):
         return {
+            "mode": "llm",
+            "month": str(np.datetime64(datetime.now().strftime("%Y-%m")) + 1),
+            "forecast": None,
+            "categories": [],
             "prediction": prediction,
-            "historical_average": sum(monthly_expenses.values()) / len(monthly_expenses) if monthly_expenses else 0,
-            "trend": "increasing" if len(monthly_expenses) >= 2 and list(monthly_expenses.values())[-1] > list(monthly_expenses.values())[0] else "stable"
+            "historical_average": round(float(monthly_totals.mean()), 2) if len(monthly_totals) else 0,
+            "trend": trend
         }
-    except Exception as e:
-        logger.error(f"AI prediction failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate prediction: {str(e)}")
+    
+    if stream:
+        return stream_ai_response(prompt, build_response)
+    
+    return build_response(await generate_ai_text(prompt))
 
 @api_router.post("/ai/financial-goals")
-async def ai_suggest_financial_goals(current_user: User = Depends(get_current_user)):
+async def ai_suggest_financial_goals(stream: bool = False, current_user: User = Depends(get_current_user)):
     """Use Gemini AI to suggest personalized financial goals"""
     try:
         # Get user's financial overview
-        all_transactions = supabase.table('transactions').select('*').eq('user_id', current_user.id).execute()
-        budgets = supabase.table('budgets').select('*').eq('user_id', current_user.id).execute()
+        all_transactions, budgets = await gather_queries(
+            get_supabase().table('transactions').select('*').eq('user_id', current_user.id),
+            get_supabase().table('budgets').select('*').eq('user_id', current_user.id)
+        )
         
         total_income = sum(t["amount"] for t in all_transactions.data if t["type"] == "income")
         total_expenses = sum(t["amount"] for t in all_transactions.data if t["type"] == "expense")
@@ -753,15 +2387,20 @@ Action: [one specific action step]
 
 Keep it concise and actionable."""
 
-        response = gemini_model.generate_content(prompt)
-        goals = response.text
+        def build_response(goals: str):
+            return {
+                "goals": goals,
+                "current_savings_rate": round(savings_rate, 1),
+                "recommended_savings_rate": 20.0,
+                "potential_monthly_savings": round((total_income * 0.2 - (total_income - total_expenses)) / 12, 2) if total_income > 0 else 0
+            }
         
-        return {
-            "goals": goals,
-            "current_savings_rate": round(savings_rate, 1),
-            "recommended_savings_rate": 20.0,
-            "potential_monthly_savings": round((total_income * 0.2 - (total_income - total_expenses)) / 12, 2) if total_income > 0 else 0
-        }
+        if stream:
+            return stream_ai_response(prompt, build_response)
+        
+        return build_response(await generate_ai_text(prompt))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"AI goals suggestion failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate goals: {str(e)}")
@@ -769,28 +2408,31 @@ Keep it concise and actionable."""
 @api_router.post("/ai/smart-budget-recommendation")
 async def ai_recommend_budget(
     category: str,
+    stream: bool = False,
     current_user: User = Depends(get_current_user)
 ):
     """Use Gemini AI to recommend optimal budget for a category"""
     try:
         # Get historical spending in this category
+        # and total income for context
         three_months_ago = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-        result = supabase.table('transactions').select('*').eq('user_id', current_user.id).eq('category', category).eq('type', 'expense').gte('date', three_months_ago).execute()
+        result, all_income = await gather_queries(
+            get_supabase().table('transactions').select('amount, type, category, date').eq('user_id', current_user.id).eq('category', category).eq('type', 'expense').gte('date', three_months_ago),
+            get_supabase().table('transactions').select('amount').eq('user_id', current_user.id).eq('type', 'income')
+        )
         
         if not result.data:
-            return {"recommended_budget": 0, "message": f"No historical data for {category}. Start tracking to get recommendations."}
-        
-        monthly_spending = {}
-        for t in result.data:
-            month = t["date"][:7]
-            monthly_spending[month] = monthly_spending.get(month, 0) + t["amount"]
+            no_data = {"recommended_budget": 0, "message": f"No historical data for {category}. Start tracking to get recommendations."}
+            return stream_ai_result(no_data) if stream else no_data
         
-        avg_spending = sum(monthly_spending.values()) / len(monthly_spending)
-        max_spending = max(monthly_spending.values())
-        min_spending = min(monthly_spending.values())
+        # Average over the whole 90-day window, so months without spending in this category
+        # pull it down; the calendar-month figures below only cover months that had spending
+        _, monthly_spending = TransactionFrame.from_rows(result.data).monthly_totals()
+        avg_spending = float(monthly_spending.sum()) / 3
+        max_spending = float(monthly_spending.max())
+        min_spending = float(monthly_spending.min())
+        typical_spending = float(np.median(monthly_spending))
         
-        # Get total income for context
-        all_income = supabase.table('transactions').select('amount').eq('user_id', current_user.id).eq('type', 'income').execute()
         total_income = sum(t["amount"] for t in all_income.data) if all_income.data else 0
         monthly_income = total_income / 3 if total_income > 0 else 0  # Last 3 months
         
@@ -798,24 +2440,30 @@ async def ai_recommend_budget(
 
 Historical Data (last 3 months):
 - Average monthly spending: ${avg_spending:.2f}
+- Median month: ${typical_spending:.2f}
 - Highest month: ${max_spending:.2f}
 - Lowest month: ${min_spending:.2f}
 - User's monthly income: ${monthly_income:.2f}
 
 Recommend a realistic budget amount and explain why. Be concise (2-3 sentences)."""
 
-        response = gemini_model.generate_content(prompt)
-        recommendation = response.text
-        
         # Extract recommended amount (simple heuristic)
         recommended_amount = round(avg_spending * 1.1, 2)  # 10% buffer above average
         
-        return {
-            "recommended_budget": recommended_amount,
-            "current_average": round(avg_spending, 2),
-            "explanation": recommendation,
-            "category": category
-        }
+        def build_response(recommendation: str):
+            return {
+                "recommended_budget": recommended_amount,
+                "current_average": round(avg_spending, 2),
+                "explanation": recommendation,
+                "category": category
+            }
+        
+        if stream:
+            return stream_ai_response(prompt, build_response)
+        
+        return build_response(await generate_ai_text(prompt))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"AI budget recommendation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate recommendation: {str(e)}")
@@ -826,24 +2474,20 @@ async def ai_detect_expense_anomalies(current_user: User = Depends(get_current_u
     try:
         # Get last 60 days of transactions
         sixty_days_ago = (datetime.now() - timedelta(days=60)).strftime("%Y-%m-%d")
-        result = supabase.table('transactions').select('*').eq('user_id', current_user.id).eq('type', 'expense').gte('date', sixty_days_ago).order('date', desc=True).execute()
+        result = await db_execute(
+            get_supabase().table('transactions').select('amount, type, category, date, description').eq('user_id', current_user.id).eq('type', 'expense').gte('date', sixty_days_ago).order('date', desc=True)
+        )
         
         if len(result.data) < 10:
             return {"anomalies": [], "message": "Not enough transaction history for anomaly detection."}
         
         # Calculate statistics
-        amounts = [t["amount"] for t in result.data]
-        avg_amount = sum(amounts) / len(amounts)
-        max_amount = max(amounts)
-        
-        # Category frequency
-        category_counts = {}
-        for t in result.data:
-            cat = t["category"]
-            category_counts[cat] = category_counts.get(cat, 0) + 1
+        expenses = TransactionFrame.from_rows(result.data)
+        avg_amount = expenses.mean()
+        category_counts = expenses.category_counts()
         
-        # Find potential anomalies (amounts > 2x average)
-        potential_anomalies = [t for t in result.data if t["amount"] > avg_amount * 2]
+        # Find potential anomalies (robust z-score against each category's median)
+        potential_anomalies = expenses.anomalies(threshold=ANOMALY_Z_THRESHOLD)[:5]
         
         if not potential_anomalies:
             return {"anomalies": [], "message": "No unusual spending detected. Your expenses are consistent!"}
@@ -853,24 +2497,24 @@ async def ai_detect_expense_anomalies(current_user: User = Depends(get_current_u
 Average transaction: ${avg_amount:.2f}
 Typical categories and frequencies: {', '.join([f"{cat} ({count}x)" for cat, count in category_counts.items()])}
 
-Unusual transactions (>2x average):
-{chr(10).join([f"- {t['date']}: ${t['amount']:.2f} in {t['category']}" + (f" ({t.get('description', 'no description')})" if t.get('description') else "") for t in potential_anomalies[:5]])}
+Unusual transactions (far above the typical amount for their category):
+{chr(10).join([f"- {a['row']['date']}: ${a['row']['amount']:.2f} in {a['row']['category']}, typically ${a['reference_median']:.2f} (z={a['z_score']})" + (f" ({a['row']['description']})" if a['row'].get('description') else "") for a in potential_anomalies])}
 
 Are these legitimate unusual expenses or potential concerns? Provide brief analysis."""
 
-        response = gemini_model.generate_content(prompt)
-        analysis = response.text
+        analysis = await generate_ai_text(prompt)
         
         return {
             "anomalies": [
                 {
-                    "date": t["date"],
-                    "amount": t["amount"],
-                    "category": t["category"],
-                    "description": t.get("description", ""),
-                    "deviation": round((t["amount"] / avg_amount - 1) * 100, 1)
+                    "date": a["row"]["date"],
+                    "amount": a["row"]["amount"],
+                    "category": a["row"]["category"],
+                    "description": a["row"].get("description", ""),
+                    "deviation": round((a["row"]["amount"] / a["reference_median"] - 1) * 100, 1) if a["reference_median"] else None,
+                    "z_score": a["z_score"]
                 }
-                for t in potential_anomalies[:5]
+                for a in potential_anomalies
             ],
             "analysis": analysis,
             "average_expense": round(avg_amount, 2)
@@ -879,12 +2523,176 @@ Are these legitimate unusual expenses or potential concerns? Provide brief analy
         logger.error(f"AI anomaly detection failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to detect anomalies: {str(e)}")
 
+# ============ AI JOB QUEUE ============
+
+class AIJobQueue:
+    """
+    In-process queue that runs AI analyses on a bounded pool of worker tasks.
+    Identical submissions (same user, kind and parameters) share one job while it is
+    queued or running, so repeated clicks never queue duplicate LLM calls. Once it has
+    finished, the next submission starts a fresh job over the user's current data; the
+    finished job stays readable by id until its TTL runs out.
+    """
+
+    def __init__(self, workers: int, max_queued: int, timeout: float, ttl: float):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.ttl = ttl
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._dedupe: Dict[tuple, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_workers(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    def _expire(self):
+        now = time.time()
+        for job_id in [job_id for job_id, entry in self._jobs.items() if entry['expires_at'] <= now]:
+            entry = self._jobs.pop(job_id)
+            if self._dedupe.get(entry['dedupe_key']) == job_id:
+                del self._dedupe[entry['dedupe_key']]
+
+    def submit(self, user_id: str, kind: str, params: Dict[str, Any], runner) -> AIJob:
+        """Queue runner() for a user, or return the unfinished job already queued for the same input."""
+        self._ensure_workers()
+        self._expire()
+
+        fingerprint = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        dedupe_key = (user_id, kind, fingerprint)
+        existing_id = self._dedupe.get(dedupe_key)
+        if existing_id and self._jobs[existing_id]['job'].status in ('queued', 'running'):
+            return self._jobs[existing_id]['job']
+
+        job = AIJob(id=str(uuid.uuid4()), kind=kind, status='queued', created_at=datetime.now(timezone.utc))
+        try:
+            self._queue.put_nowait((job.id, runner))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="AI job queue is full, try again shortly")
+
+        self._jobs[job.id] = {
+            'job': job,
+            'user_id': user_id,
+            'dedupe_key': dedupe_key,
+            'expires_at': time.time() + self.ttl
+        }
+        self._dedupe[dedupe_key] = job.id
+        return job
+
+    def get(self, job_id: str, user_id: str) -> Optional[AIJob]:
+        self._expire()
+        entry = self._jobs.get(job_id)
+        if entry is None or entry['user_id'] != user_id:
+            return None
+        return entry['job']
+
+    async def _work(self):
+        while True:
+            job_id, runner = await self._queue.get()
+            entry = self._jobs.get(job_id)
+            try:
+                if entry is None:
+                    continue
+                job = entry['job']
+                job.status = 'running'
+                try:
+                    job.result = jsonable_encoder(await asyncio.wait_for(runner(), timeout=self.timeout))
+                    job.status = 'succeeded'
+                except HTTPException as e:
+                    job.status, job.error = 'failed', str(e.detail)
+                except asyncio.TimeoutError:
+                    job.status, job.error = 'failed', f"Timed out after {self.timeout:.0f}s"
+                except Exception as e:
+                    logger.error(f"AI job {job_id} ({job.kind}) failed: {str(e)}")
+                    job.status, job.error = 'failed', str(e)
+                job.finished_at = datetime.now(timezone.utc)
+                # Results stay available for a full TTL after they are ready
+                entry['expires_at'] = time.time() + self.ttl
+            finally:
+                self._queue.task_done()
+
+ai_jobs = AIJobQueue(
+    workers=AI_JOB_WORKERS,
+    max_queued=AI_JOB_QUEUE_SIZE,
+    timeout=AI_JOB_TIMEOUT_SECONDS,
+    ttl=AI_JOB_TTL_SECONDS
+)
+
+# Parameter model (if any) and runner for each job kind; runners call the regular endpoint functions
+AI_JOB_HANDLERS = {
+    "insights": (AIInsightRequest, lambda params, user: generate_ai_insight(params, current_user=user)),
+    "categorize-transaction": (CategorizeItem, lambda params, user: ai_categorize_transaction(params.description, params.amount, current_user=user)),
+    "categorize-batch": (CategorizeBatchRequest, lambda params, user: ai_categorize_batch(params, current_user=user)),
+    "predict-spending": (PredictSpendingParams, lambda params, user: ai_predict_spending(params.mode, current_user=user)),
+    "financial-goals": (None, lambda params, user: ai_suggest_financial_goals(current_user=user)),
+    "smart-budget-recommendation": (BudgetRecommendationParams, lambda params, user: ai_recommend_budget(params.category, current_user=user)),
+    "expense-anomaly-detection": (None, lambda params, user: ai_detect_expense_anomalies(current_user=user))
+}
+
+@api_router.post("/ai/jobs", response_model=AIJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_ai_job(request: AIJobRequest, current_user: User = Depends(get_current_user)):
+    """Queue an AI analysis and return its job id immediately; poll GET /ai/jobs/{id} for the result"""
+    params_model, run = AI_JOB_HANDLERS[request.kind]
+    try:
+        params = params_model(**request.params) if params_model else None
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=jsonable_encoder(e.errors(include_url=False, include_context=False)))
+    
+    return ai_jobs.submit(current_user.id, request.kind, request.params, lambda: run(params, current_user))
+
+@api_router.get("/ai/jobs/{job_id}", response_model=AIJob)
+async def get_ai_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = ai_jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 # ============ HEALTH CHECK ============
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "SmartLedger API", "version": "2.0.0"}
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    200 once the startup warm-up has built both clients and reached Supabase, 503 before.
+    With WARMUP_ON_STARTUP off it reports whichever clients requests have built so far.
+    """
+    def state(name, client):
+        if warmup_status[name] == "not started":
+            return "warm" if client is not None else "cold"
+        return warmup_status[name]
+
+    upstreams = {"supabase": state("supabase", _supabase_client), "gemini": state("gemini", _gemini_model)}
+    ready = all(state == "warm" for state in upstreams.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"ready": ready, "upstreams": upstreams}
+    )
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {
+        "auth_tokens": token_cache.stats(),
+        "user_profiles": user_cache.stats(),
+        "user_categories": user_categories_cache.stats(),
+        "analytics": analytics_cache.stats(),
+        "ai_categories": category_cache.stats()
+    }
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return Response(generate_latest(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
 # Include the router
 app.include_router(api_router)
 
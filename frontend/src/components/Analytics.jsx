@@ -30,20 +30,62 @@ import {
 } from 'lucide-react';
 
 const Analytics = () => {
-    const [transactions, setTransactions] = useState([]);
+    const [summary, setSummary] = useState(null);
+    const [trends, setTrends] = useState(null);
+    const [daily, setDaily] = useState(null);
     const [loading, setLoading] = useState(true);
     const [timeFilter, setTimeFilter] = useState('thisMonth');
 
     useEffect(() => {
-        fetchTransactions();
-    }, []);
+        fetchAnalytics();
+    }, [timeFilter]);
+
+    const toISODate = (date) => {
+        return `${date.getFullYear()}-${(date.getMonth() + 1).toString().padStart(2, '0')}-${date.getDate().toString().padStart(2, '0')}`;
+    };
+
+    // First day of the selected period, or null for all time
+    const getFilterStart = () => {
+        const now = new Date();
+        switch (timeFilter) {
+            case 'thisMonth':
+                return new Date(now.getFullYear(), now.getMonth(), 1);
+            case 'thisYear':
+                return new Date(now.getFullYear(), 0, 1);
+            case 'lastSixMonths':
+                const sixMonthsAgo = new Date();
+                sixMonthsAgo.setMonth(sixMonthsAgo.getMonth() - 6);
+                return sixMonthsAgo;
+            case 'all':
+            default:
+                return null;
+        }
+    };
+
+    const fetchAnalytics = async () => {
+        const now = new Date();
+        const filterStart = getFilterStart();
+        const thirtyDaysAgo = new Date(now.getFullYear(), now.getMonth(), now.getDate() - 29);
+        const dailyStart = filterStart && filterStart > thirtyDaysAgo ? filterStart : thirtyDaysAgo;
 
-    const fetchTransactions = async () => {
         try {
-            const response = await axios.get('/api/transactions');
-            setTransactions(response.data);
+            // Pre-bucketed series: the payload grows with months and days shown, not with transactions
+            const [summaryResponse, trendsResponse, dailyResponse] = await Promise.all([
+                axios.get('/api/analytics', {
+                    params: { granularity: 'month', date_from: filterStart ? toISODate(filterStart) : undefined }
+                }),
+                axios.get('/api/analytics', {
+                    params: { granularity: 'month', date_from: toISODate(new Date(now.getFullYear(), now.getMonth() - 5, 1)) }
+                }),
+                axios.get('/api/analytics', {
+                    params: { granularity: 'day', date_from: toISODate(dailyStart) }
+                })
+            ]);
+            setSummary(summaryResponse.data);
+            setTrends(trendsResponse.data);
+            setDaily(dailyResponse.data);
         } catch (error) {
-            console.error('Error fetching transactions:', error);
+            console.error('Error fetching analytics:', error);
             toast.error('Failed to load analytics data');
         } finally {
             setLoading(false);
@@ -57,121 +99,41 @@ const Analytics = () => {
         }).format(amount);
     };
 
-    const getFilteredTransactions = () => {
-        const now = new Date();
-        const currentYear = now.getFullYear();
-        const currentMonth = now.getMonth();
-
-        return transactions.filter(transaction => {
-            const transactionDate = new Date(transaction.date);
-            
-            switch (timeFilter) {
-                case 'thisMonth':
-                    return (
-                        transactionDate.getMonth() === currentMonth &&
-                        transactionDate.getFullYear() === currentYear
-                    );
-                case 'thisYear':
-                    return transactionDate.getFullYear() === currentYear;
-                case 'lastSixMonths':
-                    const sixMonthsAgo = new Date();
-                    sixMonthsAgo.setMonth(sixMonthsAgo.getMonth() - 6);
-                    return transactionDate >= sixMonthsAgo;
-                case 'all':
-                default:
-                    return true;
-            }
-        });
+    // Bucket starts are YYYY-MM-DD; parse them as local dates so labels do not shift a day
+    const parsePeriod = (period) => {
+        const [year, month, day] = period.split('-').map(Number);
+        return new Date(year, month - 1, day);
     };
 
     const getIncomeVsExpenses = () => {
-        const filteredTransactions = getFilteredTransactions();
-        const totalIncome = filteredTransactions
-            .filter(t => t.type === 'income')
-            .reduce((sum, t) => sum + t.amount, 0);
-        const totalExpenses = filteredTransactions
-            .filter(t => t.type === 'expense')
-            .reduce((sum, t) => sum + t.amount, 0);
-        
-        return { totalIncome, totalExpenses, netIncome: totalIncome - totalExpenses };
+        const totals = summary?.totals || { income: 0, expense: 0, net: 0 };
+        return { totalIncome: totals.income, totalExpenses: totals.expense, netIncome: totals.net };
     };
 
     const getCategoryData = () => {
-        const filteredTransactions = getFilteredTransactions();
-        const categoryTotals = {};
-        
-        filteredTransactions
-            .filter(t => t.type === 'expense')
-            .forEach(transaction => {
-                categoryTotals[transaction.category] = 
-                    (categoryTotals[transaction.category] || 0) + transaction.amount;
-            });
-
-        return Object.entries(categoryTotals)
-            .map(([name, value], index) => ({
-                name,
-                value: parseFloat(value.toFixed(2)),
-                color: `hsl(${(index * 45) % 360}, 70%, 50%)`
-            }))
-            .sort((a, b) => b.value - a.value);
+        return (summary?.categories || []).map(({ category, amount }, index) => ({
+            name: category,
+            value: amount,
+            color: `hsl(${(index * 45) % 360}, 70%, 50%)`
+        }));
     };
 
     const getMonthlyTrends = () => {
-        const monthlyData = {};
-        const sixMonthsAgo = new Date();
-        sixMonthsAgo.setMonth(sixMonthsAgo.getMonth() - 6);
-
-        // Initialize months
-        for (let i = 0; i < 6; i++) {
-            const date = new Date();
-            date.setMonth(date.getMonth() - i);
-            const monthKey = `${date.getFullYear()}-${(date.getMonth() + 1).toString().padStart(2, '0')}`;
-            monthlyData[monthKey] = { income: 0, expenses: 0, month: date.toLocaleDateString('en-US', { month: 'short' }) };
-        }
-
-        transactions
-            .filter(t => new Date(t.date) >= sixMonthsAgo)
-            .forEach(transaction => {
-                const date = new Date(transaction.date);
-                const monthKey = `${date.getFullYear()}-${(date.getMonth() + 1).toString().padStart(2, '0')}`;
-                
-                if (monthlyData[monthKey]) {
-                    if (transaction.type === 'income') {
-                        monthlyData[monthKey].income += transaction.amount;
-                    } else {
-                        monthlyData[monthKey].expenses += transaction.amount;
-                    }
-                }
-            });
-
-        return Object.values(monthlyData)
-            .reverse()
-            .map(data => ({
-                ...data,
-                income: parseFloat(data.income.toFixed(2)),
-                expenses: parseFloat(data.expenses.toFixed(2)),
-                net: parseFloat((data.income - data.expenses).toFixed(2))
-            }));
+        return (trends?.series || []).map(bucket => ({
+            month: parsePeriod(bucket.period).toLocaleDateString('en-US', { month: 'short' }),
+            income: bucket.income,
+            expenses: bucket.expense,
+            net: bucket.net
+        }));
     };
 
     const getDailySpending = () => {
-        const filteredTransactions = getFilteredTransactions();
-        const dailyData = {};
-
-        filteredTransactions
-            .filter(t => t.type === 'expense')
-            .forEach(transaction => {
-                const date = transaction.date;
-                dailyData[date] = (dailyData[date] || 0) + transaction.amount;
-            });
-
-        return Object.entries(dailyData)
-            .map(([date, amount]) => ({
-                date: new Date(date).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
-                amount: parseFloat(amount.toFixed(2))
-            }))
-            .sort((a, b) => new Date(a.date) - new Date(b.date))
-            .slice(-30); // Last 30 days
+        return (daily?.series || [])
+            .filter(bucket => bucket.expense > 0)
+            .map(bucket => ({
+                date: parsePeriod(bucket.period).toLocaleDateString('en-US', { month: 'short', day: 'numeric' }),
+                amount: bucket.expense
+            }));
     };
 
     const { totalIncome, totalExpenses, netIncome } = getIncomeVsExpenses();
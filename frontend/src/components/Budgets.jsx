@@ -28,7 +28,6 @@ import {
 const Budgets = () => {
     const [budgets, setBudgets] = useState([]);
     const [categories, setCategories] = useState([]);
-    const [transactions, setTransactions] = useState([]);
     const [loading, setLoading] = useState(true);
     const [isDialogOpen, setIsDialogOpen] = useState(false);
     const [editingBudget, setEditingBudget] = useState(null);
@@ -47,12 +46,11 @@ const Budgets = () => {
     useEffect(() => {
         fetchBudgets();
         fetchCategories();
-        fetchTransactions();
     }, []);
 
     const fetchBudgets = async () => {
         try {
-            const response = await axios.get('/api/budgets', {
+            const response = await axios.get('/api/budgets/progress', {
                 params: {
                     month: currentMonth,
                     year: currentYear
@@ -69,22 +67,13 @@ const Budgets = () => {
 
     const fetchCategories = async () => {
         try {
-            const response = await axios.get('/api/categories');
+            const response = await axios.get('/api/categories?order=most_used');
             setCategories(response.data.categories);
         } catch (error) {
             console.error('Error fetching categories:', error);
         }
     };
 
-    const fetchTransactions = async () => {
-        try {
-            const response = await axios.get('/api/transactions');
-            setTransactions(response.data);
-        } catch (error) {
-            console.error('Error fetching transactions:', error);
-        }
-    };
-
     const handleFormChange = (field, value) => {
         setBudgetForm(prev => ({
             ...prev,
@@ -133,7 +122,7 @@ const Budgets = () => {
         setEditingBudget(budget);
         setBudgetForm({
             category: budget.category,
-            limit: budget.limit.toString(),
+            limit: budget.limit_amount.toString(),
             month: budget.month,
             year: budget.year
         });
@@ -155,22 +144,6 @@ const Budgets = () => {
         }
     };
 
-    const calculateSpent = (category) => {
-        const currentMonthStart = `${currentYear}-${currentMonth.toString().padStart(2, '0')}-01`;
-        const nextMonth = currentMonth === 12 ? 1 : currentMonth + 1;
-        const nextYear = currentMonth === 12 ? currentYear + 1 : currentYear;
-        const currentMonthEnd = `${nextYear}-${nextMonth.toString().padStart(2, '0')}-01`;
-
-        return transactions
-            .filter(t => 
-                t.type === 'expense' && 
-                t.category === category &&
-                t.date >= currentMonthStart &&
-                t.date < currentMonthEnd
-            )
-            .reduce((sum, t) => sum + t.amount, 0);
-    };
-
     const formatCurrency = (amount) => {
         return new Intl.NumberFormat('en-US', {
             style: 'currency',
@@ -185,8 +158,7 @@ const Budgets = () => {
         return 'bg-green-500';
     };
 
-    const getBudgetStatus = (spent, limit) => {
-        const percentage = (spent / limit) * 100;
+    const getBudgetStatus = (percentage) => {
         if (percentage >= 100) return { icon: AlertTriangle, color: 'text-red-500', status: 'Over Budget' };
         if (percentage >= 80) return { icon: AlertTriangle, color: 'text-orange-500', status: 'Near Limit' };
         return { icon: CheckCircle, color: 'text-green-500', status: 'On Track' };
@@ -334,10 +306,8 @@ const Budgets = () => {
             {budgets.length > 0 ? (
                 <div className="grid gap-6 md:grid-cols-2 lg:grid-cols-3">
                     {budgets.map((budget) => {
-                        const spent = calculateSpent(budget.category);
-                        const percentage = Math.min((spent / budget.limit) * 100, 100);
-                        const remaining = Math.max(budget.limit - spent, 0);
-                        const status = getBudgetStatus(spent, budget.limit);
+                        const percentage = Math.min(budget.percent_used, 100);
+                        const status = getBudgetStatus(budget.percent_used);
                         const StatusIcon = status.icon;
 
                         return (
@@ -389,18 +359,26 @@ const Budgets = () => {
                                     <div className="space-y-2">
                                         <div className="flex justify-between text-sm">
                                             <span className="text-muted-foreground">Spent:</span>
-                                            <span className="font-medium">{formatCurrency(spent)}</span>
+                                            <span className="font-medium">{formatCurrency(budget.spent)}</span>
                                         </div>
                                         <div className="flex justify-between text-sm">
                                             <span className="text-muted-foreground">Limit:</span>
-                                            <span className="font-medium">{formatCurrency(budget.limit)}</span>
+                                            <span className="font-medium">{formatCurrency(budget.limit_amount)}</span>
                                         </div>
                                         <div className="flex justify-between text-sm border-t pt-2">
                                             <span className="text-muted-foreground">Remaining:</span>
-                                            <span className={`font-medium ${remaining > 0 ? 'text-green-600' : 'text-red-600'}`}>
-                                                {formatCurrency(remaining)}
+                                            <span className={`font-medium ${budget.remaining > 0 ? 'text-green-600' : 'text-red-600'}`}>
+                                                {formatCurrency(budget.remaining)}
                                             </span>
                                         </div>
+                                        {budget.projected_overspend > 0 && (
+                                            <div className="flex justify-between text-sm">
+                                                <span className="text-muted-foreground">Projected overspend:</span>
+                                                <span className="font-medium text-orange-600">
+                                                    {formatCurrency(budget.projected_overspend)}
+                                                </span>
+                                            </div>
+                                        )}
                                     </div>
                                 </CardContent>
                             </Card>
@@ -433,7 +411,7 @@ const Budgets = () => {
                         </CardHeader>
                         <CardContent>
                             <div className="text-2xl font-bold">
-                                {formatCurrency(budgets.reduce((sum, budget) => sum + budget.limit, 0))}
+                                {formatCurrency(budgets.reduce((sum, budget) => sum + budget.limit_amount, 0))}
                             </div>
                         </CardContent>
                     </Card>
@@ -445,7 +423,7 @@ const Budgets = () => {
                         </CardHeader>
                         <CardContent>
                             <div className="text-2xl font-bold">
-                                {formatCurrency(budgets.reduce((sum, budget) => sum + calculateSpent(budget.category), 0))}
+                                {formatCurrency(budgets.reduce((sum, budget) => sum + budget.spent, 0))}
                             </div>
                         </CardContent>
                     </Card>
@@ -457,7 +435,7 @@ const Budgets = () => {
                         </CardHeader>
                         <CardContent>
                             <div className="text-2xl font-bold">
-                                {budgets.filter(budget => calculateSpent(budget.category) < budget.limit * 0.8).length}
+                                {budgets.filter(budget => budget.percent_used < 80).length}
                                 <span className="text-sm font-normal text-muted-foreground ml-1">
                                     of {budgets.length}
                                 </span>
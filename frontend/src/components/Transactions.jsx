@@ -29,8 +29,13 @@ import {
     DropdownMenuTrigger,
 } from './ui/dropdown-menu';
 
+// Transactions per request; later pages load on demand
+const PAGE_SIZE = 50;
+
 const Transactions = () => {
     const [transactions, setTransactions] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [categories, setCategories] = useState([]);
     const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState('');
@@ -48,18 +53,28 @@ const Transactions = () => {
     });
 
     useEffect(() => {
-        fetchTransactions();
         fetchCategories();
     }, []);
 
     useEffect(() => {
-        fetchFilteredTransactions();
+        fetchTransactions();
     }, [searchTerm, selectedCategory, selectedType]);
 
+    const transactionParams = (cursor) => {
+        const params = { limit: PAGE_SIZE };
+        if (searchTerm) params.search = searchTerm;
+        if (selectedCategory) params.category = selectedCategory;
+        if (selectedType) params.type = selectedType;
+        if (cursor) params.cursor = cursor;
+        return params;
+    };
+
+    // Newest first, one page at a time; "Load more" follows next_cursor
     const fetchTransactions = async () => {
         try {
-            const response = await axios.get('/api/transactions');
-            setTransactions(response.data);
+            const response = await axios.get('/api/transactions', { params: transactionParams() });
+            setTransactions(response.data.items);
+            setNextCursor(response.data.next_cursor);
         } catch (error) {
             console.error('Error fetching transactions:', error);
             toast.error('Failed to load transactions');
@@ -68,23 +83,24 @@ const Transactions = () => {
         }
     };
 
-    const fetchFilteredTransactions = async () => {
+    const loadMoreTransactions = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
         try {
-            const params = new URLSearchParams();
-            if (searchTerm) params.append('search', searchTerm);
-            if (selectedCategory) params.append('category', selectedCategory);
-            if (selectedType) params.append('type', selectedType);
-
-            const response = await axios.get(`/api/transactions?${params.toString()}`);
-            setTransactions(response.data);
+            const response = await axios.get('/api/transactions', { params: transactionParams(nextCursor) });
+            setTransactions(prev => [...prev, ...response.data.items]);
+            setNextCursor(response.data.next_cursor);
         } catch (error) {
-            console.error('Error fetching filtered transactions:', error);
+            console.error('Error fetching more transactions:', error);
+            toast.error('Failed to load more transactions');
+        } finally {
+            setLoadingMore(false);
         }
     };
 
     const fetchCategories = async () => {
         try {
-            const response = await axios.get('/api/categories');
+            const response = await axios.get('/api/categories?order=most_used');
             setCategories(response.data.categories);
         } catch (error) {
             console.error('Error fetching categories:', error);
@@ -434,7 +450,7 @@ const Transactions = () => {
                 <CardHeader>
                     <CardTitle>Transaction History</CardTitle>
                     <CardDescription>
-                        {transactions.length} transaction{transactions.length !== 1 ? 's' : ''}
+                        {transactions.length}{nextCursor ? '+' : ''} transaction{transactions.length !== 1 ? 's' : ''}
                     </CardDescription>
                 </CardHeader>
                 <CardContent>
@@ -507,6 +523,13 @@ const Transactions = () => {
                                     </div>
                                 </div>
                             ))}
+                            {nextCursor && (
+                                <div className="flex justify-center pt-2">
+                                    <Button variant="outline" onClick={loadMoreTransactions} disabled={loadingMore}>
+                                        {loadingMore ? 'Loading...' : 'Load more'}
+                                    </Button>
+                                </div>
+                            )}
                         </div>
                     ) : (
                         <div className="text-center py-8 text-muted-foreground">
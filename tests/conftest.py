@@ -0,0 +1,49 @@
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+# The server reads its configuration at import time; keep the tests offline
+os.environ.setdefault('WARMUP_ON_STARTUP', 'false')
+
+import server_supabase as server  # noqa: E402
+from benchmarks.fakes import FakeGeminiModel, FakeSupabase  # noqa: E402
+
+
+@pytest.fixture
+def user() -> server.User:
+    return server.User(id='u1', email='user@example.com', full_name='User', created_at=datetime.now(timezone.utc))
+
+
+@pytest.fixture
+def db(monkeypatch, user) -> FakeSupabase:
+    """In-process Supabase holding the test user's profile, installed as the server's client."""
+    db = FakeSupabase()
+    db.load('users', [{**user.model_dump(), 'created_at': user.created_at.isoformat()}])
+    monkeypatch.setattr(server, '_supabase_client', db)
+    # Per-process caches would otherwise carry state between tests
+    for cache in (server.token_cache, server.user_cache, server.user_categories_cache, server.analytics_cache):
+        cache.clear()
+    return db
+
+
+@pytest.fixture
+def model(monkeypatch) -> FakeGeminiModel:
+    model = FakeGeminiModel()
+    monkeypatch.setattr(server, '_gemini_model', model)
+    return model
+
+
+@pytest.fixture
+def client(monkeypatch, db, user) -> TestClient:
+    """The API over the fake database, signed in as the test user; startup hooks do not run."""
+    monkeypatch.setattr(server, 'SUPABASE_JWT_SECRET', db.auth.jwt_secret)
+    client = TestClient(server.app)
+    client.headers['Authorization'] = f"Bearer {db.auth.issue_token(user.id, user.email, user.full_name)}"
+    return client
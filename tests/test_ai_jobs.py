@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from server_supabase import AIJobQueue
+
+
+def make_queue(**overrides) -> AIJobQueue:
+    options = {'workers': 1, 'max_queued': 10, 'timeout': 5, 'ttl': 60}
+    return AIJobQueue(**{**options, **overrides})
+
+
+async def wait_until_finished(queue: AIJobQueue, job_id: str, user_id: str = 'u1'):
+    for _ in range(200):
+        job = queue.get(job_id, user_id)
+        if job is None or job.status in ('succeeded', 'failed'):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_submit_runs_job_and_stores_result():
+    async def scenario():
+        queue = make_queue()
+
+        async def runner():
+            return {'answer': 42}
+
+        job = queue.submit('u1', 'insights', {'insight_type': 'general'}, runner)
+        assert job.status == 'queued'
+        finished = await wait_until_finished(queue, job.id)
+        assert finished.status == 'succeeded'
+        assert finished.result == {'answer': 42}
+        assert finished.finished_at is not None
+
+    asyncio.run(scenario())
+
+
+def test_identical_submissions_share_an_unfinished_job():
+    async def scenario():
+        queue = make_queue()
+        release = asyncio.Event()
+
+        async def runner():
+            await release.wait()
+            return 'done'
+
+        first = queue.submit('u1', 'insights', {'a': 1, 'b': 2}, runner)
+        await asyncio.sleep(0.01)
+        # Key order does not matter
+        second = queue.submit('u1', 'insights', {'b': 2, 'a': 1}, runner)
+        assert second.id == first.id
+
+        # Different user, kind or parameters get their own job
+        others = [
+            queue.submit('u2', 'insights', {'a': 1, 'b': 2}, runner),
+            queue.submit('u1', 'financial-goals', {'a': 1, 'b': 2}, runner),
+            queue.submit('u1', 'insights', {'a': 2, 'b': 2}, runner)
+        ]
+        assert len({first.id, *(job.id for job in others)}) == 4
+
+        release.set()
+        for job, user_id in zip([first, *others], ['u1', 'u2', 'u1', 'u1']):
+            await wait_until_finished(queue, job.id, user_id)
+
+    asyncio.run(scenario())
+
+
+def test_resubmitting_after_success_starts_a_new_job():
+    async def scenario():
+        queue = make_queue()
+        results = iter(['stale', 'fresh'])
+
+        async def runner():
+            return next(results)
+
+        first = queue.submit('u1', 'smart-budget-recommendation', {'category': 'Food'}, runner)
+        assert (await wait_until_finished(queue, first.id)).result == 'stale'
+
+        second = queue.submit('u1', 'smart-budget-recommendation', {'category': 'Food'}, runner)
+        assert second.id != first.id
+        assert (await wait_until_finished(queue, second.id)).result == 'fresh'
+        # The earlier result stays readable by id
+        assert queue.get(first.id, 'u1').result == 'stale'
+
+    asyncio.run(scenario())
+
+
+def test_failures_are_recorded_and_not_reused():
+    async def scenario():
+        queue = make_queue(timeout=0.05)
+
+        async def raises_http():
+            raise HTTPException(status_code=400, detail="No history")
+
+        async def raises():
+            raise RuntimeError("model unavailable")
+
+        async def hangs():
+            await asyncio.sleep(10)
+
+        http_job = queue.submit('u1', 'insights', {}, raises_http)
+        error_job = queue.submit('u1', 'financial-goals', {}, raises)
+        slow_job = queue.submit('u1', 'expense-anomaly-detection', {}, hangs)
+
+        assert (await wait_until_finished(queue, http_job.id)).error == "No history"
+        assert (await wait_until_finished(queue, error_job.id)).error == "model unavailable"
+        timed_out = await wait_until_finished(queue, slow_job.id)
+        assert timed_out.status == 'failed'
+        assert timed_out.error.startswith("Timed out")
+
+        assert queue.submit('u1', 'insights', {}, raises_http).id != http_job.id
+
+    asyncio.run(scenario())
+
+
+def test_jobs_are_private_and_expire_after_ttl():
+    async def scenario():
+        queue = make_queue(ttl=0.05)
+
+        async def runner():
+            return 'done'
+
+        job = queue.submit('u1', 'insights', {}, runner)
+        await wait_until_finished(queue, job.id)
+        assert queue.get(job.id, 'u2') is None
+        assert queue.get(job.id, 'u1') is not None
+
+        await asyncio.sleep(0.1)
+        assert queue.get(job.id, 'u1') is None
+        assert queue._dedupe == {}
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_submissions():
+    async def scenario():
+        queue = make_queue(max_queued=1)
+        release = asyncio.Event()
+
+        async def runner():
+            await release.wait()
+
+        queue.submit('u1', 'insights', {'n': 1}, runner)
+        await asyncio.sleep(0.01)  # the single worker takes the first job
+        queued = queue.submit('u1', 'insights', {'n': 2}, runner)
+        with pytest.raises(HTTPException) as raised:
+            queue.submit('u1', 'insights', {'n': 3}, runner)
+        assert raised.value.status_code == 503
+
+        release.set()
+        await wait_until_finished(queue, queued.id)
+
+    asyncio.run(scenario())
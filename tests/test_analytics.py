@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+
+from analytics import (
+    TransactionFrame, exponential_smoothing, forecast_rollups, rolling_median, rollup_matrix, trend_direction,
+    trend_slope
+)
+
+
+def expense(amount: float, category: str = 'Food', day: str = '2024-01-15') -> dict:
+    return {'amount': amount, 'type': 'expense', 'category': category, 'date': day}
+
+
+def test_frame_aggregates_by_category():
+    frame = TransactionFrame.from_rows([
+        expense(10, 'Food'), expense(30, 'Rent'), expense(20, 'Food')
+    ])
+    assert len(frame) == 3
+    assert frame.mean() == pytest.approx(20)
+    assert frame.category_totals() == {'Food': 30.0, 'Rent': 30.0}
+    assert frame.category_counts() == {'Food': 2, 'Rent': 1}
+
+
+def test_empty_frame():
+    frame = TransactionFrame.from_rows([])
+    assert frame.mean() == 0.0
+    assert frame.monthly_totals() == ([], pytest.approx(np.zeros(0)))
+    assert frame.anomalies() == []
+
+
+def test_monthly_totals_fill_gaps_between_months_with_spending():
+    frame = TransactionFrame.from_rows([
+        expense(10, day='2024-01-05'), expense(5, day='2024-01-20'), expense(40, day='2024-03-02')
+    ])
+    months, totals = frame.monthly_totals()
+    assert months == ['2024-01', '2024-02', '2024-03']
+    assert list(totals) == [15.0, 0.0, 40.0]
+
+    months, totals = frame.monthly_totals(fill_gaps=False)
+    assert months == ['2024-01', '2024-03']
+    assert list(totals) == [15.0, 40.0]
+
+
+def test_robust_z_scores_against_category_median():
+    amounts = [10, 11, 12, 13, 14]
+    frame = TransactionFrame.from_rows([expense(a) for a in amounts])
+    z_scores, medians = frame.robust_z_scores()
+    # Median 12, MAD 1: z = 0.6745 * (x - 12)
+    assert list(medians) == [12.0] * 5
+    assert z_scores == pytest.approx([-1.349, -0.6745, 0.0, 0.6745, 1.349])
+
+
+def test_zero_mad_falls_back_to_mean_absolute_deviation():
+    frame = TransactionFrame.from_rows([expense(a) for a in [10, 10, 10, 10, 20]])
+    z_scores, _ = frame.robust_z_scores()
+    # Median 10, MAD 0; mean absolute deviation 2 scaled by 0.7979
+    assert z_scores[-1] == pytest.approx(10 / (2 / 0.7979))
+    assert z_scores[0] == 0.0
+
+
+def test_anomalies_flag_outliers_within_their_category():
+    rows = [expense(a, 'Food') for a in [10, 12, 11, 13, 12, 95]]
+    # Rent is large but typical for Rent, so it is not flagged
+    rows += [expense(a, 'Rent') for a in [1000, 1010, 990, 1005, 995]]
+    anomalies = TransactionFrame.from_rows(rows).anomalies(threshold=3.5)
+    assert [a['row']['amount'] for a in anomalies] == [95]
+    assert anomalies[0]['reference_median'] == 12.0
+
+
+def test_small_categories_are_scored_against_all_rows():
+    rows = [expense(a, 'Food') for a in [10, 12, 11, 13, 12, 11]] + [expense(14, 'Gifts')]
+    z_scores, medians = TransactionFrame.from_rows(rows).robust_z_scores(min_group_size=5)
+    assert medians[-1] == 12.0
+    assert z_scores[-1] == pytest.approx(0.6745 * 2)
+
+
+def test_trend_slope_and_direction():
+    assert trend_slope([100, 110, 120, 130]) == pytest.approx(10)
+    assert trend_slope([50]) == 0.0
+    assert trend_direction([100, 110, 120, 130]) == "increasing"
+    assert trend_direction([130, 120, 110, 100]) == "decreasing"
+    # A slope within 5% of the mean per period is stable
+    assert trend_direction([100, 102, 101, 103]) == "stable"
+    assert trend_direction([]) == "stable"
+    assert trend_direction([0, 0, 0]) == "stable"
+
+
+def test_rolling_median_of_trailing_windows():
+    assert list(rolling_median([1, 9, 2, 8, 3], 3)) == [2.0, 8.0, 3.0]
+    assert list(rolling_median([4, 2], 1)) == [4.0, 2.0]
+    assert len(rolling_median([1, 2], 3)) == 0
+    assert len(rolling_median([1, 2], 0)) == 0
+
+
+def test_smoothed_trend_ignores_a_single_unusual_month():
+    # An annual bill in the latest month
+    spike = [400, 410, 395, 405, 400, 1400]
+    assert trend_direction(spike) == "increasing"
+    assert trend_direction(spike, window=3) == "stable"
+    # A sustained rise survives the smoothing
+    assert trend_direction([100, 120, 140, 160, 180, 200], window=3) == "increasing"
+    # Too short to smooth, so the raw slope is used
+    assert trend_direction([100, 200, 300], window=3) == "increasing"
+
+
+def test_exponential_smoothing_hand_computed():
+    # One one-step error (10) ties every alpha, so the first (0.1) wins:
+    # level 0.1 * 20 + 0.9 * 10 = 11, margin 1.96 * 10
+    assert exponential_smoothing([10, 20]) == {'forecast': 11.0, 'lower': 0.0, 'upper': 30.6, 'alpha': 0.1}
+    # Two months ahead widens the margin by sqrt(1 + alpha^2)
+    assert exponential_smoothing([10, 20], horizon=2)['upper'] == 30.7
+
+
+def test_exponential_smoothing_edge_cases():
+    assert exponential_smoothing([]) == {'forecast': 0.0, 'lower': 0.0, 'upper': 0.0, 'alpha': 0.0}
+    assert exponential_smoothing([50]) == {'forecast': 50.0, 'lower': 50.0, 'upper': 50.0, 'alpha': 0.5}
+    assert exponential_smoothing([100] * 6) == {'forecast': 100.0, 'lower': 100.0, 'upper': 100.0, 'alpha': 0.1}
+
+
+def test_exponential_smoothing_is_deterministic_and_bounded():
+    history = [420, 380, 510, 470, 390, 450, 530, 480, 440, 500, 460, 520]
+    first = exponential_smoothing(history, horizon=2)
+    assert exponential_smoothing(history, horizon=2) == first
+    assert min(history) <= first['forecast'] <= max(history)
+    assert first['lower'] <= first['forecast'] <= first['upper']
+    assert first['upper'] >= exponential_smoothing(history, horizon=1)['upper']
+
+
+def rollup(year: int, month: int, category: str, amount: float) -> dict:
+    return {'year': year, 'month': month, 'category': category, 'amount_sum': amount}
+
+
+def test_rollup_matrix_places_rows_by_month_and_drops_out_of_range():
+    rows = [
+        rollup(2024, 1, 'Food', 100), rollup(2024, 3, 'Food', 50), rollup(2024, 3, 'Food', 25),
+        rollup(2024, 2, 'Rent', 900), rollup(2023, 12, 'Rent', 900), rollup(2024, 5, 'Food', 70)
+    ]
+    categories, matrix = rollup_matrix(rows, np.datetime64('2024-01'), 4)
+    assert categories == ['Food', 'Rent']
+    assert matrix.tolist() == [[100, 0, 75, 0], [0, 900, 0, 0]]
+
+
+def test_forecast_rollups():
+    rows = [rollup(2024, m, 'Food', 100) for m in (3, 4, 5, 6)]
+    rows += [rollup(2024, m, 'Rent', 1000) for m in (5, 6)]
+    forecast = forecast_rollups(rows, np.datetime64('2024-01'), 6)
+
+    # January and February precede the first spending, so they are not history
+    assert forecast['history'] == [100.0, 100.0, 1100.0, 1100.0]
+    # Largest category first; Rent's months before it started count as zeros
+    assert [c['category'] for c in forecast['categories']] == ['Rent', 'Food']
+    assert forecast['categories'][1] == {'category': 'Food', 'forecast': 100.0, 'lower': 100.0, 'upper': 100.0, 'alpha': 0.1}
+    assert forecast['total'] == exponential_smoothing([100, 100, 1100, 1100])
+    assert forecast_rollups(rows, np.datetime64('2024-01'), 6) == forecast
+
+
+def test_forecast_rollups_without_history():
+    assert forecast_rollups([], np.datetime64('2024-01'), 12) == {
+        'total': {'forecast': 0.0, 'lower': 0.0, 'upper': 0.0, 'alpha': 0.0},
+        'categories': [],
+        'history': []
+    }
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import server_supabase as server
+
+
+@pytest.fixture
+def history(db):
+    db.load('transactions', [
+        {'id': f't{n}', 'user_id': 'u1', 'amount': 10, 'type': 'expense', 'category': f'Category {n % 3}',
+         'description': '', 'date': (date.today() - timedelta(days=n)).isoformat(),
+         'created_at': '2024-01-01T00:00:00+00:00'}
+        for n in range(400)
+    ])
+    db.rebuild_derived()
+    return db
+
+
+def analytics(user, granularity: str, date_from=None, version: int = 0):
+    return asyncio.run(server.get_analytics(granularity, date_from, None, version=version, current_user=user))
+
+
+def test_daily_series_default_to_90_days(history, user):
+    result = analytics(user, 'day')
+    assert len(result['series']) == 90
+    assert result['date_from'] == (date.today() - timedelta(days=89)).isoformat()
+    assert result['totals']['expense'] == 900
+
+
+def test_weekly_series_default_to_52_weeks(history, user):
+    assert len(analytics(user, 'week')['series']) == 52
+
+
+def test_monthly_series_default_to_60_months(db, user):
+    # One expense a month for the last ten years
+    this_month = date.today().year * 12 + date.today().month - 1
+    db.load('transactions', [
+        {'id': f't{n}', 'user_id': 'u1', 'amount': 10, 'type': 'expense', 'category': 'Food', 'description': '',
+         'date': date((this_month - n) // 12, (this_month - n) % 12 + 1, 1).isoformat(),
+         'created_at': '2024-01-01T00:00:00+00:00'}
+        for n in range(120)
+    ])
+    db.rebuild_derived()
+    result = analytics(user, 'month')
+    assert len(result['series']) == 60
+    assert result['totals']['expense'] == 600
+
+
+@pytest.mark.parametrize('granularity, date_from', [
+    ('day', date.today() - timedelta(days=119)),
+    ('month', None)
+])
+def test_series_longer_than_max_rows_are_read_in_pages(history, user, monkeypatch, granularity, date_from):
+    # PostgREST returns at most 10 rows per request; the series has a row per bucket and category
+    history.max_rows = 10
+    monkeypatch.setattr(server, 'SUPABASE_MAX_ROWS', 10)
+    expected = 10 * (120 if granularity == 'day' else 400)
+
+    before = history.queries
+    result = analytics(user, granularity, date_from)
+    assert result['totals']['expense'] == expected
+    assert sum(c['amount'] for c in result['categories']) == expected
+    assert history.queries - before > 2
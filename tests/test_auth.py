@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import jwt
+import pytest
+
+import server_supabase as server
+
+SECRET = 'test-jwt-secret'
+
+
+@pytest.fixture(autouse=True)
+def jwt_secret(monkeypatch):
+    monkeypatch.setattr(server, 'SUPABASE_JWT_SECRET', SECRET)
+
+
+def make_token(secret: str = SECRET, **claims) -> str:
+    payload = {
+        'sub': 'user-1',
+        'email': 'user@example.com',
+        'aud': 'authenticated',
+        'exp': int(time.time()) + 3600,
+        **claims
+    }
+    return jwt.encode(payload, secret, algorithm='HS256')
+
+
+def test_valid_hs256_token_returns_claims():
+    claims = server.verify_token_locally(make_token())
+    assert claims['sub'] == 'user-1'
+    assert claims['email'] == 'user@example.com'
+
+
+def test_expired_token_is_rejected():
+    with pytest.raises(jwt.ExpiredSignatureError):
+        server.verify_token_locally(make_token(exp=int(time.time()) - 10))
+
+
+def test_wrong_audience_is_rejected():
+    with pytest.raises(jwt.InvalidAudienceError):
+        server.verify_token_locally(make_token(aud='anon'))
+
+
+def test_bad_signature_is_rejected():
+    with pytest.raises(jwt.InvalidSignatureError):
+        server.verify_token_locally(make_token(secret='some-other-secret'))
+
+
+def test_missing_secret_is_reported_as_unavailable(monkeypatch):
+    monkeypatch.setattr(server, 'SUPABASE_JWT_SECRET', None)
+    with pytest.raises(server.MissingJWTSecret):
+        server.verify_token_locally(make_token())
+
+
+def test_remote_fallback_identity_is_cached(monkeypatch):
+    monkeypatch.setattr(server, 'SUPABASE_JWT_SECRET', None)
+    monkeypatch.setattr(server, 'AUTH_VERIFICATION_MODE', 'local')
+    calls = []
+
+    def verify_remotely(token):
+        calls.append(token)
+        return {'id': 'user-1', 'email': 'user@example.com', 'user_metadata': {}}
+
+    monkeypatch.setattr(server, 'verify_token_remotely', verify_remotely)
+    token = make_token()
+
+    async def resolve_twice():
+        return [await server.resolve_token_identity(token) for _ in range(2)]
+
+    first, second = asyncio.run(resolve_twice())
+    assert first == second == {'id': 'user-1', 'email': 'user@example.com', 'user_metadata': {}}
+    assert len(calls) == 1
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import re
+
+import pytest
+
+import server_supabase as server
+
+
+class StubGemini:
+    """Answers categorization prompts from a description -> category map, recording each prompt."""
+
+    def __init__(self, answers: dict, reply=None):
+        self.answers = answers
+        self.reply = reply
+        self.prompts = []
+
+    async def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        entries = [json.loads(line) for line in re.findall(r'^\{"id": .*\}$', prompt, re.MULTILINE)]
+        if self.reply:
+            return self.reply(entries)
+        return json.dumps([{'id': e['id'], 'category': self.answers[e['description']]}
+                           for e in entries if e['description'] in self.answers])
+
+
+@pytest.fixture
+def gemini(monkeypatch, db):
+    server.category_cache.clear()
+    stub = StubGemini({'Coffee shop': 'Food', 'Uber ride': 'Transport', 'Netflix': 'Entertainment'})
+    monkeypatch.setattr(server, 'generate_ai_text', stub)
+    return stub
+
+
+def categorize(*descriptions: str) -> list:
+    items = [server.CategorizeItem(description=d, amount=10) for d in descriptions]
+    return asyncio.run(server.categorize_transactions(items, 'u1'))
+
+
+def test_prompts_respect_item_and_character_limits(monkeypatch):
+    monkeypatch.setattr(server, 'AI_CATEGORIZE_PROMPT_MAX_ITEMS', 3)
+    monkeypatch.setattr(server, 'AI_CATEGORIZE_PROMPT_MAX_CHARS', 200)
+    entries = [(n, f'item {n}', 1.0) for n in range(7)]
+    assert [[e[0] for e in chunk] for chunk in server.pack_categorization_prompts(entries)] == [[0, 1, 2], [3, 4, 5], [6]]
+
+    # Each line costs its description plus 32 characters of JSON framing
+    long_entries = [(n, 'x' * 60, 1.0) for n in range(4)]
+    assert [len(chunk) for chunk in server.pack_categorization_prompts(long_entries)] == [2, 2]
+    # One oversized entry still gets a prompt of its own
+    assert [len(chunk) for chunk in server.pack_categorization_prompts([(0, 'x' * 500, 1.0)])] == [1]
+    assert server.pack_categorization_prompts([]) == []
+
+
+def test_reply_parsing_keeps_valid_numbered_entries():
+    text = 'Here you go:\n```json\n[{"id": 0, "category": "Food"}, {"id": "2", "category": "Travel"},' \
+           ' {"id": 1, "category": "Snacks"}, {"category": "Rent"}, "Other"]\n```'
+    assert server.parse_categorization_response(text) == {0: 'Food', 2: 'Travel'}
+
+    with pytest.raises(ValueError):
+        server.parse_categorization_response('Food, Travel')
+
+
+def test_results_follow_input_order_and_duplicates_share_one_entry(gemini):
+    results = categorize('Netflix', 'Coffee shop', 'Uber ride', 'Coffee shop')
+    assert [r['category'] for r in results] == ['Entertainment', 'Food', 'Transport', 'Food']
+    assert [r['description'] for r in results] == ['Netflix', 'Coffee shop', 'Uber ride', 'Coffee shop']
+    assert len(gemini.prompts) == 1
+    assert gemini.prompts[0].count('"Coffee shop"') == 1
+
+
+def test_out_of_order_and_partial_replies_fall_back_to_other(gemini):
+    # The model answers in reverse and skips the first entry
+    gemini.reply = lambda entries: json.dumps([
+        {'id': e['id'], 'category': gemini.answers.get(e['description'], 'Nonsense')} for e in reversed(entries[1:])
+    ])
+    results = categorize('Coffee shop', 'Mystery charge', 'Uber ride')
+    assert [r['category'] for r in results] == ['Other', 'Other', 'Transport']
+    assert [r['confidence'] for r in results] == ['low', 'low', 'high']
+
+
+def test_failed_prompt_falls_back_to_other_and_is_not_cached(gemini, db):
+    gemini.reply = lambda entries: 'Sorry, I cannot help with that.'
+    results = categorize('Coffee shop', 'Uber ride')
+    assert [(r['category'], r['confidence']) for r in results] == [('Other', 'low')] * 2
+    assert db.tables.get('ai_category_cache', {}) == {}
+
+
+def test_answers_are_cached_for_the_next_batch(gemini):
+    categorize('Coffee shop', 'Uber ride')
+    results = categorize('Uber ride', 'Netflix')
+    assert [(r['category'], r['cached']) for r in results] == [('Transport', True), ('Entertainment', False)]
+    assert len(gemini.prompts) == 2
+    assert '"Uber ride"' not in gemini.prompts[1]
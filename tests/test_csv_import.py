@@ -0,0 +1,33 @@
+CSV = """Date,Type,Category,Amount,Description
+2024-03-01,expense,Food,12.50,Lunch
+2024-03-02,expense,Food,twelve,Bad amount
+2024-03-03,income,Salary,3000,Payroll
+03/04/2024,expense,Rent,900,Bad date
+2024-03-05,transfer,Other,50,Unknown type
+2024-03-06,Expense,Transport,8.25,Bus
+"""
+
+
+def test_mixed_upload_imports_valid_rows_and_reports_the_rest(client, db):
+    response = client.post('/api/transactions/import/csv', params={'batch_size': 2},
+                           files={'file': ('transactions.csv', CSV, 'text/csv')})
+    assert response.status_code == 200
+    result = response.json()
+
+    assert result['accepted'] == 3
+    assert result['rejected'] == 3
+    assert result['errors_truncated'] is False
+    # Line 1 is the header, so the first data row is line 2
+    assert [error['line'] for error in result['errors']] == [3, 5, 6]
+    assert 'amount' in result['errors'][0]['error']
+    assert result['errors'][1]['error'] == "Date must be in YYYY-MM-DD format, got '03/04/2024'"
+    assert 'type' in result['errors'][2]['error']
+
+    imported = client.get('/api/transactions').json()
+    assert sorted(row['description'] for row in imported) == ['Bus', 'Lunch', 'Payroll']
+
+
+def test_raw_body_upload_reports_the_same_lines(client):
+    response = client.post('/api/transactions/import/csv', content=CSV, headers={'Content-Type': 'text/csv'})
+    assert response.status_code == 200
+    assert [error['line'] for error in response.json()['errors']] == [3, 5, 6]
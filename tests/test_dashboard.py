@@ -0,0 +1,41 @@
+import asyncio
+from datetime import date
+
+import server_supabase as server
+
+CATEGORIES = ['Food', 'Rent', 'Transport', 'Utilities', 'Shopping', 'Travel']
+
+
+def month_start(months_back: int) -> date:
+    today = date.today()
+    index = today.year * 12 + today.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def test_dashboard_totals_cover_the_whole_history(db, user):
+    rows = []
+    # Ten years of six expense categories plus salary: 840 rollup rows
+    for months_back in range(120):
+        day = month_start(months_back).isoformat()
+        rows.append({'id': f'i{months_back}', 'user_id': 'u1', 'amount': 3000, 'type': 'income',
+                     'category': 'Salary', 'description': '', 'date': day, 'created_at': day})
+        rows += [{'id': f'e{months_back}-{c}', 'user_id': 'u1', 'amount': 100.25, 'type': 'expense',
+                  'category': c, 'description': '', 'date': day, 'created_at': day} for c in CATEGORIES]
+    db.load('transactions', rows)
+    db.rebuild_derived()
+
+    dashboard = asyncio.run(server.get_dashboard_data(current_user=user))
+
+    assert dashboard['total_balance'] == round(120 * 3000 - 120 * 6 * 100.25, 2)
+    assert dashboard['monthly_income'] == 3000
+    assert dashboard['monthly_expenses'] == round(6 * 100.25, 2)
+    assert dashboard['spending_by_category'] == {c: 100.25 for c in CATEGORIES}
+    assert len(dashboard['recent_transactions']) == 5
+
+
+def test_dashboard_for_a_new_user(db, user):
+    dashboard = asyncio.run(server.get_dashboard_data(current_user=user))
+    assert dashboard['total_balance'] == 0
+    assert dashboard['monthly_expenses'] == 0
+    assert dashboard['spending_by_category'] == {}
+    assert dashboard['recent_transactions'] == []
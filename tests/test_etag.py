@@ -0,0 +1,49 @@
+import pytest
+
+TRANSACTION = {'amount': 12.5, 'type': 'expense', 'category': 'Food', 'description': 'Lunch', 'date': '2024-03-05'}
+
+
+def etag(client, path: str, **params) -> str:
+    response = client.get(path, params=params)
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+@pytest.mark.parametrize('path', ['/api/transactions', '/api/budgets', '/api/dashboard'])
+def test_matching_if_none_match_returns_304(client, path):
+    tag = etag(client, path)
+    assert tag.startswith('W/"')
+
+    response = client.get(path, headers={'If-None-Match': tag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == tag
+    assert response.content == b''
+
+
+def test_weak_etag_is_matched_among_several_tags(client):
+    tag = etag(client, '/api/transactions')
+    assert client.get('/api/transactions', headers={'If-None-Match': f'W/"stale", {tag}'}).status_code == 304
+    assert client.get('/api/transactions', headers={'If-None-Match': '*'}).status_code == 304
+    # The same value without the weak prefix is a different tag
+    assert client.get('/api/transactions', headers={'If-None-Match': tag[2:]}).status_code == 200
+
+
+def test_write_bumps_the_data_version_and_changes_the_etag(client, db):
+    before = etag(client, '/api/transactions')
+    assert client.post('/api/transactions', json=TRANSACTION).status_code == 200
+    assert db.tables['user_data_versions']['u1'][0]['version'] == 1
+
+    response = client.get('/api/transactions', headers={'If-None-Match': before})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != before
+    assert [row['description'] for row in response.json()] == ['Lunch']
+
+
+def test_etag_depends_on_the_query_string(client):
+    unfiltered = etag(client, '/api/transactions')
+    food = etag(client, '/api/transactions', category='Food')
+    assert len({unfiltered, food, etag(client, '/api/transactions', category='Rent')}) == 3
+    assert etag(client, '/api/transactions', category='Food') == food
+
+    response = client.get('/api/transactions', params={'category': 'Rent'}, headers={'If-None-Match': food})
+    assert response.status_code == 200
@@ -0,0 +1,67 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+import server_supabase as server
+
+
+def transaction(day: str, amount: float = 10) -> dict:
+    return {'id': str(uuid.uuid4()), 'user_id': 'u1', 'amount': amount, 'type': 'expense', 'category': 'Food',
+            'description': '', 'date': day, 'created_at': '2024-01-01T00:00:00+00:00'}
+
+
+def pages(client, **params) -> list:
+    """Follow next_cursor from the first page to the last."""
+    result, cursor = [], None
+    while True:
+        response = client.get('/api/transactions', params={**params, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        result.append(response.json())
+        cursor = result[-1]['next_cursor']
+        if cursor is None:
+            return result
+
+
+def test_cursor_round_trip():
+    row = transaction('2024-03-05')
+    assert server.decode_cursor(server.encode_cursor(row)) == ('2024-03-05', row['id'])
+
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!',
+    server.encode_cursor({'date': '2024-13-40', 'id': str(uuid.uuid4())}),
+    server.encode_cursor({'date': '2024-03-05', 'id': 'not-a-uuid'}),
+    server.encode_offset_cursor(10)
+])
+def test_malformed_cursor_is_rejected(client, cursor):
+    response = client.get('/api/transactions', params={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json()['detail'] == "Invalid pagination cursor"
+
+
+def test_rows_sharing_a_date_are_split_across_pages_by_id(client, db):
+    # Seven rows on one day and three on the day before, paged three at a time
+    today, yesterday = date.today().isoformat(), (date.today() - timedelta(days=1)).isoformat()
+    rows = [transaction(today) for _ in range(7)] + [transaction(yesterday) for _ in range(3)]
+    db.load('transactions', rows)
+
+    result = pages(client, limit=3)
+    ids = [item['id'] for page in result for item in page['items']]
+    expected = sorted(rows, key=lambda row: (row['date'], row['id']), reverse=True)
+    assert ids == [row['id'] for row in expected]
+    assert [len(page['items']) for page in result] == [3, 3, 3, 1]
+
+
+def test_last_page_has_no_next_cursor(client, db):
+    db.load('transactions', [transaction((date.today() - timedelta(days=n)).isoformat()) for n in range(4)])
+
+    # An exact fit does not promise an empty extra page
+    result = pages(client, limit=4)
+    assert len(result) == 1
+    assert len(result[0]['items']) == 4
+    assert result[0]['next_cursor'] is None
+
+    result = pages(client, limit=3)
+    assert [len(page['items']) for page in result] == [3, 1]
+    assert result[-1]['next_cursor'] is None
@@ -0,0 +1,57 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+import server_supabase as server
+from benchmarks.fakes import FakeSupabase
+
+
+RESPONSE_KEYS = {'mode', 'month', 'forecast', 'categories', 'historical_average', 'trend', 'prediction'}
+
+
+def months_ago(n: int) -> str:
+    today = date.today()
+    index = today.year * 12 + today.month - 1 - n
+    return date(index // 12, index % 12 + 1, 15).isoformat()
+
+
+def seed(db: FakeSupabase):
+    db.load('transactions', [
+        {'id': f't{n}', 'user_id': 'u1', 'amount': 100 + n + 1 / 3, 'type': 'expense', 'category': 'Food',
+         'description': '', 'date': months_ago(n), 'created_at': '2024-01-01T00:00:00+00:00'}
+        for n in range(1, 4)
+    ])
+    db.rebuild_derived()
+
+
+def predict(user, mode=None):
+    return asyncio.run(server.ai_predict_spending(mode, current_user=user))
+
+
+def test_default_mode_is_local_and_skips_gemini(db, model, user):
+    seed(db)
+    result = predict(user)
+    assert result['mode'] == 'local'
+    assert set(result) == RESPONSE_KEYS
+    assert result['prediction'] is None
+    assert [c['category'] for c in result['categories']] == ['Food']
+    assert model.calls == 0
+
+
+@pytest.mark.parametrize('mode', ['local', 'hybrid', 'llm'])
+def test_every_mode_returns_the_same_keys(db, model, user, mode):
+    seed(db)
+    result = predict(user, mode)
+    assert set(result) == RESPONSE_KEYS
+    assert result['mode'] == mode
+    assert (result['prediction'] is not None) == (mode != 'local')
+    assert result['historical_average'] == round(result['historical_average'], 2)
+
+
+def test_hybrid_without_history_keeps_the_shape(db, model, user):
+    result = predict(user, 'hybrid')
+    assert set(result) == RESPONSE_KEYS
+    assert result['prediction'] is None
+    assert result['categories'] == []
+    assert model.calls == 0